@@ -10,12 +10,12 @@ routes involving DB interaction.
 """
 
 import logging
+import pathlib
 import secrets
+import socket
 import string
-import time
-from typing import Optional, Union
+from typing import List, Optional, Union
 
-import psycopg2  # type: ignore[import]
 from charms.data_platform_libs.v0.data_interfaces import DatabaseRequires
 from charms.grafana_k8s.v0.grafana_auth import (
     GrafanaAuthProxyProvider,
@@ -32,9 +32,13 @@ from charms.observability_libs.v1.kubernetes_service_patch import (
 from ops.charm import (
     ActionEvent,
     CharmBase,
+    ConfigChangedEvent,
+    PebbleCheckRecoveredEvent,
     PebbleReadyEvent,
     RelationBrokenEvent,
+    RelationEvent,
     RelationJoinedEvent,
+    UpdateStatusEvent,
 )
 from ops.main import main
 from ops.model import (
@@ -45,7 +49,13 @@ from ops.model import (
     Relation,
     WaitingStatus,
 )
-from ops.pebble import ConnectionError, ExecError, Layer
+from ops.pebble import (
+    ChangeError,
+    ConnectionError,
+    ExecError,
+    Layer,
+    PathError,
+)
 from pgconnstr import ConnectionString  # type: ignore[import]
 
 logger = logging.getLogger(__name__)
@@ -67,6 +77,19 @@ class MagmaNmsMagmalteCharm(CharmBase):
     CERT_ADMIN_OPERATOR_RELATION = "cert-admin-operator"
     NMS_MAGMALTE_K8S_SERVICE_NAME = "magmalte"
     NMS_MAGMALTE_K8S_SERVICE_PORT = 8081
+    NMS_MAGMALTE_READY_CHECK_NAME = "magmalte-ready"
+    NMS_MAGMALTE_READY_PROBE_TIMEOUT = 5
+    CLUSTER_SCRIPT_PATH = "/usr/local/bin/magmalte-cluster.js"
+    CGROUP_MEMORY_LIMIT_PATHS = [
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ]
+    # Share of the container memory limit given to V8 heaps, the rest being left for buffers,
+    # native memory and the cluster primary process.
+    HEAP_MEMORY_LIMIT_RATIO = 0.75
+    # Lower bound of the maximum heap size derived from the memory limit, in MiB
+    MIN_MAX_HEAP_SIZE = 256
+    PEER_RELATION = "replicas"
 
     def __init__(self, *args):
         """Initializes all event that need to be observed."""
@@ -95,8 +118,19 @@ class MagmaNmsMagmalteCharm(CharmBase):
             self, auto_sign_up=False, relation_name=self.GRAFANA_AUTH_RELATION
         )
         self.framework.observe(self.on.magma_nms_magmalte_pebble_ready, self._configure_workload)
+        self.framework.observe(self.on.config_changed, self._configure_workload)
         self.framework.observe(self._database.on.database_created, self._configure_workload)
         self.framework.observe(self.on.database_relation_broken, self._on_database_relation_broken)
+        self.framework.observe(self.on.update_status, self._on_update_status)
+        self.framework.observe(
+            self.on.magma_nms_magmalte_pebble_check_recovered, self._on_pebble_check_recovered
+        )
+        self.framework.observe(
+            self.on[self.PEER_RELATION].relation_changed, self._on_peer_relation_changed
+        )
+        self.framework.observe(
+            self.on[self.PEER_RELATION].relation_departed, self._on_peer_relation_changed
+        )
         self.framework.observe(
             self.on.magma_nms_magmalte_relation_joined,
             self._on_magma_nms_magmalte_relation_joined,
@@ -167,8 +201,102 @@ class MagmaNmsMagmalteCharm(CharmBase):
             "MYSQL_DIALECT": "postgres",
             "PUPPETEER_SKIP_DOWNLOAD": "true",
             "USER_GRAFANA_ADDRESS": self._grafana_url,
+            "SESSION_TOKEN": str(self._session_token),
+            **self._tuning_environment_variables,
         }
 
+    @property
+    def _tuning_environment_variables(self) -> dict:
+        """Returns environment variables tuning the workload processes.
+
+        Only non-default values are set, so that magmalte defaults apply otherwise.
+
+        Returns:
+            dict: Environment variables
+        """
+        environment = {}
+        if self._workers > 1:
+            environment["MAGMALTE_WORKERS"] = str(self._workers)
+        if max_heap_size := self._max_heap_size:
+            environment["NODE_OPTIONS"] = f"--max-old-space-size={max_heap_size}"
+        return environment
+
+    @property
+    def _workers(self) -> int:
+        """Returns the number of magmalte worker processes.
+
+        Returns:
+            int: Number of workers
+        """
+        return int(self.model.config["workers"])
+
+    @property
+    def _max_heap_size(self) -> Optional[int]:
+        """Returns the maximum V8 old space size of each worker, in MiB.
+
+        Unless set in the charm config, it is derived from the container memory limit, and is
+        never less than `MIN_MAX_HEAP_SIZE`.
+
+        Returns:
+            int: Maximum heap size, None to use the Node.js default
+        """
+        if max_heap_size := int(self.model.config["max-heap-size"]):
+            return max_heap_size
+        if not (memory_limit := self._container_memory_limit):
+            return None
+        max_heap_size = int(memory_limit * self.HEAP_MEMORY_LIMIT_RATIO / self._workers) // 2**20
+        if max_heap_size < self.MIN_MAX_HEAP_SIZE:
+            logger.warning(
+                "Memory limit too low for %d workers, using a maximum heap size of %d MiB",
+                self._workers,
+                self.MIN_MAX_HEAP_SIZE,
+            )
+            return self.MIN_MAX_HEAP_SIZE
+        return max_heap_size
+
+    @property
+    def _container_memory_limit(self) -> Optional[int]:
+        """Returns the memory limit of the workload container, read from its cgroup.
+
+        Returns:
+            int: Memory limit in bytes, None if the container has no memory limit
+        """
+        for path in self.CGROUP_MEMORY_LIMIT_PATHS:
+            try:
+                memory_limit = self._container.pull(path).read().strip()
+            except PathError:
+                continue
+            # cgroup v1 reports a very large number instead of "max" when there is no limit
+            if memory_limit.isdigit() and int(memory_limit) < 2**60:
+                return int(memory_limit)
+            return None
+        return None
+
+    @property
+    def _invalid_config_options(self) -> List[str]:
+        """Returns the names of the config options with invalid values.
+
+        Returns:
+            list: Invalid config options
+        """
+        minimums = {"workers": 1, "max-heap-size": 0}
+        return [
+            option
+            for option, minimum in minimums.items()
+            if int(self.model.config[option]) < minimum
+        ]
+
+    @property
+    def _workload_command(self) -> str:
+        """Returns the command starting magmalte, in cluster mode when using several workers.
+
+        Returns:
+            str: Workload command
+        """
+        if self._workers > 1:
+            return f"node {self.CLUSTER_SCRIPT_PATH}"
+        return "yarn run start:prod"
+
     @property
     def _pebble_layer(self) -> Layer:
         """Returns pebble layer for the charm.
@@ -188,10 +316,17 @@ class MagmaNmsMagmalteCharm(CharmBase):
                         "command": f"/usr/local/bin/wait-for-it.sh -s -t 30 "
                         f"{self._get_db_connection_string.host}:"
                         f"{self._get_db_connection_string.port} "
-                        f"-- yarn run start:prod",
+                        f"-- {self._workload_command}",
                         "environment": self._environment_variables,
                     }
                 },
+                "checks": {
+                    self.NMS_MAGMALTE_READY_CHECK_NAME: {
+                        "override": "replace",
+                        "level": "ready",
+                        "tcp": {"port": self.NMS_MAGMALTE_K8S_SERVICE_PORT},
+                    }
+                },
             }
         )
 
@@ -204,6 +339,8 @@ class MagmaNmsMagmalteCharm(CharmBase):
         Returns:
             bool: Whether the database relation is established.
         """
+        import psycopg2  # type: ignore[import]
+
         db_connection_string = self._get_db_connection_string
         if not db_connection_string:
             return False
@@ -310,37 +447,39 @@ class MagmaNmsMagmalteCharm(CharmBase):
         self._container.push(
             path=f"{self.BASE_CERTS_PATH}/admin_operator.key.pem", source=event.private_key
         )
-        self._configure_workload(event)
+        self._configure_workload(event, restart=True)
 
     def _configure_workload(
         self,
         event: Union[
-            PebbleReadyEvent, CertificateAvailableEvent, UrlsAvailableEvent, RelationJoinedEvent
+            ConfigChangedEvent,
+            PebbleReadyEvent,
+            CertificateAvailableEvent,
+            UrlsAvailableEvent,
+            RelationJoinedEvent,
         ],
+        restart: bool = False,
     ) -> None:
         """Configures pebble layer and creates admin user of nms-magmalte.
 
         Args:
             event (
-            PebbleReadyEvent, CertificateAvailableEvent, UrlsAvailableEvent, RelationJoinedEvent
+            ConfigChangedEvent, PebbleReadyEvent, CertificateAvailableEvent, UrlsAvailableEvent,
+            RelationJoinedEvent
             ): Juju event
+            restart (bool): Whether to restart the workload even if its layer is unchanged
 
         Returns:
             None
         """
-        if not self._db_relation_created:
-            self.unit.status = BlockedStatus("Waiting for database relation to be created")
-            event.defer()
-            return
-        if not self._cert_admin_operator_relation_created:
+        if invalid_config_options := self._invalid_config_options:
             self.unit.status = BlockedStatus(
-                f"Waiting for {self.CERT_ADMIN_OPERATOR_RELATION} relation to be created"
+                f"Invalid config options: {', '.join(invalid_config_options)}"
             )
-            event.defer()
             return
-        if not self._grafana_auth_relation_created:
+        if missing_relation := self._missing_relation:
             self.unit.status = BlockedStatus(
-                f"Waiting for {self.GRAFANA_AUTH_RELATION} relation to be created"
+                f"Waiting for {missing_relation} relation to be created"
             )
             event.defer()
             return
@@ -356,47 +495,306 @@ class MagmaNmsMagmalteCharm(CharmBase):
             self.unit.status = WaitingStatus("Grafana url not yet available from relation data.")
             event.defer()
             return
-        self._configure_pebble(event)
+        if not self._session_token_is_shared():
+            event.defer()
+            return
+        self._configure_pebble(event, restart)
+        if self._peer_unit_data.get("restart") == "requested":
+            self.unit.status = MaintenanceStatus("Waiting for rolling restart")
+            return
+        self.unit.status = ActiveStatus()
         if self.unit.is_leader():
             self._create_host_nms_admin_user()
+
+    @property
+    def _missing_relation(self) -> Optional[str]:
+        """Returns the name of the first required relation which is not created.
+
+        Returns:
+            str: Relation name, None if all required relations are created
+        """
+        if not self._db_relation_created:
+            return "database"
+        if not self._cert_admin_operator_relation_created:
+            return self.CERT_ADMIN_OPERATOR_RELATION
+        if not self._grafana_auth_relation_created:
+            return self.GRAFANA_AUTH_RELATION
+        return None
+
+    def _session_token_is_shared(self) -> bool:
+        """Makes sure the session token is shared in the peer relation, generating it if leader.
+
+        Returns:
+            bool: Whether the session token is available
+        """
+        if not self.model.get_relation(self.PEER_RELATION):
+            self.unit.status = WaitingStatus("Waiting for peer relation to be created")
+            return False
+        if not self._session_token:
+            if not self.unit.is_leader():
+                self.unit.status = WaitingStatus("Waiting for leader to generate session token")
+                return False
+            self._peer_app_data.update({"session_token": secrets.token_hex(32)})
+        return True
+
+    def _on_update_status(self, event: UpdateStatusEvent) -> None:
+        """Retries creating the host NMS admin user if it was not created yet.
+
+        Args:
+            event (UpdateStatusEvent): Juju event
+
+        Returns:
+            None
+        """
+        self._complete_rolling_restart()
+        self._retry_host_nms_admin_user_creation()
+
+    def _on_pebble_check_recovered(self, event: PebbleCheckRecoveredEvent) -> None:
+        """Creates the host NMS admin user as soon as magmalte becomes ready.
+
+        Args:
+            event (PebbleCheckRecoveredEvent): Juju event
+
+        Returns:
+            None
+        """
+        if event.info.name != self.NMS_MAGMALTE_READY_CHECK_NAME:
+            return
+        self._complete_rolling_restart()
+        self._retry_host_nms_admin_user_creation()
+
+    def _on_peer_relation_changed(self, event: RelationEvent) -> None:
+        """Hands the rolling restart over to the next unit once a unit completed its restart.
+
+        Args:
+            event (RelationEvent): Juju event
+
+        Returns:
+            None
+        """
+        self._grant_rolling_restart()
+        self._restart_if_granted()
+
+    def _restart_workload(self) -> None:
+        """Restarts the workload, one unit at a time when it is already serving requests.
+
+        Units request a restart in their peer relation data bag. The leader grants it to a
+        single unit at a time, and hands it over to the next unit once the restarted unit
+        passes its readiness check, so that the other units keep serving the UI.
+
+        Returns:
+            None
+        """
+        if not self._workload_is_running:
+            self._container.restart(self._service_name)
+            logger.info(f"Restarted service {self._service_name}")
+            return
+        self._peer_unit_data.update({"restart": "requested"})
+        logger.info("Requested rolling restart of service %s", self._service_name)
+        self._grant_rolling_restart()
+        self._restart_if_granted()
+
+    def _grant_rolling_restart(self) -> None:
+        """Grants the rolling restart to the next unit which requested it, if none holds it.
+
+        Returns:
+            None
+        """
+        if not self.unit.is_leader():
+            return
+        relation = self.model.get_relation(self.PEER_RELATION)
+        if not relation:
+            return
+        units = sorted(relation.units | {self.unit}, key=lambda unit: int(unit.name.split("/")[1]))
+        granted_unit = self._peer_app_data.get("restart_granted")
+        for unit in units:
+            if unit.name == granted_unit and relation.data[unit].get("restart"):
+                return
+        next_unit = next(
+            (unit.name for unit in units if relation.data[unit].get("restart") == "requested"), ""
+        )
+        if next_unit != granted_unit:
+            self._peer_app_data.update({"restart_granted": next_unit})
+
+    def _restart_if_granted(self) -> None:
+        """Restarts the workload if this unit requested a restart and holds the grant.
+
+        Returns:
+            None
+        """
+        if not self.model.get_relation(self.PEER_RELATION):
+            return
+        if self._peer_unit_data.get("restart") != "requested":
+            return
+        if self._peer_app_data.get("restart_granted") != self.unit.name:
+            return
+        if not self._container.can_connect():
+            return
+        self._container.restart(self._service_name)
+        self._peer_unit_data.update({"restart": "restarting"})
+        self.unit.status = MaintenanceStatus("Rolling restart in progress")
+        logger.info(f"Restarted service {self._service_name}")
+
+    def _complete_rolling_restart(self) -> None:
+        """Releases the rolling restart grant once the restarted workload is ready.
+
+        Returns:
+            None
+        """
+        if not self.model.get_relation(self.PEER_RELATION):
+            return
+        if self._peer_unit_data.get("restart") != "restarting":
+            return
+        if not self._container.can_connect() or not self._magmalte_is_ready:
+            return
+        self._peer_unit_data.update({"restart": ""})
         self.unit.status = ActiveStatus()
+        self._grant_rolling_restart()
+
+    def _retry_host_nms_admin_user_creation(self) -> None:
+        """Creates the host NMS admin user if the workload is running and the user is missing.
+
+        Returns:
+            None
+        """
+        if not self.unit.is_leader() or not self.model.get_relation(self.PEER_RELATION):
+            return
+        if self._host_nms_admin_user_created:
+            return
+        if not self._service_is_running:
+            return
+        self._create_host_nms_admin_user()
 
     def _create_host_nms_admin_user(self) -> None:
-        """Creates NMS admin user.
+        """Makes a single attempt at creating the NMS admin user of the host organization.
+
+        This never waits inside the hook. When magmalte is not ready yet or when the attempt
+        fails, the unit goes to waiting status and the next update-status event (or the recovery
+        of the readiness check) makes a new attempt. Attempts are recorded in the peer relation
+        data.
 
         Returns:
             None
         """
+        if self._host_nms_admin_user_created:
+            return
         if not self._admin_password:
             self._create_admin_password()
-        start_time = time.time()
-        timeout = 60
-        while time.time() - start_time < timeout:
-            try:
-                if self._admin_password:
-                    self._create_nms_admin_user(
-                        self.NMS_ADMIN_USERNAME, self._admin_password, "host"
-                    )
-                else:
-                    logger.error(
-                        "Admin password not present after creating it. This should never happen."
-                    )
-                return
-            except (ExecError, ServiceNotRunningError):
-                logger.info("Failed to create admin user - Will retry in 5 seconds")
-                time.sleep(5)
-        message = "Timed out trying to create admin user for NMS"
-        logger.info(message)
-        raise TimeoutError(message)
+        if not self._magmalte_is_ready:
+            self.unit.status = WaitingStatus(
+                "Waiting for magmalte to be ready to create admin user"
+            )
+            return
+        attempts = self._host_nms_admin_user_creation_attempts + 1
+        self._peer_app_data.update({"admin_user_creation_attempts": str(attempts)})
+        try:
+            self._create_nms_admin_user(
+                self.NMS_ADMIN_USERNAME, self._admin_password, "host"  # type: ignore[arg-type]
+            )
+        except (ChangeError, ExecError, ServiceNotRunningError):
+            logger.info("Failed to create admin user (attempt %d) - Will retry later", attempts)
+            self.unit.status = WaitingStatus(
+                f"Waiting to retry admin user creation ({attempts} failed attempts)"
+            )
+            return
+        self._peer_app_data.update({"admin_user_created": "True"})
+        self.unit.status = ActiveStatus()
+
+    @property
+    def _magmalte_is_ready(self) -> bool:
+        """Returns whether magmalte accepts connections on its service port.
+
+        The port is probed directly, as the status of the readiness check is up until the check
+        runs for the first time.
+
+        Returns:
+            bool: True/False
+        """
+        try:
+            with socket.create_connection(
+                ("localhost", self.NMS_MAGMALTE_K8S_SERVICE_PORT),
+                timeout=self.NMS_MAGMALTE_READY_PROBE_TIMEOUT,
+            ):
+                return True
+        except OSError:
+            return False
+
+    @property
+    def _host_nms_admin_user_created(self) -> bool:
+        """Returns whether the NMS admin user of the host organization was created.
+
+        Returns:
+            bool: True/False
+        """
+        if not self.model.get_relation(self.PEER_RELATION):
+            return False
+        return self._peer_app_data.get("admin_user_created") == "True"
+
+    @property
+    def _host_nms_admin_user_creation_attempts(self) -> int:
+        """Returns the number of attempts made at creating the host NMS admin user.
+
+        Returns:
+            int: Number of attempts
+        """
+        return int(self._peer_app_data.get("admin_user_creation_attempts", 0))
+
+    @property
+    def _peer_app_data(self):
+        """Returns the application data bag of the peer relation.
+
+        Returns:
+            RelationDataContent: Application data bag
+        """
+        return self.model.get_relation(self.PEER_RELATION).data[self.app]  # type: ignore[union-attr]  # noqa: E501
+
+    @property
+    def _peer_unit_data(self):
+        """Returns the unit data bag of the peer relation.
+
+        Returns:
+            RelationDataContent: Unit data bag
+        """
+        return self.model.get_relation(self.PEER_RELATION).data[self.unit]  # type: ignore[union-attr]  # noqa: E501
+
+    @property
+    def _session_token(self) -> Optional[str]:
+        """Returns the secret signing magmalte session cookies, shared by all units.
+
+        Sessions are stored in the NMS database, so that any unit can serve any user as long as
+        all of them sign session cookies with the same secret.
+
+        Returns:
+            str: Session token
+        """
+        return self._peer_app_data.get("session_token") or None
+
+    @property
+    def _workload_is_running(self) -> bool:
+        """Returns whether the workload service is running.
+
+        Returns:
+            bool: True/False
+        """
+        try:
+            return self._container.get_service(self._service_name).is_running()
+        except ModelError:
+            return False
 
     def _on_database_relation_broken(self, event: RelationBrokenEvent):
         """Event handler for database relation broken.
 
+        The host NMS admin user will be created again once a new database is related.
+
         Args:
             event (RelationBrokenEvent): Juju event
         Returns:
             None
         """
+        if self.unit.is_leader() and self.model.get_relation("replicas"):
+            self._peer_app_data.update(
+                {"admin_user_created": "", "admin_user_creation_attempts": "0"}
+            )
         self.unit.status = BlockedStatus("Waiting for database relation to be created")
 
     def _on_magma_nms_magmalte_relation_joined(self, event: RelationJoinedEvent) -> None:
@@ -432,46 +830,70 @@ class MagmaNmsMagmalteCharm(CharmBase):
     def _publish_nms_magmalte_k8s_service_details(self, relation: Relation) -> None:
         """Publishes the details of the nms-magmalte Kubertnetes service.
 
+        The service selects all units of the application, so requests are spread across them.
+        Details are published in the application data bag, and in the unit data bag for requirers
+        reading them from there.
+
         Args:
             relation (Relation): Juju relation
         """
-        relation.data[self.unit].update(
-            {
-                "k8s_service_name": self.NMS_MAGMALTE_K8S_SERVICE_NAME,
-                "k8s_service_port": str(self.NMS_MAGMALTE_K8S_SERVICE_PORT),
-            }
-        )
+        service_details = {
+            "k8s_service_name": self.NMS_MAGMALTE_K8S_SERVICE_NAME,
+            "k8s_service_port": str(self.NMS_MAGMALTE_K8S_SERVICE_PORT),
+        }
+        relation.data[self.app].update(service_details)
+        relation.data[self.unit].update(service_details)
 
     def _configure_pebble(
         self,
         event: Union[
-            PebbleReadyEvent, CertificateAvailableEvent, UrlsAvailableEvent, RelationJoinedEvent
+            ConfigChangedEvent,
+            PebbleReadyEvent,
+            CertificateAvailableEvent,
+            UrlsAvailableEvent,
+            RelationJoinedEvent,
         ],
+        restart: bool = False,
     ) -> None:
         """Configures pebble layer.
 
+        Adds layer to pebble config if the proposed config is different from the current one, and
+        restarts the workload when the layer changed.
+
         Args:
             event (PebbleReadyEvent): Juju event
+            restart (bool): Whether to restart the workload even if its layer is unchanged
 
         Returns:
             None
         """
-        """Adds layer to pebble config if the proposed config is different from the current one."""
         if self._container.can_connect():
             plan = self._container.get_plan()
+            if self._workers > 1:
+                self._push_cluster_script()
             layer = self._pebble_layer
             if plan.services != layer.services:
                 self.unit.status = MaintenanceStatus(
                     f"Configuring pebble layer for {self._service_name}"
                 )
                 self._container.add_layer(self._container_name, layer, combine=True)
-            self._container.restart(self._service_name)
-            logger.info(f"Restarted service {self._service_name}")
+                restart = True
+            if restart or not self._workload_is_running:
+                self._restart_workload()
             self._update_relations()
         else:
             self.unit.status = WaitingStatus("Waiting for container to be ready")
             event.defer()
 
+    def _push_cluster_script(self) -> None:
+        """Pushes the script running magmalte in Node.js cluster mode to the workload.
+
+        Returns:
+            None
+        """
+        cluster_script = pathlib.Path(__file__).parent / "magmalte_cluster.js"
+        self._container.push(self.CLUSTER_SCRIPT_PATH, cluster_script.read_text(), make_dirs=True)
+
     def _update_relations(self) -> None:
         """Updates nms_magmalte relation with the workload service status.
 
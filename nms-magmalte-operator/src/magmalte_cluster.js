@@ -0,0 +1,53 @@
+// Copyright 2022 Canonical Ltd.
+// See LICENSE file for licensing details.
+
+// Runs the magmalte server in Node.js cluster mode.
+//
+// The server command is read from the `start:prod` script of magmalte's package.json, so that
+// workers run exactly what `yarn run start:prod` would. Workers share the listening port and are
+// forked again when they exit, so that a crashing worker doesn't take the UI down.
+
+const cluster = require('cluster');
+const fs = require('fs');
+const path = require('path');
+
+const workers = parseInt(process.env.MAGMALTE_WORKERS || '1', 10);
+
+function startProdCommand() {
+  const packageJson = JSON.parse(
+    fs.readFileSync(path.join(process.cwd(), 'package.json'), 'utf8'),
+  );
+  const tokens = packageJson.scripts['start:prod'].trim().split(/\s+/);
+  const env = {};
+  while (tokens.length && /^[A-Z_][A-Z0-9_]*=/.test(tokens[0])) {
+    const [name, ...value] = tokens.shift().split('=');
+    env[name] = value.join('=');
+  }
+  if (tokens.shift() !== 'node') {
+    throw new Error('magmalte start:prod script is not a node command');
+  }
+  const execArgv = [];
+  while (tokens.length && tokens[0].startsWith('-')) {
+    const option = tokens.shift();
+    execArgv.push(option);
+    if (['-r', '--require'].includes(option)) {
+      execArgv.push(tokens.shift());
+    }
+  }
+  return {env, execArgv, exec: tokens.shift(), args: tokens};
+}
+
+const command = startProdCommand();
+Object.assign(process.env, command.env);
+cluster.setupPrimary({
+  exec: command.exec,
+  args: command.args,
+  execArgv: [...process.execArgv, ...command.execArgv],
+});
+cluster.on('exit', (worker, code, signal) => {
+  console.log(`magmalte worker ${worker.process.pid} exited (${signal || code}), forking again`);
+  cluster.fork();
+});
+for (let i = 0; i < workers; i++) {
+  cluster.fork();
+}
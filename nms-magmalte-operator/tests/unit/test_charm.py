@@ -2,10 +2,10 @@
 # See LICENSE file for licensing details.
 
 import unittest
-from unittest.mock import Mock, PropertyMock, call, patch
+from unittest.mock import MagicMock, Mock, PropertyMock, call, patch
 
 from ops import testing
-from ops.model import ActiveStatus, BlockedStatus
+from ops.model import ActiveStatus, BlockedStatus, MaintenanceStatus, WaitingStatus
 from ops.pebble import ExecError
 
 from charm import MagmaNmsMagmalteCharm, ServiceNotRunningError
@@ -155,6 +155,9 @@ class TestCharm(unittest.TestCase):
             key_values=self.DATABASE_DATABAG,
             app_or_unit="postgresql-k8s",
         )
+        self.harness.update_relation_data(
+            self.peer_relation_id, "magma-nms-magmalte", {"session_token": "test-session-token"}
+        )
 
         self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
         expected_plan = {
@@ -181,14 +184,23 @@ class TestCharm(unittest.TestCase):
                         "MYSQL_DIALECT": "postgres",
                         "PUPPETEER_SKIP_DOWNLOAD": "true",
                         "USER_GRAFANA_ADDRESS": self.GRAFANA_URLS[0],
+                        "SESSION_TOKEN": "test-session-token",
                     },
                 },
             },
+            "checks": {
+                "magmalte-ready": {
+                    "override": "replace",
+                    "level": "ready",
+                    "tcp": {"port": 8081},
+                },
+            },
         }
 
         updated_plan = self.harness.get_container_pebble_plan("magma-nms-magmalte").to_dict()
         self.assertEqual(expected_plan, updated_plan)
 
+    @patch("socket.create_connection", new=MagicMock())
     @patch("ops.model.Container.exec", new=Mock())
     @patch("ops.model.Container.exists")
     @patch("psycopg2.connect", new=Mock())
@@ -351,10 +363,10 @@ class TestCharm(unittest.TestCase):
         )
 
     @patch("ops.model.Container.get_service", new=Mock())
-    @patch("ops.charm.ActionEvent")
     def test_given_workload_service_is_running_and_peer_relation_not_created_when_get_admin_credentials_action_then_get_admin_credentials_fail(  # noqa: E501
-        self, action_event
+        self,
     ):
+        action_event = Mock()
         self.harness.remove_relation(self.peer_relation_id)
         self.harness.charm._on_get_host_admin_credentials(action_event)
 
@@ -517,6 +529,327 @@ class TestCharm(unittest.TestCase):
 
         patch_container_restart.assert_called_once()
 
+    @patch("socket.create_connection", new=Mock(side_effect=ConnectionRefusedError))
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists", new=Mock(return_value=True))
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_magmalte_not_ready_when_pebble_ready_then_admin_user_is_not_created_and_status_is_waiting(  # noqa: E501
+        self, grafana_url_mock, patch_exec
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self._create_database_and_cert_admin_operator_relations()
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        patch_exec.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            WaitingStatus("Waiting for magmalte to be ready to create admin user"),
+        )
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists", new=Mock(return_value=True))
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_admin_user_creation_fails_when_pebble_ready_then_attempt_is_recorded_and_status_is_waiting(  # noqa: E501
+        self, grafana_url_mock, patch_exec
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        patch_exec.return_value = MockExec(raise_exec_error=True)
+        self._create_database_and_cert_admin_operator_relations()
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        patch_exec.assert_called_once()
+        peer_data = self.harness.get_relation_data(self.peer_relation_id, "magma-nms-magmalte")
+        self.assertEqual(peer_data["admin_user_creation_attempts"], "1")
+        self.assertNotIn("admin_user_created", peer_data)
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            WaitingStatus("Waiting to retry admin user creation (1 failed attempts)"),
+        )
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists", new=Mock(return_value=True))
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_admin_user_creation_failed_when_update_status_then_admin_user_is_created(
+        self, grafana_url_mock, patch_exec
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        patch_exec.return_value = MockExec(raise_exec_error=True)
+        self._create_database_and_cert_admin_operator_relations()
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+        patch_exec.return_value = MockExec()
+
+        self.harness.charm.on.update_status.emit()
+
+        peer_data = self.harness.get_relation_data(self.peer_relation_id, "magma-nms-magmalte")
+        self.assertEqual(peer_data["admin_user_creation_attempts"], "2")
+        self.assertEqual(peer_data["admin_user_created"], "True")
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus())
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists", new=Mock(return_value=True))
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_admin_user_created_when_update_status_then_admin_user_is_not_created_again(
+        self, grafana_url_mock, patch_exec
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        patch_exec.return_value = MockExec()
+        self._create_database_and_cert_admin_operator_relations()
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+        patch_exec.reset_mock()
+
+        self.harness.charm.on.update_status.emit()
+
+        patch_exec.assert_not_called()
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists", new=Mock(return_value=True))
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_peer_relation_not_created_when_update_status_then_admin_user_creation_is_not_retried(  # noqa: E501
+        self, grafana_url_mock, patch_exec
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        patch_exec.return_value = MockExec(raise_exec_error=True)
+        self._create_database_and_cert_admin_operator_relations()
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+        self.harness.remove_relation(self.peer_relation_id)
+        patch_exec.reset_mock()
+
+        self.harness.charm.on.update_status.emit()
+
+        patch_exec.assert_not_called()
+
+    def test_given_invalid_workers_config_when_config_changed_then_status_is_blocked(self):
+        self.harness.update_config({"workers": 0})
+
+        self.assertEqual(
+            self.harness.charm.unit.status, BlockedStatus("Invalid config options: workers")
+        )
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_several_workers_when_pebble_ready_then_magmalte_runs_in_cluster_mode(
+        self, grafana_url_mock
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self.harness.update_config({"workers": 3})
+        self._create_database_and_cert_admin_operator_relations()
+        container = self._container_with_certs()
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        service = self.harness.get_container_pebble_plan("magma-nms-magmalte").services[
+            "magma-nms-magmalte"
+        ]
+        self.assertEqual(
+            service.command,
+            f"/usr/local/bin/wait-for-it.sh -s -t 30 {self.TEST_DB_HOST}:{self.TEST_DB_PORT} "
+            "-- node /usr/local/bin/magmalte-cluster.js",
+        )
+        self.assertEqual(service.environment["MAGMALTE_WORKERS"], "3")
+        self.assertNotIn("NODE_OPTIONS", service.environment)
+        self.assertIn(
+            "cluster.fork()", container.pull("/usr/local/bin/magmalte-cluster.js").read()
+        )
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_container_memory_limit_when_pebble_ready_then_max_heap_size_is_derived_from_limit(  # noqa: E501
+        self, grafana_url_mock
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self.harness.update_config({"workers": 2})
+        self._create_database_and_cert_admin_operator_relations()
+        container = self._container_with_certs()
+        container.push("/sys/fs/cgroup/memory.max", "1073741824\n", make_dirs=True)
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        service = self.harness.get_container_pebble_plan("magma-nms-magmalte").services[
+            "magma-nms-magmalte"
+        ]
+        self.assertEqual(service.environment["NODE_OPTIONS"], "--max-old-space-size=384")
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_low_container_memory_limit_when_pebble_ready_then_max_heap_size_is_not_below_minimum(  # noqa: E501
+        self, grafana_url_mock
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self.harness.update_config({"workers": 8})
+        self._create_database_and_cert_admin_operator_relations()
+        container = self._container_with_certs()
+        container.push("/sys/fs/cgroup/memory.max", "536870912\n", make_dirs=True)
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        service = self.harness.get_container_pebble_plan("magma-nms-magmalte").services[
+            "magma-nms-magmalte"
+        ]
+        self.assertEqual(service.environment["NODE_OPTIONS"], "--max-old-space-size=256")
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_max_heap_size_config_when_pebble_ready_then_configured_max_heap_size_is_used(
+        self, grafana_url_mock
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self.harness.update_config({"max-heap-size": 1024})
+        self._create_database_and_cert_admin_operator_relations()
+        container = self._container_with_certs()
+        container.push("/sys/fs/cgroup/memory.max", "max\n", make_dirs=True)
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        service = self.harness.get_container_pebble_plan("magma-nms-magmalte").services[
+            "magma-nms-magmalte"
+        ]
+        self.assertEqual(service.environment["NODE_OPTIONS"], "--max-old-space-size=1024")
+        self.assertEqual(service.command.split(" -- ")[1], "yarn run start:prod")
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_unit_is_leader_when_pebble_ready_then_session_token_is_shared_with_workload(
+        self, grafana_url_mock
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self._create_database_and_cert_admin_operator_relations()
+        self._container_with_certs()
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        peer_data = self.harness.get_relation_data(self.peer_relation_id, "magma-nms-magmalte")
+        service = self.harness.get_container_pebble_plan("magma-nms-magmalte").services[
+            "magma-nms-magmalte"
+        ]
+        self.assertEqual(len(peer_data["session_token"]), 64)
+        self.assertEqual(service.environment["SESSION_TOKEN"], peer_data["session_token"])
+
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    def test_given_unit_is_not_leader_and_session_token_not_shared_when_pebble_ready_then_status_is_waiting(  # noqa: E501
+        self, grafana_url_mock
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        self.harness.set_leader(False)
+        self._create_database_and_cert_admin_operator_relations()
+        self._container_with_certs()
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            WaitingStatus("Waiting for leader to generate session token"),
+        )
+        self.assertEqual(self.harness.get_container_pebble_plan("magma-nms-magmalte").services, {})
+
+    @patch("socket.create_connection", new=MagicMock())
+    @patch("ops.model.Container.exec", new=Mock())
+    @patch("psycopg2.connect", new=Mock())
+    @patch("charm.MagmaNmsMagmalteCharm._workload_is_running", new_callable=PropertyMock)
+    @patch("charm.MagmaNmsMagmalteCharm._grafana_url", new_callable=PropertyMock)
+    @patch("ops.model.Container.restart")
+    def test_given_other_unit_is_restarting_when_layer_changes_then_workload_is_restarted_once_other_unit_completed_its_restart(  # noqa: E501
+        self, patch_restart, grafana_url_mock, patch_workload_is_running
+    ):
+        grafana_url_mock.return_value = self.GRAFANA_URLS[0]
+        patch_workload_is_running.return_value = True
+        self._create_database_and_cert_admin_operator_relations()
+        self._container_with_certs()
+        self.harness.add_relation_unit(self.peer_relation_id, "magma-nms-magmalte/1")
+        self.harness.update_relation_data(
+            self.peer_relation_id, "magma-nms-magmalte/1", {"restart": "restarting"}
+        )
+        self.harness.update_relation_data(
+            self.peer_relation_id,
+            "magma-nms-magmalte",
+            {"restart_granted": "magma-nms-magmalte/1"},
+        )
+
+        self.harness.container_pebble_ready(container_name="magma-nms-magmalte")
+
+        patch_restart.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status, MaintenanceStatus("Waiting for rolling restart")
+        )
+
+        self.harness.update_relation_data(
+            self.peer_relation_id, "magma-nms-magmalte/1", {"restart": ""}
+        )
+
+        patch_restart.assert_called_once_with("magma-nms-magmalte")
+        peer_app_data = self.harness.get_relation_data(self.peer_relation_id, "magma-nms-magmalte")
+        peer_unit_data = self.harness.get_relation_data(
+            self.peer_relation_id, "magma-nms-magmalte/0"
+        )
+        self.assertEqual(peer_app_data["restart_granted"], "magma-nms-magmalte/0")
+        self.assertEqual(peer_unit_data["restart"], "restarting")
+
+    @patch("socket.create_connection", new=MagicMock())
+    def test_given_unit_restarting_and_magmalte_ready_when_update_status_then_rolling_restart_grant_is_released(  # noqa: E501
+        self,
+    ):
+        self.harness.set_can_connect("magma-nms-magmalte", True)
+        self.harness.update_relation_data(
+            self.peer_relation_id, "magma-nms-magmalte/0", {"restart": "restarting"}
+        )
+        self.harness.update_relation_data(
+            self.peer_relation_id,
+            "magma-nms-magmalte",
+            {"restart_granted": "magma-nms-magmalte/0", "admin_user_created": "True"},
+        )
+
+        self.harness.charm.on.update_status.emit()
+
+        peer_app_data = self.harness.get_relation_data(self.peer_relation_id, "magma-nms-magmalte")
+        peer_unit_data = self.harness.get_relation_data(
+            self.peer_relation_id, "magma-nms-magmalte/0"
+        )
+        self.assertNotIn("restart", peer_unit_data)
+        self.assertNotIn("restart_granted", peer_app_data)
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus())
+
+    def _container_with_certs(self):
+        container = self.harness.model.unit.get_container("magma-nms-magmalte")
+        self.harness.set_can_connect(container=container, val=True)
+        container.push("/run/secrets/admin_operator.pem", "cert", make_dirs=True)
+        container.push("/run/secrets/admin_operator.key.pem", "key", make_dirs=True)
+        return container
+
+    def _create_database_and_cert_admin_operator_relations(self):
+        db_relation_id = self.harness.add_relation(
+            relation_name="database", remote_app="postgresql-k8s"
+        )
+        self.harness.update_relation_data(
+            relation_id=db_relation_id,
+            key_values=self.DATABASE_DATABAG,
+            app_or_unit="postgresql-k8s",
+        )
+        self.harness.add_relation(
+            relation_name="cert-admin-operator", remote_app="magma-orc8r-certifier"
+        )
+
     def test_given_grafana_auth_relation_when_urls_available_event_then_grafana_urls_are_stored_in_peer_data(  # noqa: E501
         self,
     ):
@@ -597,3 +930,7 @@ class TestCharm(unittest.TestCase):
             self.harness.get_relation_data(relation_id, f"{app_name}/0")["k8s_service_port"],
             str(test_magmalte_k8s_service_port),
         )
+        self.assertEqual(
+            self.harness.get_relation_data(relation_id, app_name)["k8s_service_name"],
+            test_magmalte_k8s_service_name,
+        )
@@ -7,8 +7,14 @@
 This charm is an nginx web server that proxies communication between NMS UI and MagmaLTE.
 """
 
+import functools
+import hashlib
+import json
 import logging
-from typing import Union
+import pathlib
+import re
+import socket
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 from charms.magma_orc8r_certifier.v0.cert_controller import (
     CertControllerRequires,
@@ -20,29 +26,60 @@ from charms.observability_libs.v1.kubernetes_service_patch import (
 )
 from ops.charm import (
     CharmBase,
+    ConfigChangedEvent,
     PebbleReadyEvent,
     RelationChangedEvent,
     RelationJoinedEvent,
 )
+from ops.framework import StoredState
 from ops.main import main
-from ops.model import ActiveStatus, BlockedStatus, MaintenanceStatus, WaitingStatus
-from ops.pebble import Layer
+from ops.model import (
+    ActiveStatus,
+    BlockedStatus,
+    MaintenanceStatus,
+    Relation,
+    WaitingStatus,
+)
+from ops.pebble import ExecError, Layer
+
+if TYPE_CHECKING:
+    from jinja2 import Template
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _nginx_config_template() -> "Template":
+    """Returns the compiled nginx config template.
+
+    Returns:
+        Template: Compiled `nginx.conf.j2` template
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    env = Environment(loader=FileSystemLoader(pathlib.Path(__file__).parent), autoescape=False)
+    return env.get_template("nginx.conf.j2")
+
+
 class MagmaNmsNginxProxyCharm(CharmBase):
     """Main class that is instantiated everytime an event occurs."""
 
     BASE_NGINX_PATH = "/etc/nginx/conf.d"
-    NGINX_CONFIG_FILE_NAME = "nginx_proxy_ssl.conf"
+    NGINX_CONFIG_FILE_NAME = "nginx.conf"
+    NGINX_STATIC_CACHE_PATH = "/var/cache/nginx/nms-static"
     NGINX_HTTPS_PORT = 443
+    STUB_STATUS_PORT = 8080
+    NGINX_EXPORTER_PORT = 9113
+
+    _stored = StoredState()
 
     def __init__(self, *args):
         """Initializes all events that need to be observed."""
         super().__init__(*args)
+        self._stored.set_default(nginx_config_digest="")
         self._container_name = self._service_name = "magma-nms-nginx-proxy"
         self._container = self.unit.get_container(self._container_name)
+        self._exporter_container = self.unit.get_container("nginx-prometheus-exporter")
         self.cert_controller = CertControllerRequires(self, "cert-controller")
         self.service_patcher = KubernetesServicePatch(
             charm=self,
@@ -63,18 +100,46 @@ class MagmaNmsNginxProxyCharm(CharmBase):
             self.on.magma_nms_magmalte_relation_changed,
             self._push_nginx_config_file_to_workload,
         )
+        self.framework.observe(self.on.config_changed, self._on_config_changed)
         self.framework.observe(
             self.cert_controller.on.certificate_available, self._on_certificate_available
         )
+        self.framework.observe(
+            self.on.nginx_prometheus_exporter_pebble_ready,
+            self._on_nginx_prometheus_exporter_pebble_ready,
+        )
+        self.framework.observe(
+            self.on.metrics_endpoint_relation_joined, self._publish_metrics_endpoint_scrape_jobs
+        )
+        self.framework.observe(self.on.leader_elected, self._publish_metrics_endpoint_scrape_jobs)
+        self.framework.observe(self.on.upgrade_charm, self._publish_metrics_endpoint_scrape_jobs)
+
+    def _on_config_changed(self, event: ConfigChangedEvent) -> None:
+        """Applies config changes to the nginx config file and to the workload.
+
+        Args:
+            event (ConfigChangedEvent): Juju event
+        """
+        if not self._container.can_connect():
+            self.unit.status = WaitingStatus("Waiting for container to be ready")
+            event.defer()
+            return
+        self._push_nginx_config_file_to_workload(event)
+        self._on_magma_nms_nginx_proxy_pebble_ready(event)
 
     def _on_magma_nms_nginx_proxy_pebble_ready(
-        self, event: Union[PebbleReadyEvent, CertificateAvailableEvent]
+        self, event: Union[ConfigChangedEvent, PebbleReadyEvent, CertificateAvailableEvent]
     ) -> None:
         """Configures magma-nms-nginx-proxy pebble layer.
 
         Args:
             event: Juju event
         """
+        if invalid_config_options := self._invalid_config_options:
+            self.unit.status = BlockedStatus(
+                f"Invalid config: {', '.join(invalid_config_options)}"
+            )
+            return
         if not self._magmalte_relation_created:
             self.unit.status = BlockedStatus("Waiting for magmalte relation to be created")
             event.defer()
@@ -113,21 +178,24 @@ class MagmaNmsNginxProxyCharm(CharmBase):
         self._on_magma_nms_nginx_proxy_pebble_ready(event)
 
     def _push_nginx_config_file_to_workload(
-        self, event: Union[RelationChangedEvent, RelationJoinedEvent]
+        self, event: Union[ConfigChangedEvent, RelationChangedEvent, RelationJoinedEvent]
     ) -> None:
-        """Triggered on `nms-magmalte` relation events.
+        """Triggered on `nms-magmalte` relation events and config changes.
 
-        Writes nginx config file to workload container.
+        Writes nginx config file to workload container and reloads nginx if the config file
+        content has changed since it was last pushed.
 
         Args:
-            event: Juju event (RelationChangedEvent or RelationJoinedEvent)
+            event: Juju event (ConfigChangedEvent, RelationChangedEvent or RelationJoinedEvent)
         """
-        magmalte_relation = event.relation
-        units = magmalte_relation.units
-        try:
-            magmalte_service_name = magmalte_relation.data[next(iter(units))]["k8s_service_name"]
-            magmalte_service_port = magmalte_relation.data[next(iter(units))]["k8s_service_port"]
-        except KeyError:
+        if invalid_config_options := self._invalid_config_options:
+            self.unit.status = BlockedStatus(
+                f"Invalid config: {', '.join(invalid_config_options)}"
+            )
+            return
+        if not self._magmalte_relation_created:
+            return
+        if not (magmalte_service_details := self._magmalte_service_details):
             logger.info("Magmalte service details not available. Deferring event.")
             event.defer()
             return
@@ -135,24 +203,161 @@ class MagmaNmsNginxProxyCharm(CharmBase):
             logger.info("Can't connect to container. Deferring event.")
             event.defer()
             return
-        config_file = (
-            "server {\n"
-            f"listen {self.NGINX_HTTPS_PORT};\n"
-            "ssl on;\n"
-            f"ssl_certificate {self.BASE_NGINX_PATH}/nms_nginx.pem;\n"
-            f"ssl_certificate_key {self.BASE_NGINX_PATH}/nms_nginx.key.pem;\n"
-            "location / {\n"
-            f"proxy_pass http://{magmalte_service_name}:{magmalte_service_port};\n"
-            "proxy_set_header Host $http_host;\n"
-            "proxy_set_header X-Forwarded-Proto $scheme;\n"
-            "}\n"
-            "}"
+        config_file = self._render_nginx_config(*magmalte_service_details)
+        config_digest = hashlib.sha256(config_file.encode()).hexdigest()
+        config_is_stored = self._nginx_config_file_is_stored
+        if config_digest == self._stored.nginx_config_digest and config_is_stored:
+            logger.info("Nginx config file is up to date")
+            return
+        self._container.make_dir(self.NGINX_STATIC_CACHE_PATH, make_parents=True)
+        self._container.push(path=self._nginx_config_path, source=config_file)
+        self._stored.nginx_config_digest = config_digest
+        if self._service_is_running:
+            self._reload_nginx()
+
+    @property
+    def _magmalte_service_details(self) -> Optional[Tuple[str, str]]:
+        """Returns the name and port of the magmalte Kubernetes service from the relation data.
+
+        Magmalte publishes its service details in the application data bag, older revisions
+        only published them in the leader unit data bag.
+
+        Returns:
+            tuple: Service name and port, None if not available
+        """
+        magmalte_relation = self.model.get_relation("magma-nms-magmalte")
+        if not magmalte_relation or not magmalte_relation.app:
+            return None
+        data_bags = [magmalte_relation.data[magmalte_relation.app]] + [
+            magmalte_relation.data[unit] for unit in magmalte_relation.units
+        ]
+        for data in data_bags:
+            if "k8s_service_name" in data and "k8s_service_port" in data:
+                return data["k8s_service_name"], data["k8s_service_port"]
+        return None
+
+    def _render_nginx_config(self, magmalte_service_name: str, magmalte_service_port: str) -> str:
+        """Renders the nginx config file.
+
+        Args:
+            magmalte_service_name (str): Name of the magmalte Kubernetes service
+            magmalte_service_port (str): Port of the magmalte Kubernetes service
+
+        Returns:
+            str: Content of the nginx config file
+        """
+        return _nginx_config_template().render(
+            worker_processes=self.model.config["worker-processes"],
+            worker_connections=self.model.config["worker-connections"],
+            upstream_keepalive=self.model.config["upstream-keepalive"],
+            static_cache_path=self.NGINX_STATIC_CACHE_PATH,
+            static_cache_size=self.model.config["static-cache-size"],
+            magmalte_service_name=magmalte_service_name,
+            magmalte_service_port=magmalte_service_port,
+            https_port=self.NGINX_HTTPS_PORT,
+            certs_path=self.BASE_NGINX_PATH,
+            stub_status_port=self.STUB_STATUS_PORT,
         )
-        self._container.push(
-            path=f"{self.BASE_NGINX_PATH}/{self.NGINX_CONFIG_FILE_NAME}", source=config_file
+
+    @property
+    def _invalid_config_options(self) -> List[str]:
+        """Returns the names of the config options with invalid values.
+
+        Returns:
+            list: Invalid config options
+        """
+        patterns = {
+            "worker-processes": r"^(auto|[1-9][0-9]*)$",
+            "static-cache-size": r"^[1-9][0-9]*[kmg]?$",
+        }
+        minimums = {"worker-connections": 1, "upstream-keepalive": 0}
+        invalid_config_options = [
+            option
+            for option, pattern in patterns.items()
+            if not re.match(pattern, str(self.model.config.get(option, "")))
+        ]
+        invalid_config_options.extend(
+            option
+            for option, minimum in minimums.items()
+            if int(self.model.config.get(option, 0)) < minimum
+        )
+        return sorted(invalid_config_options)
+
+    def _reload_nginx(self) -> None:
+        """Reloads nginx configuration without restarting the workload service."""
+        process = self._container.exec(
+            ["nginx", "-c", self._nginx_config_path, "-s", "reload"], timeout=30
+        )
+        try:
+            process.wait_output()
+        except ExecError as e:
+            logger.error("Exited with code %d. Stderr:", e.exit_code)
+            for line in e.stderr.splitlines():  # type: ignore[union-attr]
+                logger.error("    %s", line)
+            raise e
+        logger.info(f"Reloaded service {self._service_name}")
+
+    def _on_nginx_prometheus_exporter_pebble_ready(self, event: PebbleReadyEvent) -> None:
+        """Starts the exporter publishing the nginx stub_status counters as Prometheus metrics.
+
+        Args:
+            event (PebbleReadyEvent): Juju event
+        """
+        self._exporter_container.add_layer(
+            "nginx-prometheus-exporter", self._exporter_pebble_layer, combine=True
         )
+        self._exporter_container.replan()
+        logger.info("Started nginx-prometheus-exporter")
+
+    def _publish_metrics_endpoint_scrape_jobs(self, _) -> None:
+        """Publishes the exporter's scrape job in the `metrics-endpoint` relation data bags.
 
-    def _configure_pebble(self, event: Union[PebbleReadyEvent, CertificateAvailableEvent]) -> None:
+        Jobs are published again when leadership changes and when the charm is upgraded, so that
+        the relation data always matches the current leader and charm revision.
+        """
+        for relation in self.model.relations["metrics-endpoint"]:
+            self._publish_scrape_job_in_relation(relation)
+
+    def _publish_scrape_job_in_relation(self, relation: Relation) -> None:
+        """Publishes the exporter's scrape job in a `metrics-endpoint` relation data bag.
+
+        Args:
+            relation (Relation): `metrics-endpoint` relation
+        """
+        relation.data[self.unit].update(
+            {
+                "prometheus_scrape_unit_address": socket.getfqdn(),
+                "prometheus_scrape_unit_name": self.unit.name,
+            }
+        )
+        if not self.unit.is_leader():
+            return
+        relation.data[self.app].update(
+            {
+                "scrape_jobs": json.dumps(
+                    [
+                        {
+                            "job_name": "nginx",
+                            "metrics_path": "/metrics",
+                            "static_configs": [{"targets": [f"*:{self.NGINX_EXPORTER_PORT}"]}],
+                        }
+                    ]
+                ),
+                "scrape_metadata": json.dumps(
+                    {
+                        "model": self.model.name,
+                        "model_uuid": self.model.uuid,
+                        "application": self.app.name,
+                        "unit": self.unit.name,
+                        "charm_name": self.meta.name,
+                    }
+                ),
+            }
+        )
+
+    def _configure_pebble(
+        self, event: Union[ConfigChangedEvent, PebbleReadyEvent, CertificateAvailableEvent]
+    ) -> None:
         """Configures Pebble layer.
 
         Creates nginx service and starts it.
@@ -182,7 +387,28 @@ class MagmaNmsNginxProxyCharm(CharmBase):
         Returns:
             bool: True/False
         """
-        return self._container.exists(f"{self.BASE_NGINX_PATH}/{self.NGINX_CONFIG_FILE_NAME}")
+        return self._container.exists(self._nginx_config_path)
+
+    @property
+    def _nginx_config_path(self) -> str:
+        """Returns the path of the nginx config file in the workload container.
+
+        Returns:
+            str: Path
+        """
+        return f"{self.BASE_NGINX_PATH}/{self.NGINX_CONFIG_FILE_NAME}"
+
+    @property
+    def _service_is_running(self) -> bool:
+        """Returns whether the nginx service is running.
+
+        Returns:
+            bool: True/False
+        """
+        if not self._container.can_connect():
+            return False
+        services = self._container.get_services(self._service_name)
+        return self._service_name in services and services[self._service_name].is_running()
 
     @property
     def _cert_controller_relation_created(self) -> bool:
@@ -242,7 +468,29 @@ class MagmaNmsNginxProxyCharm(CharmBase):
                     self._service_name: {
                         "override": "replace",
                         "startup": "enabled",
-                        "command": "nginx -g 'daemon off;'",
+                        "command": f"nginx -c {self._nginx_config_path} -g 'daemon off;'",
+                    }
+                },
+            }
+        )
+
+    @property
+    def _exporter_pebble_layer(self) -> Layer:
+        """Returns pebble layer with the nginx-prometheus-exporter service.
+
+        Returns:
+            Layer: Pebble Layer
+        """
+        return Layer(
+            {
+                "summary": "nginx-prometheus-exporter pebble layer",
+                "services": {
+                    "nginx-prometheus-exporter": {
+                        "override": "replace",
+                        "startup": "enabled",
+                        "command": "/usr/bin/nginx-prometheus-exporter "
+                        f"-nginx.scrape-uri=http://127.0.0.1:{self.STUB_STATUS_PORT}/stub_status "
+                        f"-web.listen-address=:{self.NGINX_EXPORTER_PORT}",
                     }
                 },
             }
@@ -33,7 +33,8 @@ class TestNmsNginxProxy:
     async def build_and_deploy_charm(self, ops_test, setup):
         charm = await ops_test.build_charm(".")
         resources = {
-            f"{CHARM_NAME}-image": METADATA["resources"][f"{CHARM_NAME}-image"]["upstream-source"],
+            resource_name: resource["upstream-source"]
+            for resource_name, resource in METADATA["resources"].items()
         }
         await ops_test.model.deploy(
             charm,
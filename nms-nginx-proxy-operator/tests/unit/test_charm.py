@@ -1,6 +1,7 @@
 # Copyright 2021 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import json
 import unittest
 from unittest.mock import Mock, PropertyMock, call, patch
 
@@ -95,7 +96,7 @@ class TestCharm(unittest.TestCase):
                 "magma-nms-nginx-proxy": {
                     "override": "replace",
                     "startup": "enabled",
-                    "command": "nginx -g 'daemon off;'",
+                    "command": "nginx -c /etc/nginx/conf.d/nginx.conf -g 'daemon off;'",
                 }
             }
         }
@@ -167,21 +168,129 @@ class TestCharm(unittest.TestCase):
         self.harness.add_relation_unit(relation_id, "whatever/0")
         self.harness.update_relation_data(relation_id, "whatever/0", key_values=relation_data)
 
-        patched_push.assert_called_with(
-            path="/etc/nginx/conf.d/nginx_proxy_ssl.conf",
-            source=(
-                "server {\n"
-                f"listen {test_nginx_https_port};\n"
-                "ssl on;\n"
-                "ssl_certificate /etc/nginx/conf.d/nms_nginx.pem;\n"
-                "ssl_certificate_key /etc/nginx/conf.d/nms_nginx.key.pem;\n"
-                "location / {\n"
-                f"proxy_pass http://{test_nms_magmalte_k8s_service_name}:{test_nms_magmalte_k8s_service_port};\n"  # noqa: E501, W505
-                "proxy_set_header Host $http_host;\n"
-                "proxy_set_header X-Forwarded-Proto $scheme;\n"
-                "}\n"
-                "}"
-            ),
+        self.assertEqual(patched_push.call_args.kwargs["path"], "/etc/nginx/conf.d/nginx.conf")
+        config_file = patched_push.call_args.kwargs["source"]
+        self.assertIn(f"listen {test_nginx_https_port} ssl http2;\n", config_file)
+        self.assertIn(
+            "  upstream magmalte {\n"
+            f"    server {test_nms_magmalte_k8s_service_name}:{test_nms_magmalte_k8s_service_port};\n"  # noqa: E501, W505
+            "    keepalive 32;\n"
+            "  }\n",
+            config_file,
+        )
+        self.assertIn("      proxy_pass http://magmalte;\n", config_file)
+        self.assertIn("  gzip on;\n", config_file)
+        self.assertIn("      proxy_cache nms_static;\n", config_file)
+        self.assertIn("    listen 127.0.0.1:8080;\n", config_file)
+
+    @patch("ops.model.Container.push")
+    def test_given_magmalte_service_details_in_application_data_bag_when_magma_nms_magmalte_relation_changed_then_nginx_config_file_proxies_to_magmalte_service(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container_name, val=True)
+        relation_id = self.harness.add_relation("magma-nms-magmalte", "whatever")
+        self.harness.add_relation_unit(relation_id, "whatever/1")
+
+        self.harness.update_relation_data(
+            relation_id,
+            "whatever",
+            key_values={"k8s_service_name": "mud", "k8s_service_port": "44"},
+        )
+
+        self.assertIn("server mud:44;\n", patched_push.call_args.kwargs["source"])
+
+    @patch("ops.model.Container.exists")
+    @patch("ops.model.Container.push")
+    def test_given_nginx_config_file_already_pushed_when_magma_nms_magmalte_relation_changed_with_same_service_details_then_nginx_config_file_is_not_pushed_again(  # noqa: E501
+        self, patched_push, patched_exists
+    ):
+        patched_exists.return_value = True
+        relation_data = {"k8s_service_name": "mud", "k8s_service_port": "44"}
+        self.harness.set_can_connect(container=self._container_name, val=True)
+        relation_id = self.harness.add_relation("magma-nms-magmalte", "whatever")
+        self.harness.add_relation_unit(relation_id, "whatever/0")
+        self.harness.update_relation_data(relation_id, "whatever/0", key_values=relation_data)
+        patched_push.reset_mock()
+
+        self.harness.update_relation_data(
+            relation_id, "whatever/0", key_values={"unrelated": "change"}
+        )
+
+        patched_push.assert_not_called()
+
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists")
+    @patch("ops.model.Container.push")
+    def test_given_nginx_service_running_when_magma_nms_magmalte_service_details_change_then_nginx_is_reloaded(  # noqa: E501
+        self, _, patched_exists, patched_exec
+    ):
+        patched_exec.return_value = MockExec()
+        patched_exists.return_value = True
+        self.harness.add_relation(
+            relation_name="cert-controller", remote_app="magma-orc8r-certifier"
+        )
+        relation_id = self.harness.add_relation("magma-nms-magmalte", "whatever")
+        self.harness.add_relation_unit(relation_id, "whatever/0")
+        self.harness.container_pebble_ready("magma-nms-nginx-proxy")
+        patched_exec.reset_mock()
+
+        self.harness.update_relation_data(
+            relation_id,
+            "whatever/0",
+            key_values={"k8s_service_name": "mud", "k8s_service_port": "44"},
+        )
+
+        patched_exec.assert_called_once_with(
+            ["nginx", "-c", "/etc/nginx/conf.d/nginx.conf", "-s", "reload"], timeout=30
+        )
+
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.exists", new=Mock(return_value=True))
+    @patch("ops.model.Container.push")
+    def test_given_nginx_service_running_when_worker_config_changes_then_nginx_config_file_is_updated_and_nginx_is_reloaded(  # noqa: E501
+        self, patched_push, patched_exec
+    ):
+        patched_exec.return_value = MockExec()
+        self.harness.add_relation(
+            relation_name="cert-controller", remote_app="magma-orc8r-certifier"
+        )
+        relation_id = self.harness.add_relation("magma-nms-magmalte", "whatever")
+        self.harness.add_relation_unit(relation_id, "whatever/0")
+        self.harness.update_relation_data(
+            relation_id,
+            "whatever/0",
+            key_values={"k8s_service_name": "mud", "k8s_service_port": "44"},
+        )
+        self.harness.container_pebble_ready("magma-nms-nginx-proxy")
+        patched_exec.reset_mock()
+
+        self.harness.update_config(
+            {"worker-processes": "4", "worker-connections": 4096, "upstream-keepalive": 0}
+        )
+
+        config_file = patched_push.call_args.kwargs["source"]
+        self.assertIn("worker_processes 4;\n", config_file)
+        self.assertIn("  worker_connections 4096;\n", config_file)
+        self.assertNotIn("keepalive ", config_file)
+        patched_exec.assert_called_once_with(
+            ["nginx", "-c", "/etc/nginx/conf.d/nginx.conf", "-s", "reload"], timeout=30
+        )
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus())
+
+    @patch("ops.model.Container.push")
+    def test_given_invalid_config_when_config_changed_then_status_is_blocked_and_nginx_config_file_is_not_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container_name, val=True)
+        relation_id = self.harness.add_relation("magma-nms-magmalte", "whatever")
+        self.harness.add_relation_unit(relation_id, "whatever/0")
+
+        self.harness.update_config({"worker-processes": "many", "static-cache-size": "1tb"})
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("Invalid config: static-cache-size, worker-processes"),
         )
 
     @patch("ops.model.Container.push")
@@ -203,6 +312,67 @@ class TestCharm(unittest.TestCase):
         ]
         patch_push.assert_has_calls(calls=calls)
 
+    def test_given_nginx_prometheus_exporter_container_ready_when_pebble_ready_then_pebble_plan_is_filled_with_exporter_service_content(  # noqa: E501
+        self,
+    ):
+        expected_plan = {
+            "services": {
+                "nginx-prometheus-exporter": {
+                    "override": "replace",
+                    "startup": "enabled",
+                    "command": "/usr/bin/nginx-prometheus-exporter "
+                    "-nginx.scrape-uri=http://127.0.0.1:8080/stub_status "
+                    "-web.listen-address=:9113",
+                }
+            }
+        }
+
+        self.harness.container_pebble_ready("nginx-prometheus-exporter")
+
+        updated_plan = self.harness.get_container_pebble_plan(
+            "nginx-prometheus-exporter"
+        ).to_dict()
+        self.assertEqual(expected_plan, updated_plan)
+
+    @patch("socket.getfqdn", new=Mock(return_value="nms-nginx-proxy-0.whatever"))
+    def test_given_unit_is_leader_when_metrics_endpoint_relation_joined_then_scrape_jobs_are_published_in_the_relation_data_bag(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(True)
+        relation_id = self.harness.add_relation("metrics-endpoint", "prometheus")
+
+        self.harness.add_relation_unit(relation_id, "prometheus/0")
+
+        app_data = self.harness.get_relation_data(relation_id, self.harness.charm.app.name)
+        unit_data = self.harness.get_relation_data(relation_id, self.harness.charm.unit.name)
+        self.assertEqual(
+            json.loads(app_data["scrape_jobs"]),
+            [
+                {
+                    "job_name": "nginx",
+                    "metrics_path": "/metrics",
+                    "static_configs": [{"targets": ["*:9113"]}],
+                }
+            ],
+        )
+        self.assertEqual(unit_data["prometheus_scrape_unit_address"], "nms-nginx-proxy-0.whatever")
+
+    @patch("socket.getfqdn", new=Mock(return_value="nms-nginx-proxy-0.whatever"))
+    def test_given_metrics_endpoint_relation_joined_when_unit_is_elected_leader_then_scrape_jobs_are_published_in_the_relation_data_bag(  # noqa: E501
+        self,
+    ):
+        relation_id = self.harness.add_relation("metrics-endpoint", "prometheus")
+        self.harness.add_relation_unit(relation_id, "prometheus/0")
+        self.assertNotIn(
+            "scrape_jobs",
+            self.harness.get_relation_data(relation_id, self.harness.charm.app.name),
+        )
+
+        self.harness.set_leader(True)
+
+        app_data = self.harness.get_relation_data(relation_id, self.harness.charm.app.name)
+        self.assertEqual(json.loads(app_data["scrape_jobs"])[0]["job_name"], "nginx")
+
 
 class MockExec:
     def __init__(self, stdout="test stdout", stderr="test stderr"):
@@ -7,7 +7,6 @@
 import logging
 from typing import Optional, Union
 
-import psycopg2  # type: ignore[import]
 from charms.data_platform_libs.v0.data_interfaces import DatabaseRequires
 from charms.magma_orc8r_certifier.v0.cert_root_ca import (
     CertificateAvailableEvent as RootCACertificateAvailableEvent,
@@ -190,6 +189,8 @@ class MagmaOrc8rBootstrapperCharm(CharmBase):
         Returns:
             bool: Whether the database relation is established.
         """
+        import psycopg2  # type: ignore[import]
+
         db_connection_string = self._get_db_connection_string
         if not db_connection_string:
             return False
@@ -6,9 +6,6 @@
 
 from typing import Optional
 
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-
 
 def generate_private_key(
     password: Optional[bytes] = None,
@@ -25,6 +22,9 @@ def generate_private_key(
     Returns:
         bytes: Private Key
     """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
     private_key = rsa.generate_private_key(
         public_exponent=public_exponent,
         key_size=key_size,
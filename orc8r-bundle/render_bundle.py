@@ -11,16 +11,34 @@ Example:
 ```shell
 ./render_bundle --template bundle.yaml.j2 --output bundle.yaml --channel beta
 ```
+
+A sizing profile can be passed using the --profile option, either as the name of a profile of the
+`profiles` directory or as the path to a profile file. Profiles set the scale, the constraints
+(workload resource limits) and the config options of the bundle applications:
+```shell
+./render_bundle --output bundle.yaml --channel beta --profile large
+```
 """
+
 import argparse
-from typing import Tuple
+import os
+import re
+from typing import Dict, List, Optional, Tuple
 
 import jinja2
+import yaml
 
 BUNDLE_TEMPLATE_NAME = "bundle.yaml.j2"
+PROFILES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+# Charms of this repository live in `<application>-operator` directories next to the bundle
+CHARMS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_APPLICATION_KEYS = ("scale", "constraints", "options")
+SUPPORTED_CONSTRAINTS = ("cpu-power", "mem")
+SIZE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)([kmgt]?)b?$", re.IGNORECASE)
+SIZE_UNIT_EXPONENTS = {"": -2, "k": -1, "m": 0, "g": 1, "t": 2}
 
 
-def parse_args() -> Tuple[str, str, bool, str]:
+def parse_args() -> Tuple[str, str, bool, str, str]:
     parser = argparse.ArgumentParser(description="Render jinja2 bundle template from cli args.")
     parser.add_argument(
         "--template",
@@ -44,6 +62,13 @@ def parse_args() -> Tuple[str, str, bool, str]:
         help="channel for the charms in the bundle",
         required=False,
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="sizing profile name (from the profiles directory) or path to a profile file",
+        required=False,
+        default="",
+    )
     bundle_args, _ = parser.parse_known_args()
 
     return (
@@ -51,14 +76,204 @@ def parse_args() -> Tuple[str, str, bool, str]:
         bundle_args.output,
         bundle_args.local,
         bundle_args.channel,
+        bundle_args.profile,
     )
 
 
+def load_profile(profile: str) -> dict:
+    """Loads a sizing profile.
+
+    Args:
+        profile (str): Name of a profile of the profiles directory, or path to a profile file
+
+    Returns:
+        dict: Sizing profile
+    """
+    profile_path = profile
+    if not os.path.isfile(profile_path):
+        profile_path = os.path.join(PROFILES_DIRECTORY, f"{profile}.yaml")
+    if not os.path.isfile(profile_path):
+        raise ValueError(f"Profile not found: {profile}")
+    with open(profile_path) as profile_file:
+        return yaml.safe_load(profile_file) or {}
+
+
+def _size_in_mib(size, default_unit: str = "m") -> float:
+    """Converts a size with an optional k, m, g or t unit suffix to MiB.
+
+    Args:
+        size (str or int): Size (examples: 512M, 2g, 1024)
+        default_unit (str): Unit of sizes without suffix, empty for bytes
+
+    Returns:
+        float: Size in MiB
+    """
+    match = SIZE_PATTERN.match(str(size))
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    unit = (match.group(2) or default_unit).lower()
+    return float(match.group(1)) * 1024 ** SIZE_UNIT_EXPONENTS[unit]
+
+
+def _application_errors(application: str, settings: dict) -> List[str]:
+    """Returns the errors of the scale and constraints of an application of a profile.
+
+    Args:
+        application (str): Application name
+        settings (dict): Application settings from the profile
+
+    Returns:
+        list: Errors
+    """
+    if not isinstance(settings, dict):
+        return [f"{application}: settings must be a mapping"]
+    errors = [
+        f"{application}: unknown setting {key}"
+        for key in settings
+        if key not in PROFILE_APPLICATION_KEYS
+    ]
+    scale = settings.get("scale", 1)
+    if not isinstance(scale, int) or isinstance(scale, bool) or scale < 1:
+        errors.append(f"{application}: scale must be a positive integer")
+    if not isinstance(settings.get("options", {}), dict):
+        errors.append(f"{application}: options must be a mapping")
+    constraints = settings.get("constraints", {})
+    if not isinstance(constraints, dict):
+        return errors + [f"{application}: constraints must be a mapping"]
+    for name, value in constraints.items():
+        if name not in SUPPORTED_CONSTRAINTS:
+            errors.append(f"{application}: unsupported constraint {name}")
+        elif name == "mem" and not SIZE_PATTERN.match(str(value)):
+            errors.append(f"{application}: invalid mem constraint {value}")
+        elif name == "cpu-power" and (not isinstance(value, int) or value < 1):
+            errors.append(f"{application}: cpu-power must be a positive integer")
+    return errors
+
+
+def _memory_limit_in_mib(settings: dict) -> float:
+    """Returns the mem constraint of an application of a profile in MiB, or 0 if unset."""
+    memory_limit = settings.get("constraints", {}).get("mem")
+    return _size_in_mib(memory_limit) if memory_limit else 0
+
+
+def _charm_config_options(application: str) -> Optional[List[str]]:
+    """Returns the config options of the charm of an application, read from its config.yaml.
+
+    Args:
+        application (str): Application name
+
+    Returns:
+        list: Config option names, None if the charm doesn't live in this repository
+    """
+    charm_directory = os.path.join(CHARMS_DIRECTORY, f"{application}-operator")
+    if not os.path.isdir(charm_directory):
+        return None
+    config_path = os.path.join(charm_directory, "config.yaml")
+    if not os.path.isfile(config_path):
+        return []
+    with open(config_path) as config_file:
+        return list((yaml.safe_load(config_file) or {}).get("options", {}))
+
+
+def _consistency_errors(applications: Dict[str, dict]) -> List[str]:
+    """Returns the errors of the combinations of settings of a profile.
+
+    Options of the charms of this repository are checked against their config.yaml, so that
+    profiles setting options which were removed from a charm are rejected.
+
+    Args:
+        applications (dict): Application settings from the profile, keyed by application name
+
+    Returns:
+        list: Errors
+    """
+    errors: List[str] = []
+    for application, settings in applications.items():
+        config_options = _charm_config_options(application)
+        if config_options is None:
+            continue
+        errors.extend(
+            f"{application}: unknown option {option}"
+            for option in settings.get("options", {})
+            if option not in config_options
+        )
+    magmalte = applications.get("nms-magmalte", {})
+    magmalte_options = magmalte.get("options", {})
+    heap_size = magmalte_options.get("max-heap-size", 0) * magmalte_options.get("workers", 1)
+    if heap_size and heap_size > _memory_limit_in_mib(magmalte) > 0:
+        errors.append("nms-magmalte: max-heap-size times workers exceeds the mem constraint")
+    nginx_options = applications.get("nms-nginx-proxy", {}).get("options", {})
+    if nginx_options.get("upstream-keepalive", 32) >= nginx_options.get(
+        "worker-connections", 1024
+    ):
+        errors.append("nms-nginx-proxy: upstream-keepalive must be lower than worker-connections")
+    fluentd = applications.get("fluentd", {})
+    fluentd_options = fluentd.get("options", {})
+    buffer_size = _size_in_mib(
+        fluentd_options.get("fluentd-chunk-limit-size", "2M"), default_unit=""
+    ) * fluentd_options.get("fluentd-queue-limit-length", 8)
+    if buffer_size > _memory_limit_in_mib(fluentd) > 0:
+        errors.append(
+            "fluentd: fluentd-chunk-limit-size times fluentd-queue-limit-length exceeds the mem "
+            "constraint"
+        )
+    return errors
+
+
+def validate_profile(profile: dict, bundle_applications: List[str]) -> None:
+    """Validates a sizing profile against the applications of the bundle.
+
+    Args:
+        profile (dict): Sizing profile
+        bundle_applications (list): Names of the applications of the bundle
+
+    Raises:
+        ValueError: if the profile is invalid, with all of its errors
+    """
+    applications = profile.get("applications", {}) if isinstance(profile, dict) else None
+    if not isinstance(applications, dict):
+        raise ValueError("Invalid profile: applications must be a mapping")
+    errors = []
+    for application, settings in applications.items():
+        if application not in bundle_applications:
+            errors.append(f"{application}: not an application of the bundle")
+            continue
+        errors.extend(_application_errors(application, settings))
+    if not errors:
+        try:
+            errors.extend(_consistency_errors(applications))
+        except (TypeError, ValueError) as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError(f"Invalid profile: {', '.join(errors)}")
+
+
+def _template_profile(profile: dict) -> Dict[str, dict]:
+    """Returns the application settings of a profile as expected by the bundle template.
+
+    Args:
+        profile (dict): Sizing profile
+
+    Returns:
+        dict: Scale, constraints (as a juju constraints string) and options of the applications
+    """
+    template_profile = {}
+    for application, settings in profile.get("applications", {}).items():
+        template_settings = dict(settings)
+        constraints = settings.get("constraints", {})
+        template_settings["constraints"] = " ".join(
+            f"{name}={value}" for name, value in sorted(constraints.items())
+        )
+        template_profile[application] = template_settings
+    return template_profile
+
+
 def render_bundle(
     template: str,
     output: str,
     channel: str = "",
     local: bool = False,
+    profile: str = "",
 ) -> None:
     if not channel and not local:
         raise ValueError("Either channel must be specified or local set to True")
@@ -66,15 +281,24 @@ def render_bundle(
         raise ValueError("If local is true, channel must not be set")
     with open(template) as t:
         jinja_template = jinja2.Template(t.read(), autoescape=True)
+    template_profile = {}
+    if profile:
+        sizing_profile = load_profile(profile)
+        default_bundle = yaml.safe_load(
+            jinja_template.render(channel=channel, local=local, profile={})
+        )
+        validate_profile(sizing_profile, list(default_bundle["applications"]))
+        template_profile = _template_profile(sizing_profile)
     with open(output, "wt") as o:
-        jinja_template.stream(channel=channel, local=local).dump(o)
+        jinja_template.stream(channel=channel, local=local, profile=template_profile).dump(o)
 
 
 if __name__ == "__main__":
-    arg_template, arg_output, arg_local, arg_channel = parse_args()
+    arg_template, arg_output, arg_local, arg_channel, arg_profile = parse_args()
     render_bundle(
         template=arg_template,
         output=arg_output,
         local=arg_local,
         channel=arg_channel,
+        profile=arg_profile,
     )
@@ -2,8 +2,12 @@
 # See LICENSE file for licensing details.
 
 import pytest
+import yaml
 
-from render_bundle import render_bundle
+from render_bundle import load_profile, render_bundle, validate_profile
+
+with open("tests/unit/expected_bundles/charmhub_edge.yaml") as bundle_file:
+    BUNDLE_APPLICATIONS = list(yaml.safe_load(bundle_file)["applications"])
 
 
 def test_given_channel_is_not_provided_and_local_not_set_when_render_bundle_then_valueerror_is_raised():  # noqa: E501
@@ -28,14 +32,14 @@ def test_given_channel_is_provided_and_local_set_to_true_when_render_bundle_then
     assert "If local is true, channel must not be set" == str(e.value)
 
 
-def test_given_channel_is_edge_when_render_bundle_then_bundle_is_rendered_correctly():
+def test_given_channel_is_edge_when_render_bundle_then_bundle_is_rendered_correctly(tmp_path):
     render_bundle(
         channel="edge",
         template="bundle.yaml.j2",
-        output="tests/unit/rendered_bundle_charmhub_edge.yaml",
+        output=str(tmp_path / "rendered_bundle_charmhub_edge.yaml"),
     )
 
-    with open("tests/unit/rendered_bundle_charmhub_edge.yaml") as rendered_bundle_file:
+    with open(tmp_path / "rendered_bundle_charmhub_edge.yaml") as rendered_bundle_file:
         rendered_bundle = rendered_bundle_file.read()
 
     with open("tests/unit/expected_bundles/charmhub_edge.yaml") as expected_bundle_file:
@@ -44,17 +48,117 @@ def test_given_channel_is_edge_when_render_bundle_then_bundle_is_rendered_correc
     assert rendered_bundle == expected_bundle.strip()
 
 
-def test_given_local_charms_when_render_bundle_then_bundle_is_rendered_correctly():
+def test_given_local_charms_when_render_bundle_then_bundle_is_rendered_correctly(tmp_path):
     render_bundle(
         template="bundle.yaml.j2",
         local=True,
-        output="tests/unit/rendered_bundle_local.yaml",
+        output=str(tmp_path / "rendered_bundle_local.yaml"),
     )
 
-    with open("tests/unit/rendered_bundle_local.yaml") as rendered_bundle_file:
+    with open(tmp_path / "rendered_bundle_local.yaml") as rendered_bundle_file:
         rendered_bundle = rendered_bundle_file.read()
 
     with open("tests/unit/expected_bundles/local.yaml") as expected_bundle_file:
         expected_bundle = expected_bundle_file.read()
 
     assert rendered_bundle == expected_bundle.strip()
+
+
+def test_given_profile_when_render_bundle_then_profile_settings_are_rendered(tmp_path):
+    render_bundle(
+        channel="edge",
+        template="bundle.yaml.j2",
+        output=str(tmp_path / "bundle.yaml"),
+        profile="large",
+    )
+
+    with open(tmp_path / "bundle.yaml") as rendered_bundle_file:
+        applications = yaml.safe_load(rendered_bundle_file)["applications"]
+
+    assert applications["nms-magmalte"]["scale"] == 3
+    assert applications["nms-magmalte"]["constraints"] == "cpu-power=400 mem=4G"
+    assert applications["nms-magmalte"]["options"] == {
+        "workers": 4,
+        "max-heap-size": 768,
+    }
+    assert applications["fluentd"]["options"] == {
+        "domain": "example.com",
+        "elasticsearch-url": "orc8r-elasticsearch:1234",
+        "fluentd-chunk-limit-size": "16M",
+        "fluentd-queue-limit-length": 64,
+    }
+    assert applications["orc8r-accessd"]["scale"] == 1
+    assert "constraints" not in applications["orc8r-accessd"]
+
+
+@pytest.mark.parametrize("profile", ["medium", "large"])
+def test_given_bundled_profile_when_validate_profile_then_no_error_is_raised(profile):
+    validate_profile(load_profile(profile), BUNDLE_APPLICATIONS)
+
+
+def test_given_unknown_profile_when_render_bundle_then_valueerror_is_raised():
+    with pytest.raises(ValueError) as e:
+        render_bundle(
+            channel="edge",
+            template="bundle.yaml.j2",
+            output="tests/unit/rendered_bundle_charmhub_edge.yaml",
+            profile="huge",
+        )
+
+    assert "Profile not found: huge" == str(e.value)
+
+
+@pytest.mark.parametrize(
+    "applications,error",
+    [
+        ({"nms-unknown": {"scale": 2}}, "nms-unknown: not an application of the bundle"),
+        ({"nms-magmalte": {"scale": 0}}, "nms-magmalte: scale must be a positive integer"),
+        ({"nms-magmalte": {"replicas": 2}}, "nms-magmalte: unknown setting replicas"),
+        (
+            {"nms-magmalte": {"options": {"db-pool-size": 10}}},
+            "nms-magmalte: unknown option db-pool-size",
+        ),
+        (
+            {"orc8r-accessd": {"options": {"log-level": "debug"}}},
+            "orc8r-accessd: unknown option log-level",
+        ),
+        (
+            {"nms-magmalte": {"constraints": {"cpu-cores": 2}}},
+            "nms-magmalte: unsupported constraint cpu-cores",
+        ),
+        (
+            {"nms-magmalte": {"constraints": {"mem": "lots"}}},
+            "nms-magmalte: invalid mem constraint lots",
+        ),
+        (
+            {
+                "nms-magmalte": {
+                    "constraints": {"mem": "2G"},
+                    "options": {"workers": 4, "max-heap-size": 1024},
+                }
+            },
+            "nms-magmalte: max-heap-size times workers exceeds the mem constraint",
+        ),
+        (
+            {"nms-nginx-proxy": {"options": {"worker-connections": 32}}},
+            "nms-nginx-proxy: upstream-keepalive must be lower than worker-connections",
+        ),
+        (
+            {
+                "fluentd": {
+                    "constraints": {"mem": "256M"},
+                    "options": {"fluentd-chunk-limit-size": "64M"},
+                }
+            },
+            "fluentd: fluentd-chunk-limit-size times fluentd-queue-limit-length exceeds the mem "
+            "constraint",
+        ),
+    ],
+)
+def test_given_inconsistent_profile_when_validate_profile_then_valueerror_is_raised(
+    applications, error
+):
+    with pytest.raises(ValueError) as e:
+        validate_profile({"applications": applications}, BUNDLE_APPLICATIONS)
+
+    assert f"Invalid profile: {error}" == str(e.value)
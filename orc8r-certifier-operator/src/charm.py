@@ -9,10 +9,9 @@ import logging
 import re
 import secrets
 import string
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 
 import ops
-import psycopg2  # type: ignore[import]
 import yaml
 from charms.data_platform_libs.v0.data_interfaces import DatabaseRequires
 from charms.magma_orc8r_certifier.v0.cert_admin_operator import (
@@ -73,6 +72,8 @@ from ops.model import (
 from ops.pebble import Layer
 from pgconnstr import ConnectionString  # type: ignore[import]
 
+from workload_config import WorkloadConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -101,6 +102,7 @@ class MagmaOrc8rCertifierCharm(CharmBase):
         self._container_name = self._service_name = "magma-orc8r-certifier"
         self.provided_relation_name = "magma-orc8r-certifier"
         self._container = self.unit.get_container(self._container_name)
+        self._workload_config = WorkloadConfig(charm=self, container=self._container)
         self._database = DatabaseRequires(
             self, relation_name="database", database_name=self.DB_NAME
         )
@@ -180,6 +182,7 @@ class MagmaOrc8rCertifierCharm(CharmBase):
         self.framework.observe(
             self.on.get_pfx_package_password_action, self._on_get_pfx_package_password
         )
+        self.framework.observe(self.on.diff_config_action, self._on_diff_config_action)
 
     def _on_install(self, event: InstallEvent) -> None:
         """Juju event triggered only once when charm is installed.
@@ -607,6 +610,20 @@ class MagmaOrc8rCertifierCharm(CharmBase):
         )
         self.unit.status = WaitingStatus("Waiting to receive new certificate from provider")
 
+    def _on_diff_config_action(self, event: ActionEvent) -> None:
+        """Sets the action result as the changes that would be made to the workload config files.
+
+        Args:
+            event (ActionEvent): Juju event
+
+        Returns:
+            None
+        """
+        if not self._container.can_connect():
+            event.fail("Container is not ready")
+            return
+        event.set_results(self._workload_config.diff_results(self._config_files))
+
     def _on_get_pfx_package_password(self, event: ActionEvent) -> None:
         """Sets the action result as the admin operator PFX package password.
 
@@ -676,17 +693,27 @@ class MagmaOrc8rCertifierCharm(CharmBase):
         logger.info("Pushed application certificates")
 
     def _push_metricsd_config_file(self) -> None:
-        """Writes the config file for metricsd in the workload container.
+        """Writes the config file for metricsd in the workload container if its content changed.
 
         Returns:
             None
         """
-        metricsd_config = (
-            f'prometheusQueryAddress: "{self.PROMETHEUS_URL}"\n'
-            f'alertmanagerApiURL: "{self.ALERTMANAGER_URL}/api/v2"\n'
-            '"profile": "prometheus"\n'
-        )
-        self._container.push(path=f"{self.BASE_CONFIG_PATH}/metricsd.yml", source=metricsd_config)
+        self._workload_config.push(self._config_files)
+
+    @property
+    def _config_files(self) -> Dict[str, dict]:
+        """Returns the content of the metricsd.yml config file.
+
+        Returns:
+            dict: Config file content, keyed by workload path
+        """
+        return {
+            f"{self.BASE_CONFIG_PATH}/metricsd.yml": {
+                "prometheusQueryAddress": self.PROMETHEUS_URL,
+                "alertmanagerApiURL": f"{self.ALERTMANAGER_URL}/api/v2",
+                "profile": "prometheus",
+            }
+        }
 
     def _push_application_private_keys(self) -> None:
         """Pushes application private keys to the workload container."""
@@ -1142,6 +1169,8 @@ class MagmaOrc8rCertifierCharm(CharmBase):
         Returns:
             bool: Whether the database relation is established.
         """
+        import psycopg2  # type: ignore[import]
+
         db_connection_string = self._get_db_connection_string
         if not db_connection_string:
             return False
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Contains methods to render workload config files and push them only when they change.
+
+Config files are given as a mapping of workload paths to their content, which is serialized to
+YAML. A digest of each pushed file is kept in the charm's stored state, so that files are only
+pushed when their content changes.
+"""
+
+import difflib
+import hashlib
+import logging
+from typing import Dict, List, cast
+
+import yaml
+from ops.charm import CharmBase
+from ops.framework import Object, StoredState
+from ops.model import Container
+
+logger = logging.getLogger(__name__)
+
+
+def render(content: dict) -> str:
+    """Renders config file content as YAML.
+
+    Args:
+        content (dict): Config file content
+
+    Returns:
+        str: Rendered config file content
+    """
+    return yaml.safe_dump(content, default_flow_style=False, sort_keys=False)
+
+
+class WorkloadConfig(Object):
+    """Pushes workload config files when their content changes."""
+
+    _stored = StoredState()
+
+    def __init__(self, charm: CharmBase, container: Container, key: str = "workload-config"):
+        """Sets default stored state.
+
+        Args:
+            charm: Juju charm
+            container (Container): Workload container the config files are pushed to
+            key (str): Key identifying this object, to be changed when using multiple instances
+        """
+        super().__init__(charm, key)
+        self._container = container
+        self._stored.set_default(digests={})
+
+    def push(self, files: Dict[str, dict]) -> List[str]:
+        """Pushes the config files whose content changed to the workload.
+
+        Files missing from the workload (ex. after a pod restart) are pushed again.
+
+        Args:
+            files (dict): Config file content, keyed by workload path
+
+        Returns:
+            list: Paths of the pushed files
+        """
+        digests = cast(Dict[str, str], self._stored.digests)
+        pushed_files = []
+        for path, content in files.items():
+            rendered_content = render(content)
+            digest = hashlib.sha256(rendered_content.encode()).hexdigest()
+            if digests.get(path) == digest and self._container.exists(path):
+                continue
+            self._container.push(path, rendered_content, make_dirs=True)
+            digests[path] = digest
+            pushed_files.append(path)
+            logger.info("Pushed config file %s", path)
+        return pushed_files
+
+    def diff(self, files: Dict[str, dict]) -> Dict[str, str]:
+        """Returns the changes that pushing the given config files would make.
+
+        Args:
+            files (dict): Config file content, keyed by workload path
+
+        Returns:
+            dict: Unified diffs of the files which would change, keyed by workload path
+        """
+        diffs = {}
+        for path, content in files.items():
+            current_content = ""
+            if self._container.exists(path):
+                current_content = self._container.pull(path).read()
+            rendered_content = render(content)
+            if current_content == rendered_content:
+                continue
+            diffs[path] = "".join(
+                difflib.unified_diff(
+                    current_content.splitlines(keepends=True),
+                    rendered_content.splitlines(keepends=True),
+                    fromfile=f"a{path}",
+                    tofile=f"b{path}",
+                )
+            )
+        return diffs
+
+    def diff_results(self, files: Dict[str, dict]) -> Dict[str, str]:
+        """Returns the changes that pushing the given config files would make, as action results.
+
+        Args:
+            files (dict): Config file content, keyed by workload path
+
+        Returns:
+            dict: `changed-files` (comma-separated paths) and `diff` (unified diffs)
+        """
+        diffs = self.diff(files)
+        return {
+            "changed-files": ",".join(diffs),
+            "diff": "".join(diffs.values()) or "No changes",
+        }
@@ -214,10 +214,31 @@ class TestCharm(unittest.TestCase):
         self.harness.charm.on.install.emit()
 
         patch_push.assert_any_call(
-            path="/var/opt/magma/configs/orc8r/metricsd.yml",
-            source='prometheusQueryAddress: "http://orc8r-prometheus:9090"\n'
-            'alertmanagerApiURL: "http://orc8r-alertmanager:9093/api/v2"\n'
-            '"profile": "prometheus"\n',
+            "/var/opt/magma/configs/orc8r/metricsd.yml",
+            "prometheusQueryAddress: http://orc8r-prometheus:9090\n"
+            "alertmanagerApiURL: http://orc8r-alertmanager:9093/api/v2\n"
+            "profile: prometheus\n",
+            make_dirs=True,
+        )
+
+    def test_given_metricsd_config_file_not_pushed_when_diff_config_action_then_whole_file_is_returned(  # noqa: E501
+        self,
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-certifier", val=True)
+        event = Mock()
+
+        self.harness.charm._on_diff_config_action(event)
+
+        event.set_results.assert_called_once_with(
+            {
+                "changed-files": "/var/opt/magma/configs/orc8r/metricsd.yml",
+                "diff": "--- a/var/opt/magma/configs/orc8r/metricsd.yml\n"
+                "+++ b/var/opt/magma/configs/orc8r/metricsd.yml\n"
+                "@@ -0,0 +1,3 @@\n"
+                "+prometheusQueryAddress: http://orc8r-prometheus:9090\n"
+                "+alertmanagerApiURL: http://orc8r-alertmanager:9093/api/v2\n"
+                "+profile: prometheus\n",
+            }
         )
 
     def test_given_cant_connect_to_container_when_on_install_then_status_is_waiting(
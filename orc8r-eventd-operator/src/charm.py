@@ -6,13 +6,14 @@
 
 import logging
 import re
-from typing import Tuple, Union
+from typing import Dict, List, Union
 
 from charms.observability_libs.v1.kubernetes_service_patch import (
     KubernetesServicePatch,
     ServicePort,
 )
 from ops.charm import (
+    ActionEvent,
     CharmBase,
     ConfigChangedEvent,
     InstallEvent,
@@ -30,6 +31,8 @@ from ops.model import (
 )
 from ops.pebble import Layer
 
+from workload_config import WorkloadConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,12 +40,14 @@ class MagmaOrc8rEventdCharm(CharmBase):
     """An instance of this object everytime an event occurs."""
 
     BASE_CONFIG_PATH = "/var/opt/magma/configs/orc8r"
+    ELASTICSEARCH_URL_REGEX = "^[a-zA-Z0-9._-]+:[0-9]+$"
 
     def __init__(self, *args):
         """Uses the Orc8rBase library to manage events."""
         super().__init__(*args)
         self._container_name = self._service_name = "magma-orc8r-eventd"
         self._container = self.unit.get_container(self._container_name)
+        self._workload_config = WorkloadConfig(charm=self, container=self._container)
         self._service_patcher = KubernetesServicePatch(
             charm=self,
             ports=[
@@ -71,6 +76,7 @@ class MagmaOrc8rEventdCharm(CharmBase):
             self.on.magma_orc8r_eventd_relation_joined,
             self._on_magma_orc8r_eventd_relation_joined,
         )
+        self.framework.observe(self.on.diff_config_action, self._on_diff_config_action)
 
     def _on_install(self, event: InstallEvent) -> None:
         """Triggered on charm installation.
@@ -110,8 +116,8 @@ class MagmaOrc8rEventdCharm(CharmBase):
             self.unit.status = WaitingStatus("Waiting for container to be ready")
             event.defer()
             return
-        self._push_config_file_to_workload()
-        self._configure_pebble()
+        config_files_changed = bool(self._push_config_file_to_workload())
+        self._configure_pebble(restart=config_files_changed)
 
     def _on_magma_orc8r_eventd_relation_joined(self, event: RelationJoinedEvent) -> None:
         """Sets the status of the eventd service in the relation data bag.
@@ -131,25 +137,55 @@ class MagmaOrc8rEventdCharm(CharmBase):
             event.defer()
             return
 
-    def _push_config_file_to_workload(self) -> None:
-        """Writes elasticsearch config file to the workload container."""
-        elasticsearch_url, elasticsearch_port = self._get_elasticsearch_config()
-        elastic_config = (
-            f'"elasticHost": "{elasticsearch_url}"\n' f'"elasticPort": {elasticsearch_port}\n'
+    def _on_diff_config_action(self, event: ActionEvent) -> None:
+        """Returns the changes that would be made to the elastic.yml config file.
+
+        The `elasticsearch-url` action param can be used to preview a new URL before changing the
+        config.
+
+        Args:
+            event (ActionEvent): Juju event
+        """
+        if not self._container.can_connect():
+            event.fail("Container is not ready")
+            return
+        elasticsearch_url = str(
+            event.params.get("elasticsearch-url") or self.model.config.get("elasticsearch-url", "")
+        )
+        if not self._elasticsearch_url_is_valid(elasticsearch_url):
+            event.fail("Elasticsearch URL is not valid. Format should be <hostname>:<port>")
+            return
+        event.set_results(
+            self._workload_config.diff_results(self._config_files(elasticsearch_url))
         )
-        self._container.push(f"{self.BASE_CONFIG_PATH}/elastic.yml", elastic_config)
-        logger.info(f"Config file pushed to {self.BASE_CONFIG_PATH}/elastic.yml")
 
-    def _get_elasticsearch_config(self) -> Tuple[str, str]:
-        """Splits elasticsearch-url config param into host address and port.
+    def _push_config_file_to_workload(self) -> List[str]:
+        """Writes elasticsearch config file to the workload container if its content changed.
 
         Returns:
-            Tuple[str, str]: (elasticsearch_host, elasticsearch_port)
+            list: Paths of the pushed config files
+        """
+        return self._workload_config.push(
+            self._config_files(str(self.model.config["elasticsearch-url"]))
+        )
+
+    def _config_files(self, elasticsearch_url: str) -> Dict[str, dict]:
+        """Returns the content of the elastic.yml config file.
+
+        Args:
+            elasticsearch_url (str): Elasticsearch URL (<hostname>:<port>)
+
+        Returns:
+            dict: Config file content, keyed by workload path
         """
         # TODO: Elasticsearch url should be passed through a relationship (not a config)
-        elasticsearch_url = self.model.config.get("elasticsearch-url")
-        elasticsearch_url_split = elasticsearch_url.split(":")  # type: ignore[union-attr]
-        return elasticsearch_url_split[0], elasticsearch_url_split[1]
+        elasticsearch_host, elasticsearch_port = elasticsearch_url.split(":")
+        return {
+            f"{self.BASE_CONFIG_PATH}/elastic.yml": {
+                "elasticHost": elasticsearch_host,
+                "elasticPort": int(elasticsearch_port),
+            }
+        }
 
     @property
     def _elasticsearch_config_is_valid(self) -> bool:
@@ -158,23 +194,36 @@ class MagmaOrc8rEventdCharm(CharmBase):
         Returns:
             bool: Whether the elasticsearch-url config param is valid
         """
-        elasticsearch_url = self.model.config.get("elasticsearch-url")
-        if not elasticsearch_url:
-            return False
-        if re.match("^[a-zA-Z0-9._-]+:[0-9]+$", elasticsearch_url):
-            return True
-        else:
-            return False
-
-    def _configure_pebble(self) -> None:
-        """Configures magma-orc8r-eventd pebble layer."""
+        return self._elasticsearch_url_is_valid(
+            str(self.model.config.get("elasticsearch-url") or "")
+        )
+
+    def _elasticsearch_url_is_valid(self, elasticsearch_url: str) -> bool:
+        """Returns whether an Elasticsearch URL is valid.
+
+        Args:
+            elasticsearch_url (str): Elasticsearch URL (<hostname>:<port>)
+
+        Returns:
+            bool: True/False
+        """
+        return bool(re.match(self.ELASTICSEARCH_URL_REGEX, elasticsearch_url))
+
+    def _configure_pebble(self, restart: bool = False) -> None:
+        """Configures magma-orc8r-eventd pebble layer.
+
+        Args:
+            restart (bool): Whether to restart the service even if the layer didn't change
+        """
         self.unit.status = MaintenanceStatus("Configuring pod")
         pebble_layer = self._pebble_layer
         plan = self._container.get_plan()
         if plan.services != pebble_layer.services:
             self._container.add_layer(self._container_name, pebble_layer, combine=True)
-        self._container.restart(self._service_name)
-        logger.info(f"Restarted container {self._service_name}")
+            restart = True
+        if restart:
+            self._container.restart(self._service_name)
+            logger.info(f"Restarted container {self._service_name}")
         self._update_relations()
         self.unit.status = ActiveStatus()
 
@@ -55,7 +55,8 @@ class TestCharm(unittest.TestCase):
         calls = [
             call(
                 "/var/opt/magma/configs/orc8r/elastic.yml",
-                f'"elasticHost": "{hostname}"\n' f'"elasticPort": {port}\n',
+                f"elasticHost: {hostname}\nelasticPort: {port}\n",
+                make_dirs=True,
             ),
         ]
         patched_push.assert_has_calls(calls)
@@ -82,7 +83,8 @@ class TestCharm(unittest.TestCase):
         calls = [
             call(
                 "/var/opt/magma/configs/orc8r/elastic.yml",
-                f'"elasticHost": "{hostname}"\n' f'"elasticPort": {port}\n',
+                f"elasticHost: {hostname}\nelasticPort: {port}\n",
+                make_dirs=True,
             ),
         ]
         patched_push.assert_has_calls(calls)
@@ -185,7 +187,8 @@ class TestCharm(unittest.TestCase):
         calls = [
             call(
                 "/var/opt/magma/configs/orc8r/elastic.yml",
-                f'"elasticHost": "{hostname}"\n' f'"elasticPort": {port}\n',
+                f"elasticHost: {hostname}\nelasticPort: {port}\n",
+                make_dirs=True,
             ),
         ]
         patch_push.assert_has_calls(calls)
@@ -199,3 +202,61 @@ class TestCharm(unittest.TestCase):
         assert self.harness.charm.unit.status == BlockedStatus(
             "Config for elasticsearch is not valid. Format should be <hostname>:<port>"
         )
+
+    @patch("ops.model.Container.restart")
+    def test_given_elasticsearch_config_unchanged_when_config_changed_then_service_is_not_restarted(  # noqa: E501
+        self, patch_restart
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-eventd")
+        self.harness.update_config(key_values={"elasticsearch-url": "blablabla:80"})
+        patch_restart.reset_mock()
+
+        self.harness.charm.on.config_changed.emit()
+
+        patch_restart.assert_not_called()
+        assert self.harness.charm.unit.status == ActiveStatus()
+
+    @patch("ops.model.Container.restart")
+    def test_given_elasticsearch_config_changed_when_config_changed_then_service_is_restarted(
+        self, patch_restart
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-eventd")
+        self.harness.update_config(key_values={"elasticsearch-url": "blablabla:80"})
+        patch_restart.reset_mock()
+
+        self.harness.update_config(key_values={"elasticsearch-url": "blablabla:9200"})
+
+        patch_restart.assert_called_once_with("magma-orc8r-eventd")
+
+    @patch("ops.model.Container.restart", new=Mock())
+    def test_given_elasticsearch_url_param_when_diff_config_action_then_changes_are_returned(
+        self,
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-eventd")
+        self.harness.update_config(key_values={"elasticsearch-url": "blablabla:80"})
+        event = Mock(params={"elasticsearch-url": "newhost:9200"})
+
+        self.harness.charm._on_diff_config_action(event)
+
+        event.set_results.assert_called_once_with(
+            {
+                "changed-files": "/var/opt/magma/configs/orc8r/elastic.yml",
+                "diff": "--- a/var/opt/magma/configs/orc8r/elastic.yml\n"
+                "+++ b/var/opt/magma/configs/orc8r/elastic.yml\n"
+                "@@ -1,2 +1,2 @@\n"
+                "-elasticHost: blablabla\n"
+                "-elasticPort: 80\n"
+                "+elasticHost: newhost\n"
+                "+elasticPort: 9200\n",
+            }
+        )
+
+    def test_given_invalid_elasticsearch_url_param_when_diff_config_action_then_action_fails(self):
+        self.harness.set_can_connect(self.container, True)
+        event = Mock(params={"elasticsearch-url": "hello"})
+
+        self.harness.charm._on_diff_config_action(event)
+
+        event.fail.assert_called_once_with(
+            "Elasticsearch URL is not valid. Format should be <hostname>:<port>"
+        )
@@ -5,14 +5,17 @@
 """Collects runtime metrics from gateways and Orchestrator services."""
 
 import logging
-from typing import Union
+import re
+from typing import Dict, List, Union
 
 from charms.observability_libs.v1.kubernetes_service_patch import (
     KubernetesServicePatch,
     ServicePort,
 )
 from ops.charm import (
+    ActionEvent,
     CharmBase,
+    ConfigChangedEvent,
     PebbleReadyEvent,
     RelationBrokenEvent,
     RelationJoinedEvent,
@@ -28,6 +31,8 @@ from ops.model import (
 )
 from ops.pebble import Layer
 
+from workload_config import WorkloadConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,12 +47,20 @@ class MagmaOrc8rMetricsdCharm(CharmBase):
         "prometheus-configurer-k8s",
     ]
     REQUIRED_ORC8R_RELATIONS = ["magma-orc8r-orchestrator"]
+    QUERY_FRONTEND_SERVICE_NAME = "prometheus-query-frontend"
+    QUERY_FRONTEND_PORT = 9095
+    QUERY_FRONTEND_CACHE_CONFIG_PATH = "/etc/thanos/query-frontend-cache.yml"
 
     def __init__(self, *args):
         """Uses the Orc8rBase library to manage events."""
         super().__init__(*args)
         self._container_name = self._service_name = "magma-orc8r-metricsd"
         self._container = self.unit.get_container(self._container_name)
+        self._workload_config = WorkloadConfig(charm=self, container=self._container)
+        self._query_frontend_container = self.unit.get_container(self.QUERY_FRONTEND_SERVICE_NAME)
+        self._query_frontend_config = WorkloadConfig(
+            charm=self, container=self._query_frontend_container, key="query-frontend-config"
+        )
         self._service_patcher = KubernetesServicePatch(
             charm=self,
             ports=[
@@ -75,6 +88,10 @@ class MagmaOrc8rMetricsdCharm(CharmBase):
         self.framework.observe(
             self.on.magma_orc8r_metricsd_pebble_ready, self._configure_magma_orc8r_metricsd
         )
+        self.framework.observe(
+            self.on.prometheus_query_frontend_pebble_ready, self._configure_magma_orc8r_metricsd
+        )
+        self.framework.observe(self.on.config_changed, self._configure_magma_orc8r_metricsd)
         for required_rel in self.REQUIRED_EXTERNAL_RELATIONS + self.REQUIRED_ORC8R_RELATIONS:
             self.framework.observe(
                 self.on[required_rel].relation_broken, self._on_required_relation_broken
@@ -84,19 +101,25 @@ class MagmaOrc8rMetricsdCharm(CharmBase):
             self.framework.observe(
                 self.on[required_rel].relation_joined, self._configure_magma_orc8r_metricsd
             )
+        self.framework.observe(self.on.diff_config_action, self._on_diff_config_action)
 
     def _configure_magma_orc8r_metricsd(
-        self, event: Union[PebbleReadyEvent, RelationJoinedEvent]
+        self, event: Union[ConfigChangedEvent, PebbleReadyEvent, RelationJoinedEvent]
     ) -> None:
         """Charm's main callback function, which, after ensuring all conditions are met, handles
         charm setup.
 
         Args:
-            event: Juju PebbleReadyEvent event
+            event: Juju ConfigChangedEvent, PebbleReadyEvent or RelationJoinedEvent event
 
         Returns:
             None
         """
+        if invalid_config_options := self._invalid_query_frontend_config_options:
+            self.unit.status = BlockedStatus(
+                f"Invalid query frontend config: {', '.join(invalid_config_options)}"
+            )
+            return
         if not self._relations_created:
             event.defer()
             return
@@ -107,34 +130,100 @@ class MagmaOrc8rMetricsdCharm(CharmBase):
             self.unit.status = WaitingStatus("Waiting for container to be ready")
             event.defer()
             return
-        self._write_config_file()
-        self._configure_pebble()
+        if self._query_frontend_enabled and not self._query_frontend_container.can_connect():
+            self.unit.status = WaitingStatus("Waiting for query frontend container to be ready")
+            event.defer()
+            return
+        self._configure_query_frontend()
+        config_files_changed = bool(self._workload_config.push(self._config_files))
+        self._configure_pebble(restart=config_files_changed)
+
+    def _on_diff_config_action(self, event: ActionEvent) -> None:
+        """Returns the changes that would be made to the metricsd.yml config file.
+
+        Args:
+            event (ActionEvent): Juju event
+
+        Returns:
+            None
+        """
+        if not self._container.can_connect():
+            event.fail("Container is not ready")
+            return
+        try:
+            config_files = self._config_files
+        except (AttributeError, KeyError):
+            event.fail("Required relations are not ready")
+            return
+        event.set_results(self._workload_config.diff_results(config_files))
+
+    @property
+    def _config_files(self) -> Dict[str, dict]:
+        """Returns the content of the metricsd.yml config file.
+
+        Returns:
+            dict: Config file content, keyed by workload path
+        """
+        return {
+            f"{self.BASE_CONFIG_PATH}/metricsd.yml": {
+                "prometheusQueryAddress": self._prometheus_query_address,
+                "alertmanagerApiURL": f"{self._alertmanager_url}/api/v2",
+                "prometheusConfigServiceURL": f"{self._prometheus_configurer_url}/v1",
+                "alertmanagerConfigServiceURL": f"{self._alertmanager_configurer_url}/v1",
+                "profile": "prometheus",
+            }
+        }
+
+    def _configure_query_frontend(self) -> None:
+        """Starts, reconfigures or stops the prometheus-query-frontend sidecar service.
 
-    def _write_config_file(self) -> None:
-        """Creates metricsd.yml config file.
+        The service is only restarted when its pebble layer or cache config changed.
 
         Returns:
             None
         """
-        metricsd_config = (
-            f'prometheusQueryAddress: "{self._prometheus_url}"\n'
-            f'alertmanagerApiURL: "{self._alertmanager_url}/api/v2"\n'
-            f'prometheusConfigServiceURL: "{self._prometheus_configurer_url}/v1"\n'
-            f'alertmanagerConfigServiceURL: "{self._alertmanager_configurer_url}/v1"\n'
-            '"profile": "prometheus"\n'
+        if not self._query_frontend_enabled:
+            self._stop_query_frontend()
+            return
+        config_files_changed = self._query_frontend_config.push(
+            {self.QUERY_FRONTEND_CACHE_CONFIG_PATH: self._query_frontend_cache_config}
         )
-        self._container.push(f"{self.BASE_CONFIG_PATH}/metricsd.yml", metricsd_config)
+        pebble_layer = self._query_frontend_pebble_layer
+        plan = self._query_frontend_container.get_plan()
+        if plan.services != pebble_layer.services or config_files_changed:
+            self._query_frontend_container.add_layer(
+                self.QUERY_FRONTEND_SERVICE_NAME, pebble_layer, combine=True
+            )
+            self._query_frontend_container.restart(self.QUERY_FRONTEND_SERVICE_NAME)
+            logger.info(f"Restarted {self.QUERY_FRONTEND_SERVICE_NAME}")
 
-    def _configure_pebble(self) -> None:
+    def _stop_query_frontend(self) -> None:
+        """Stops the prometheus-query-frontend sidecar service if it is running.
+
+        Returns:
+            None
+        """
+        if not self._query_frontend_container.can_connect():
+            return
+        services = self._query_frontend_container.get_services(self.QUERY_FRONTEND_SERVICE_NAME)
+        service = services.get(self.QUERY_FRONTEND_SERVICE_NAME)
+        if service and service.is_running():
+            self._query_frontend_container.stop(self.QUERY_FRONTEND_SERVICE_NAME)
+            logger.info(f"Stopped {self.QUERY_FRONTEND_SERVICE_NAME}")
+
+    def _configure_pebble(self, restart: bool = False) -> None:
         """Configures magma-orc8r-metricsd pebble layer.
 
+        Args:
+            restart (bool): Whether to restart the service even if the layer didn't change
+
         Returns:
             None
         """
         self.unit.status = MaintenanceStatus("Configuring pod")
         pebble_layer = self._pebble_layer
         plan = self._container.get_plan()
-        if plan.services != pebble_layer.services:
+        if plan.services != pebble_layer.services or restart:
             self._container.add_layer(self._container_name, pebble_layer, combine=True)
             self._container.restart(self._service_name)
             logger.info(f"Restarted container {self._service_name}")
@@ -208,6 +297,80 @@ class MagmaOrc8rMetricsdCharm(CharmBase):
             }
         )
 
+    @property
+    def _query_frontend_pebble_layer(self) -> Layer:
+        """Returns pebble layer with the prometheus-query-frontend service.
+
+        Range queries are split by the configured interval and cached, other queries are proxied
+        to Prometheus as is.
+
+        Returns:
+            Layer: Pebble Layer
+        """
+        return Layer(
+            {
+                "summary": f"{self.QUERY_FRONTEND_SERVICE_NAME} layer",
+                "description": f"pebble config layer for {self.QUERY_FRONTEND_SERVICE_NAME}",
+                "services": {
+                    self.QUERY_FRONTEND_SERVICE_NAME: {
+                        "override": "replace",
+                        "summary": self.QUERY_FRONTEND_SERVICE_NAME,
+                        "startup": "enabled",
+                        "command": "/bin/thanos query-frontend "
+                        f"--http-address=0.0.0.0:{self.QUERY_FRONTEND_PORT} "
+                        f"--query-frontend.downstream-url={self._prometheus_url} "
+                        "--query-range.split-interval="
+                        f"{self.model.config['query-frontend-split-interval']} "
+                        "--query-range.response-cache-config-file="
+                        f"{self.QUERY_FRONTEND_CACHE_CONFIG_PATH}",
+                    }
+                },
+            }
+        )
+
+    @property
+    def _query_frontend_cache_config(self) -> dict:
+        """Returns the in-memory results cache config of the prometheus-query-frontend service.
+
+        Returns:
+            dict: Response cache config
+        """
+        return {
+            "type": "IN-MEMORY",
+            "config": {
+                "max_size": self.model.config["query-frontend-cache-size"],
+                "max_size_items": 0,
+                "validity": self.model.config["query-frontend-cache-ttl"],
+            },
+        }
+
+    @property
+    def _query_frontend_enabled(self) -> bool:
+        """Returns whether PromQL queries go through the prometheus-query-frontend service.
+
+        Returns:
+            bool: True/False
+        """
+        return bool(self.model.config.get("query-frontend-enabled"))
+
+    @property
+    def _invalid_query_frontend_config_options(self) -> List[str]:
+        """Returns the names of the query frontend config options with invalid values.
+
+        Returns:
+            list: Invalid config options
+        """
+        patterns = {
+            "query-frontend-cache-size": r"^[0-9]+(B|KB|MB|GB)$",
+            "query-frontend-cache-ttl": r"^([0-9]+(ms|s|m|h))+$",
+            "query-frontend-split-interval": r"^([0-9]+(ms|s|m|h))+$",
+        }
+        return [
+            option
+            for option, pattern in patterns.items()
+            if not re.match(pattern, str(self.model.config.get(option, "")))
+        ]
+
     @property
     def _environment_variables(self) -> dict:
         """Returns the set of environment variables required by the magma-orc8r-metricsd service.
@@ -232,6 +395,17 @@ class MagmaOrc8rMetricsdCharm(CharmBase):
         # TODO: Get port from the relation data once such information is available.
         return f"http://{prometheus_service_name}:9090"
 
+    @property
+    def _prometheus_query_address(self) -> str:
+        """Returns the URL PromQL queries are sent to.
+
+        Returns:
+            str: prometheus-query-frontend URL if enabled, Prometheus URL otherwise
+        """
+        if self._query_frontend_enabled:
+            return f"http://localhost:{self.QUERY_FRONTEND_PORT}"
+        return self._prometheus_url
+
     @property
     def _prometheus_configurer_url(self) -> str:
         """Returns the URL of the Prometheus Configurer API.
@@ -252,6 +252,9 @@ class TestOrc8rMetricsd:
         charm = await ops_test.build_charm(".")
         resources = {
             f"{CHARM_NAME}-image": METADATA["resources"][f"{CHARM_NAME}-image"]["upstream-source"],
+            "prometheus-query-frontend-image": METADATA["resources"][
+                "prometheus-query-frontend-image"
+            ]["upstream-source"],
         }
         await ops_test.model.deploy(
             charm,
@@ -154,15 +154,58 @@ class TestCharm(unittest.TestCase):
 
         patch_push.assert_any_call(
             "/var/opt/magma/configs/orc8r/metricsd.yml",
-            f'prometheusQueryAddress: "http://{TEST_PROMETHEUS_APP_NAME}:9090"\n'
-            f'alertmanagerApiURL: "http://{TEST_ALERTMANAGER_APP_NAME}:9093/api/v2"\n'
+            f"prometheusQueryAddress: http://{TEST_PROMETHEUS_APP_NAME}:9090\n"
+            f"alertmanagerApiURL: http://{TEST_ALERTMANAGER_APP_NAME}:9093/api/v2\n"
             "prometheusConfigServiceURL: "
-            f'"http://{TEST_PROMETHEUS_CONFIGURER_SERVICE_NAME}:{TEST_PROMETHEUS_CONFIGURER_PORT}/v1"\n'  # noqa: E501, W505
+            f"http://{TEST_PROMETHEUS_CONFIGURER_SERVICE_NAME}:{TEST_PROMETHEUS_CONFIGURER_PORT}/v1\n"  # noqa: E501, W505
             "alertmanagerConfigServiceURL: "
-            f'"http://{TEST_ALERTMANAGER_CONFIGURER_SERVICE_NAME}:{TEST_ALERTMANAGER_CONFIGURER_PORT}/v1"\n'  # noqa: E501, W505
-            '"profile": "prometheus"\n',
+            f"http://{TEST_ALERTMANAGER_CONFIGURER_SERVICE_NAME}:{TEST_ALERTMANAGER_CONFIGURER_PORT}/v1\n"  # noqa: E501, W505
+            "profile: prometheus\n",
+            make_dirs=True,
         )
 
+    @patch("ops.model.Container.restart")
+    def test_given_config_file_unchanged_when_pebble_ready_then_service_is_not_restarted(
+        self, patch_restart
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-metricsd")
+        self._create_relations(activate=True)
+        self.harness.charm.on.magma_orc8r_metricsd_pebble_ready.emit(self.container)
+        patch_restart.reset_mock()
+
+        self.harness.charm.on.magma_orc8r_metricsd_pebble_ready.emit(self.container)
+
+        patch_restart.assert_not_called()
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus())
+
+    def test_given_prometheus_address_changed_when_diff_config_action_then_changes_are_returned(
+        self,
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-metricsd")
+        self._create_relations(activate=True)
+        self.harness.charm.on.magma_orc8r_metricsd_pebble_ready.emit(self.container)
+        self.harness.charm._workload_config.push(
+            {"/var/opt/magma/configs/orc8r/metricsd.yml": {"prometheusQueryAddress": "old"}}
+        )
+        event = Mock()
+
+        self.harness.charm._on_diff_config_action(event)
+
+        results = event.set_results.call_args.args[0]
+        self.assertEqual(results["changed-files"], "/var/opt/magma/configs/orc8r/metricsd.yml")
+        self.assertIn("-prometheusQueryAddress: old\n", results["diff"])
+        self.assertIn(
+            f"+prometheusQueryAddress: http://{TEST_PROMETHEUS_APP_NAME}:9090\n", results["diff"]
+        )
+
+    def test_given_relations_not_created_when_diff_config_action_then_action_fails(self):
+        self.harness.set_can_connect("magma-orc8r-metricsd", True)
+        event = Mock()
+
+        self.harness.charm._on_diff_config_action(event)
+
+        event.fail.assert_called_with("Required relations are not ready")
+
     @patch("ops.model.Container.push", Mock())
     def test_given_all_relations_created_when_pebble_ready_then_charm_goes_to_waiting_status(
         self,
@@ -250,6 +293,94 @@ class TestCharm(unittest.TestCase):
             {"active": "True"},
         )
 
+    def test_given_invalid_query_frontend_cache_size_when_config_changed_then_status_is_blocked(
+        self,
+    ):
+        self._create_relations(activate=True)
+
+        self.harness.update_config(key_values={"query-frontend-cache-size": "lots"})
+
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("Invalid query frontend config: query-frontend-cache-size"),
+        )
+
+    def test_given_query_frontend_enabled_and_container_not_reachable_when_pebble_ready_then_status_is_waiting(  # noqa: E501
+        self,
+    ):
+        self.harness.update_config(key_values={"query-frontend-enabled": True})
+        self._create_relations(activate=True)
+
+        self.harness.charm.on.magma_orc8r_metricsd_pebble_ready.emit(self.container)
+
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            WaitingStatus("Waiting for query frontend container to be ready"),
+        )
+
+    def test_given_query_frontend_enabled_when_pebble_ready_then_queries_go_through_query_frontend(  # noqa: E501
+        self,
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-metricsd")
+        self.harness.container_pebble_ready("prometheus-query-frontend")
+        self._create_relations(activate=True)
+
+        self.harness.update_config(
+            key_values={
+                "query-frontend-enabled": True,
+                "query-frontend-cache-size": "1GB",
+                "query-frontend-cache-ttl": "10m",
+            }
+        )
+
+        metricsd_config = (
+            self.harness.charm._container.pull("/var/opt/magma/configs/orc8r/metricsd.yml")
+            .read()
+            .splitlines()
+        )
+        self.assertIn("prometheusQueryAddress: http://localhost:9095", metricsd_config)
+        cache_config = self.harness.charm._query_frontend_container.pull(
+            "/etc/thanos/query-frontend-cache.yml"
+        ).read()
+        self.assertEqual(
+            cache_config,
+            "type: IN-MEMORY\nconfig:\n  max_size: 1GB\n  max_size_items: 0\n  validity: 10m\n",
+        )
+        updated_plan = self.harness.get_container_pebble_plan(
+            "prometheus-query-frontend"
+        ).to_dict()
+        self.assertEqual(
+            updated_plan["services"]["prometheus-query-frontend"]["command"],
+            "/bin/thanos query-frontend --http-address=0.0.0.0:9095 "
+            f"--query-frontend.downstream-url=http://{TEST_PROMETHEUS_APP_NAME}:9090 "
+            "--query-range.split-interval=24h "
+            "--query-range.response-cache-config-file=/etc/thanos/query-frontend-cache.yml",
+        )
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus())
+
+    def test_given_query_frontend_running_when_query_frontend_disabled_then_service_is_stopped(
+        self,
+    ):
+        self.harness.container_pebble_ready("magma-orc8r-metricsd")
+        self.harness.container_pebble_ready("prometheus-query-frontend")
+        self._create_relations(activate=True)
+        self.harness.update_config(key_values={"query-frontend-enabled": True})
+
+        self.harness.update_config(key_values={"query-frontend-enabled": False})
+
+        service = self.harness.charm._query_frontend_container.get_service(
+            "prometheus-query-frontend"
+        )
+        self.assertFalse(service.is_running())
+        metricsd_config = (
+            self.harness.charm._container.pull("/var/opt/magma/configs/orc8r/metricsd.yml")
+            .read()
+            .splitlines()
+        )
+        self.assertIn(
+            f"prometheusQueryAddress: http://{TEST_PROMETHEUS_APP_NAME}:9090", metricsd_config
+        )
+
     def _create_relations(self, activate=False):
         alertmanager_relation_id = self.harness.add_relation(
             relation_name="alertmanager-k8s", remote_app=TEST_ALERTMANAGER_APP_NAME
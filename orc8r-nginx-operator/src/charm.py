@@ -4,11 +4,17 @@
 
 """Proxies traffic between nms and obsidian."""
 
+import functools
+import hashlib
+import json
 import logging
 import pathlib
 import re
-from typing import List, Optional, Union
+import socket
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Union, cast
 
+import yaml
 from charms.magma_orc8r_certifier.v0.cert_certifier import CertCertifierRequires
 from charms.magma_orc8r_certifier.v0.cert_certifier import (
     CertificateAvailableEvent as CertifierCertificateAvailableEvent,
@@ -25,9 +31,7 @@ from charms.magma_orchestrator_interface.v0.magma_orchestrator_interface import
     OrchestratorProvides,
 )
 from charms.observability_libs.v1.kubernetes_service_patch import KubernetesServicePatch
-from httpx import HTTPStatusError
-from jinja2 import Environment, FileSystemLoader
-from lightkube import Client
+from lightkube import ApiError, Client
 from lightkube.models.core_v1 import ServicePort, ServiceSpec
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.core_v1 import Service
@@ -36,8 +40,10 @@ from ops.charm import (
     ConfigChangedEvent,
     PebbleReadyEvent,
     RelationBrokenEvent,
+    RelationChangedEvent,
     RelationJoinedEvent,
 )
+from ops.framework import StoredState
 from ops.main import main
 from ops.model import (
     ActiveStatus,
@@ -45,16 +51,37 @@ from ops.model import (
     MaintenanceStatus,
     ModelError,
     Relation,
+    Unit,
     WaitingStatus,
 )
 from ops.pebble import ExecError, Layer, PathError, ProtocolError
 
+if TYPE_CHECKING:
+    from jinja2 import Template
+
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _nginx_config_template() -> "Template":
+    """Returns the compiled nginx config template.
+
+    The template is parsed once and reused for the lifetime of the charm process.
+
+    Returns:
+        Template: Compiled `nginx.conf.j2` template
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    env = Environment(loader=FileSystemLoader(pathlib.Path(__file__).parent), autoescape=False)
+    return env.get_template("nginx.conf.j2")
+
+
 class MagmaOrc8rNginxCharm(CharmBase):
     """An instance of this object everytime an event occurs."""
 
+    _stored = StoredState()
+
     BASE_CERTS_PATH = "/var/opt/magma/certs"
     CONFIG_PATH = "/etc/nginx"
     REQUIRED_RELATIONS = ["cert-certifier", "cert-controller"]
@@ -62,12 +89,27 @@ class MagmaOrc8rNginxCharm(CharmBase):
     CLIENTCERT_PORT = 8443
     OPEN_PORT = 8444
     API_PORT = 9443
+    STUB_STATUS_PORT = 8080
+    NGINX_EXPORTER_PORT = 9113
+    NGINXLOG_EXPORTER_PORT = 4040
+    NGINXLOG_EXPORTER_SYSLOG_PORT = 5531
+    API_CACHE_PATH = "/var/cache/nginx/api"
+    NGINXLOG_EXPORTER_CONFIG_PATH = "/etc/prometheus-nginxlog-exporter/config.yml"
+    UPSTREAM_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    NGINX_CONFIG_ROLLOUT_TIMEOUT = 600
 
     def __init__(self, *args):
         """Initializes all event that need to be observed."""
         super().__init__(*args)
+        self._stored.set_default(
+            nginx_config_digest="",
+            nginx_config_rollout_generation=0,
+            nginx_config_rollout_waiting_since=0.0,
+        )
         self._container_name = self._service_name = "magma-orc8r-nginx"
         self._container = self.unit.get_container(self._container_name)
+        self._nginx_exporter_container = self.unit.get_container("nginx-prometheus-exporter")
+        self._nginxlog_exporter_container = self.unit.get_container("prometheus-nginxlog-exporter")
         self._cert_certifier = CertCertifierRequires(self, "cert-certifier")
         self._cert_controller = CertControllerRequires(self, "cert-controller")
         self._cert_root_ca = CertRootCARequires(self, "cert-root-ca")
@@ -86,8 +128,9 @@ class MagmaOrc8rNginxCharm(CharmBase):
             additional_selectors={"app.kubernetes.io/name": "orc8r-nginx"},
         )
 
-        self.framework.observe(self.on.install, self._on_install)
+        self.framework.observe(self.on.install, self._on_install_leader_elected_or_upgrade_charm)
         self.framework.observe(self.on.config_changed, self._on_config_changed)
+        self.framework.observe(self.on.replicas_relation_changed, self._on_config_changed)
         self.framework.observe(
             self.on.magma_orc8r_nginx_pebble_ready, self._configure_magma_orc8r_nginx
         )
@@ -99,6 +142,26 @@ class MagmaOrc8rNginxCharm(CharmBase):
             self._publish_orchestrator_details_in_the_relation_data_bag,
         )
         self.framework.observe(self.on.remove, self._on_remove)
+        self.framework.observe(
+            self.on.nginx_prometheus_exporter_pebble_ready,
+            self._on_nginx_prometheus_exporter_pebble_ready,
+        )
+        self.framework.observe(
+            self.on.prometheus_nginxlog_exporter_pebble_ready,
+            self._on_prometheus_nginxlog_exporter_pebble_ready,
+        )
+        self.framework.observe(
+            self.on.metrics_endpoint_relation_joined, self._on_metrics_endpoint_relation_joined
+        )
+        self.framework.observe(self.on.metrics_endpoint_relation_broken, self._on_config_changed)
+        self.framework.observe(self.on.leader_elected, self._publish_metrics_endpoint_scrape_jobs)
+        self.framework.observe(self.on.upgrade_charm, self._publish_metrics_endpoint_scrape_jobs)
+        self.framework.observe(
+            self.on.leader_elected, self._on_install_leader_elected_or_upgrade_charm
+        )
+        self.framework.observe(
+            self.on.upgrade_charm, self._on_install_leader_elected_or_upgrade_charm
+        )
 
         self.framework.observe(
             self._cert_certifier.on.certificate_available, self._on_certifier_certificate_available
@@ -120,25 +183,47 @@ class MagmaOrc8rNginxCharm(CharmBase):
                 self.on[required_rel].relation_joined, self._configure_magma_orc8r_nginx
             )
 
-    def _on_install(self, _) -> None:
-        """Triggerred once when charm is installed."""
-        self._create_additional_orc8r_nginx_services()
+    def _on_install_leader_elected_or_upgrade_charm(self, _) -> None:
+        """Triggered when charm is installed, upgraded or when a new leader is elected.
 
-    def _on_config_changed(self, event: ConfigChangedEvent) -> None:
-        """Triggered when configuration is changed.
+        Additional services are shared by all units, so they're only applied by the leader.
+        Applying them again after an upgrade or a leadership change makes sure they exist and
+        match the current charm revision, server-side apply making repeated calls safe.
+        """
+        if not self.unit.is_leader():
+            return
+        self._apply_additional_orc8r_nginx_services()
+
+    def _on_config_changed(
+        self,
+        event: Union[
+            ConfigChangedEvent, RelationBrokenEvent, RelationChangedEvent, RelationJoinedEvent
+        ],
+    ) -> None:
+        """Triggered when configuration, peer units' status or `metrics-endpoint` relation change.
+
+        When running multiple units, the leader publishes a generation number for each new
+        nginx config and units apply it one at a time, in unit number order.
 
         Args:
             event: Juju event
         """
-        if not self._domain_config_is_valid:
-            self.unit.status = BlockedStatus("Domain config is not valid")
+        if invalid_config_message := self._invalid_config_message:
+            self.unit.status = BlockedStatus(invalid_config_message)
             return
         if not self._container.can_connect():
             logger.info("Can't connect to container - Deferring")
             event.defer()
             return
-        self._generate_nginx_config()
-        self._configure_magma_orc8r_nginx(event)
+        config = self._nginx_config
+        if self.unit.is_leader():
+            self._publish_nginx_config_generation(config)
+        if not self._nginx_config_rollout_is_due(config):
+            event.defer()
+            return
+        if self._generate_nginx_config(config) or not self._service_is_running:
+            self._configure_magma_orc8r_nginx(event)
+        self._record_applied_nginx_config_generation()
         if self.model.relations.get("orchestrator"):
             self._publish_orchestrator_details_in_the_relation_data_bag(event)
 
@@ -149,6 +234,9 @@ class MagmaOrc8rNginxCharm(CharmBase):
             CertifierCertificateAvailableEvent,
             ControllerCertificateAvailableEvent,
             ConfigChangedEvent,
+            RelationBrokenEvent,
+            RelationChangedEvent,
+            RelationJoinedEvent,
             RootCACertificateAvailableEvent,
         ],
     ) -> None:
@@ -195,6 +283,8 @@ class MagmaOrc8rNginxCharm(CharmBase):
         self,
         event: Union[
             ConfigChangedEvent,
+            RelationBrokenEvent,
+            RelationChangedEvent,
             RelationJoinedEvent,
             RootCACertificateAvailableEvent,
             CertifierCertificateAvailableEvent,
@@ -203,8 +293,8 @@ class MagmaOrc8rNginxCharm(CharmBase):
         """Publishes Orchestrator details inside the `orchestrator` relation data bag.
 
         Args:
-            event: Juju event (ConfigChangedEvent, RelationJoinedEvent
-                   or RootCACertificateAvailableEvent)
+            event: Juju event (ConfigChangedEvent, RelationBrokenEvent, RelationChangedEvent,
+                   RelationJoinedEvent or RootCACertificateAvailableEvent)
         """
         if not self.unit.is_leader():
             return
@@ -246,11 +336,109 @@ class MagmaOrc8rNginxCharm(CharmBase):
             fluentd_port=24224,
         )
 
+    def _on_nginx_prometheus_exporter_pebble_ready(self, event: PebbleReadyEvent) -> None:
+        """Starts the exporter publishing the nginx stub_status counters as Prometheus metrics.
+
+        Args:
+            event (PebbleReadyEvent): Juju event
+        """
+        self._nginx_exporter_container.add_layer(
+            "nginx-prometheus-exporter", self._nginx_exporter_pebble_layer, combine=True
+        )
+        self._nginx_exporter_container.replan()
+        logger.info("Started nginx-prometheus-exporter")
+
+    def _on_prometheus_nginxlog_exporter_pebble_ready(self, event: PebbleReadyEvent) -> None:
+        """Starts the exporter turning nginx access logs into per-service latency metrics.
+
+        Args:
+            event (PebbleReadyEvent): Juju event
+        """
+        self._nginxlog_exporter_container.push(
+            path=self.NGINXLOG_EXPORTER_CONFIG_PATH,
+            source=yaml.safe_dump(self._nginxlog_exporter_config),
+            make_dirs=True,
+        )
+        self._nginxlog_exporter_container.add_layer(
+            "prometheus-nginxlog-exporter", self._nginxlog_exporter_pebble_layer, combine=True
+        )
+        self._nginxlog_exporter_container.replan()
+        logger.info("Started prometheus-nginxlog-exporter")
+
+    def _on_metrics_endpoint_relation_joined(self, event: RelationJoinedEvent) -> None:
+        """Publishes the scrape jobs and sends access logs to the access log exporter.
+
+        Args:
+            event (RelationJoinedEvent): Juju event
+        """
+        self._publish_metrics_endpoint_scrape_jobs(event)
+        self._on_config_changed(event)
+
+    def _publish_metrics_endpoint_scrape_jobs(self, _) -> None:
+        """Publishes the exporters' scrape jobs in the `metrics-endpoint` relation data bags.
+
+        Jobs are published again when leadership changes and when the charm is upgraded, so that
+        the relation data always matches the current leader and charm revision.
+        """
+        for relation in self.model.relations["metrics-endpoint"]:
+            self._publish_scrape_jobs_in_relation(relation)
+
+    def _publish_scrape_jobs_in_relation(self, relation: Relation) -> None:
+        """Publishes the exporters' scrape jobs in a `metrics-endpoint` relation data bag.
+
+        Args:
+            relation (Relation): `metrics-endpoint` relation
+        """
+        relation.data[self.unit].update(
+            {
+                "prometheus_scrape_unit_address": socket.getfqdn(),
+                "prometheus_scrape_unit_name": self.unit.name,
+            }
+        )
+        if not self.unit.is_leader():
+            return
+        relation.data[self.app].update(
+            {
+                "scrape_jobs": json.dumps(
+                    [
+                        {
+                            "job_name": "nginx",
+                            "metrics_path": "/metrics",
+                            "static_configs": [
+                                {
+                                    "targets": [
+                                        f"*:{self.NGINX_EXPORTER_PORT}",
+                                        f"*:{self.NGINXLOG_EXPORTER_PORT}",
+                                    ]
+                                }
+                            ],
+                        }
+                    ]
+                ),
+                "scrape_metadata": json.dumps(
+                    {
+                        "model": self.model.name,
+                        "model_uuid": self.model.uuid,
+                        "application": self.app.name,
+                        "unit": self.unit.name,
+                        "charm_name": self.meta.name,
+                    }
+                ),
+            }
+        )
+
     def _on_remove(self, _) -> None:
-        """Remove additional magma-orc8r-nginx services."""
-        client = Client()
+        """Remove additional magma-orc8r-nginx services once the application is removed."""
+        if self.app.planned_units() > 0:
+            logger.info("Other units are still serving traffic - Keeping additional services")
+            return
         for service in self._magma_orc8r_nginx_additional_services:
-            client.delete(Service, name=service.metadata.name, namespace=self._namespace)
+            try:
+                self._client.delete(Service, name=service.metadata.name, namespace=self._namespace)
+            except ApiError as e:
+                if e.status.code != 404:
+                    raise
+                logger.info(f"Additional service already deleted: {e}")
 
     def _on_certifier_certificate_available(
         self, event: CertifierCertificateAvailableEvent
@@ -321,9 +509,37 @@ class MagmaOrc8rNginxCharm(CharmBase):
             f"Waiting for relation(s) to be created: {event.relation.name}"
         )
 
-    def _generate_nginx_config(self) -> None:
-        """Generates nginx config to /etc/nginx/nginx.conf."""
+    def _generate_nginx_config(self, config: str) -> bool:
+        """Generates nginx config to /etc/nginx/nginx.conf.
+
+        The config is pushed to the workload only if its digest differs from the digest of the
+        last pushed config.
+
+        Args:
+            config (str): Rendered nginx config
+
+        Returns:
+            bool: Whether a new config was pushed to the workload
+        """
         logger.info("Generating nginx config file...")
+        if self.model.config.get("api-cache-ttl"):
+            self._container.make_dir(self.API_CACHE_PATH, make_parents=True)
+        config_digest = hashlib.sha256(config.encode()).hexdigest()
+        if config_digest == self._stored.nginx_config_digest and self._nginx_config_is_generated:
+            logger.info("Nginx config file is up to date")
+            return False
+        self._container.push(path=f"{self.CONFIG_PATH}/nginx.conf", source=config)
+        self._stored.nginx_config_digest = config_digest
+        logger.info("Successfully generated nginx config file")
+        return True
+
+    @property
+    def _nginx_config(self) -> str:
+        """Returns the rendered nginx config.
+
+        Returns:
+            str: nginx.conf content
+        """
         domain_name = self.model.config.get("domain")
         context = {
             "base_certs_path": self.BASE_CERTS_PATH,
@@ -333,12 +549,317 @@ class MagmaOrc8rNginxCharm(CharmBase):
             "open_port": self.OPEN_PORT,
             "clientcert_port": self.CLIENTCERT_PORT,
             "api_port": self.API_PORT,
+            "gateway_request_limits": self._gateway_request_limits,
+            "gateway_connection_limit": self.model.config.get("gateway-connection-limit"),
+            "bootstrap_request_rate_limit": self.model.config.get("bootstrap-request-rate-limit"),
+            "request_burst": self.model.config.get("gateway-request-burst"),
+            "access_log_parameters": self._access_log_parameters,
+            "access_log_success_sample_percentage": self._access_log_success_sample_percentage,
+            "stub_status_port": self.STUB_STATUS_PORT,
+            "metrics_syslog_port": self.NGINXLOG_EXPORTER_SYSLOG_PORT,
+            "metrics_access_log": bool(self.model.relations["metrics-endpoint"]),
+            "api_gzip_level": self.model.config.get("api-gzip-level"),
+            "api_cache_ttl": self.model.config.get("api-cache-ttl"),
+            "api_cache_paths": self._api_cache_paths,
+            "api_cache_max_size": self.model.config.get("api-cache-max-size"),
+            "api_cache_path": self.API_CACHE_PATH,
         }
-        env = Environment(loader=FileSystemLoader(pathlib.Path(__file__).parent), autoescape=False)
-        template = env.get_template("nginx.conf.j2")
-        config = template.render(context)
-        self._container.push(path=f"{self.CONFIG_PATH}/nginx.conf", source=config)
-        logger.info("Successfully generated nginx config file")
+        return _nginx_config_template().render(context)
+
+    def _publish_nginx_config_generation(self, config: str) -> None:
+        """Publishes the digest of a new nginx config with a new generation number.
+
+        Args:
+            config (str): Rendered nginx config
+        """
+        peer_relation = self.model.get_relation("replicas")
+        if not peer_relation:
+            return
+        app_data = peer_relation.data[self.app]
+        config_digest = hashlib.sha256(config.encode()).hexdigest()
+        if app_data.get("config_digest") == config_digest:
+            return
+        generation = int(app_data.get("config_generation", "0")) + 1
+        app_data.update({"config_digest": config_digest, "config_generation": str(generation)})
+        logger.info(f"Published nginx config generation {generation}")
+
+    def _nginx_config_rollout_is_due(self, config: str) -> bool:
+        """Returns whether this unit can apply the current nginx config.
+
+        The leader publishes the digest of the current nginx config with a generation number
+        in the peer relation. Units whose nginx is running wait for all units with a lower unit
+        number to apply a generation before applying it themselves, so that nginx is never
+        reloaded on all units at once. A unit stops waiting after `NGINX_CONFIG_ROLLOUT_TIMEOUT`
+        seconds, so that a unit which doesn't apply the config can't block the others.
+
+        Args:
+            config (str): Rendered nginx config
+
+        Returns:
+            bool: True/False
+        """
+        peer_relation = self.model.get_relation("replicas")
+        if not peer_relation:
+            return True
+        app_data = peer_relation.data[self.app]
+        config_digest = hashlib.sha256(config.encode()).hexdigest()
+        if app_data.get("config_digest") != config_digest:
+            self.unit.status = WaitingStatus("Waiting for leader to publish nginx config")
+            return False
+        if not self._service_is_running:
+            return True
+        generation = int(app_data["config_generation"])
+        blocking_unit = self._nginx_config_rollout_blocking_unit(peer_relation, generation)
+        if not blocking_unit:
+            return True
+        if self._stored.nginx_config_rollout_generation != generation:
+            self._stored.nginx_config_rollout_generation = generation
+            self._stored.nginx_config_rollout_waiting_since = time.time()
+        waiting_since = cast(float, self._stored.nginx_config_rollout_waiting_since)
+        waiting_time = time.time() - waiting_since
+        if waiting_time > self.NGINX_CONFIG_ROLLOUT_TIMEOUT:
+            logger.warning(
+                f"{blocking_unit} did not apply nginx config generation {generation} within "
+                f"{self.NGINX_CONFIG_ROLLOUT_TIMEOUT} seconds - Applying it anyway"
+            )
+            return True
+        self.unit.status = WaitingStatus(
+            f"Waiting for {blocking_unit} to apply nginx config generation {generation}"
+        )
+        return False
+
+    def _nginx_config_rollout_blocking_unit(
+        self, peer_relation: Relation, generation: int
+    ) -> Optional[str]:
+        """Returns the first lower-numbered unit which didn't apply a nginx config generation.
+
+        Units are ordered by the numbers of the units present in the peer relation, which may not
+        be contiguous. Units which left the relation and units whose nginx isn't running are not
+        waited for, as they don't serve traffic.
+
+        Args:
+            peer_relation (Relation): Peer relation
+            generation (int): nginx config generation
+
+        Returns:
+            str: Unit name, None if no unit needs to be waited for
+        """
+        for unit in sorted(peer_relation.units, key=self._unit_number):
+            if self._unit_number(unit) >= self._unit_number(self.unit):
+                break
+            unit_data = peer_relation.data[unit]
+            if unit_data.get("nginx_running") != "True":
+                continue
+            if int(unit_data.get("config_generation", "0")) < generation:
+                return unit.name
+        return None
+
+    def _record_applied_nginx_config_generation(self) -> None:
+        """Records whether nginx runs and the config generation it applied in the peer relation."""
+        peer_relation = self.model.get_relation("replicas")
+        if not peer_relation:
+            return
+        service_is_running = self._service_is_running
+        peer_relation.data[self.unit].update({"nginx_running": str(service_is_running)})
+        if not service_is_running:
+            return
+        if generation := peer_relation.data[self.app].get("config_generation"):
+            peer_relation.data[self.unit].update({"config_generation": generation})
+
+    @staticmethod
+    def _unit_number(unit: Unit) -> int:
+        """Returns the number of a unit.
+
+        Args:
+            unit (Unit): Juju unit
+
+        Returns:
+            int: Unit number
+        """
+        return int(unit.name.split("/")[1])
+
+    @property
+    def _invalid_config_message(self) -> Optional[str]:
+        """Returns a message describing the first invalid config option, if any.
+
+        Returns:
+            str: Blocked status message, None if the config is valid
+        """
+        if not self._domain_config_is_valid:
+            return "Domain config is not valid"
+        if not self._rate_limit_config_is_valid:
+            return "Rate limit config is not valid"
+        if not self._access_log_config_is_valid:
+            return "Access log config is not valid"
+        if not self._api_config_is_valid:
+            return "API compression or cache config is not valid"
+        return None
+
+    @property
+    def _api_cache_paths(self) -> List[str]:
+        """Returns the regular expressions of REST API paths that may be cached.
+
+        Returns:
+            list: Request URI regular expressions
+        """
+        paths = str(self.model.config.get("api-cache-paths") or "")
+        return [path.strip() for path in paths.split(",") if path.strip()]
+
+    @property
+    def _api_config_is_valid(self) -> bool:
+        """Returns whether the REST API compression and cache config is valid.
+
+        Returns:
+            bool: True/False
+        """
+        cache_ttl = str(self.model.config.get("api-cache-ttl") or "")
+        cache_max_size = str(self.model.config.get("api-cache-max-size") or "")
+        if not 0 <= self.model.config.get("api-gzip-level") <= 9:  # type: ignore[operator]
+            return False
+        if not cache_ttl:
+            return True
+        if not re.match(r"^[1-9][0-9]*(ms|s|m|h)?$", cache_ttl):
+            return False
+        if not cache_max_size or not re.match(r"^[1-9][0-9]*[kKmMgG]?$", cache_max_size):
+            return False
+        for path in self._api_cache_paths:
+            if re.search(r'[\s"]', path):
+                return False
+            try:
+                re.compile(path)
+            except re.error:
+                return False
+        return True
+
+    @property
+    def _gateway_request_limits(self) -> List[dict]:
+        """Returns the per-gateway request rate limit zones to be rendered in the nginx config.
+
+        Each service with a dedicated limit gets its own zone. Every other service shares the
+        default zone, if `gateway-request-rate-limit` is set.
+
+        Returns:
+            list: Rate limit zones
+        """
+        client_cn = "$ssl_client_s_dn_cn"
+        service_limits = self._gateway_service_request_rate_limits
+        limits = []
+        if default_rate := self.model.config.get("gateway-request-rate-limit"):
+            limits.append(
+                {
+                    "zone": "default",
+                    "description": "all services",
+                    "rate": default_rate,
+                    "default_key": client_cn,
+                    "service_keys": {service: '""' for service in service_limits},
+                }
+            )
+        for service, rate in service_limits.items():
+            limits.append(
+                {
+                    "zone": service.replace("-", "_"),
+                    "description": f"the {service} service",
+                    "rate": rate,
+                    "default_key": '""',
+                    "service_keys": {service: client_cn},
+                }
+            )
+        return limits
+
+    @property
+    def _gateway_service_request_rate_limits(self) -> Dict[str, int]:
+        """Returns the per-service gateway request rate limits.
+
+        Returns:
+            dict: Requests per second, by service name
+
+        Raises:
+            ValueError: if the `gateway-service-request-rate-limits` config is malformed
+        """
+        limits = {}
+        config = str(self.model.config.get("gateway-service-request-rate-limits") or "")
+        for item in filter(None, (item.strip() for item in config.split(","))):
+            service, _, rate = item.partition("=")
+            service = service.strip()
+            if not re.match(r"^[a-z0-9_-]+$", service) or not rate.strip().isdigit():
+                raise ValueError(f"Invalid service rate limit: {item}")
+            limits[service] = int(rate)
+        return limits
+
+    @property
+    def _rate_limit_config_is_valid(self) -> bool:
+        """Returns whether the rate and connection limits config is valid.
+
+        Returns:
+            bool: True/False
+        """
+        try:
+            service_limits = self._gateway_service_request_rate_limits
+        except ValueError as e:
+            logger.error(str(e))
+            return False
+        limits = [
+            self.model.config.get("gateway-request-rate-limit"),
+            self.model.config.get("gateway-request-burst"),
+            self.model.config.get("gateway-connection-limit"),
+            self.model.config.get("bootstrap-request-rate-limit"),
+        ]
+        if any(limit < 0 for limit in limits):  # type: ignore[operator]
+            return False
+        return all(rate > 0 for rate in service_limits.values())
+
+    @property
+    def _access_log_parameters(self) -> str:
+        """Returns the buffering, compression and condition parameters of the access logs.
+
+        Returns:
+            str: `access_log` directive parameters following the log format
+        """
+        parameters = []
+        buffer_size = self.model.config.get("access-log-buffer-size")
+        gzip_level = self.model.config.get("access-log-gzip-level")
+        if buffer_size:
+            parameters.append(f"buffer={buffer_size}")
+        if gzip_level:
+            parameters.append(f"gzip={gzip_level}")
+        if buffer_size or gzip_level:
+            parameters.append(f"flush={self.model.config.get('access-log-flush-interval')}")
+        if self._access_log_success_sample_percentage is not None:
+            parameters.append("if=$access_log_enabled")
+        return "".join(f" {parameter}" for parameter in parameters)
+
+    @property
+    def _access_log_success_sample_percentage(self) -> Optional[str]:
+        """Returns the percentage of successful requests to be written to the access logs.
+
+        Returns:
+            str: Percentage of successful requests to log, None if all of them are logged
+        """
+        sample_rate = self.model.config.get("access-log-success-sample-rate")
+        if sample_rate == 1:
+            return None
+        if not sample_rate:
+            return ""
+        return f"{100 / sample_rate:.2f}".rstrip("0").rstrip(".")  # type: ignore[operator]
+
+    @property
+    def _access_log_config_is_valid(self) -> bool:
+        """Returns whether the access log config is valid.
+
+        Returns:
+            bool: True/False
+        """
+        buffer_size = str(self.model.config.get("access-log-buffer-size") or "")
+        flush_interval = str(self.model.config.get("access-log-flush-interval") or "")
+        gzip_level = self.model.config.get("access-log-gzip-level")
+        sample_rate = self.model.config.get("access-log-success-sample-rate")
+        if buffer_size and not re.match(r"^[1-9][0-9]*[kKmM]?$", buffer_size):
+            return False
+        if not flush_interval or not re.match(r"^[1-9][0-9]*(ms|s|m|h)?$", flush_interval):
+            return False
+        if not 0 <= gzip_level <= 9:  # type: ignore[operator]
+            return False
+        return sample_rate >= 0  # type: ignore[operator]
 
     @property
     def _nginx_config_is_generated(self) -> bool:
@@ -347,17 +868,16 @@ class MagmaOrc8rNginxCharm(CharmBase):
             return False
         return self._container.exists(f"{self.CONFIG_PATH}/nginx.conf")
 
-    def _create_additional_orc8r_nginx_services(self) -> None:
-        """Creates additional K8s services.
+    def _apply_additional_orc8r_nginx_services(self) -> None:
+        """Creates or updates additional K8s services using server-side apply.
 
         Those services are expected to be delivered by the magma-orc8r-nginx service.
+        Fields previously set by another manager (ex. services created by older revisions of
+        this charm) are taken over by this application.
         """
-        client = Client()
-        logger.info("Creating additional magma-orc8r-nginx services")
+        logger.info("Applying additional magma-orc8r-nginx services")
         for service in self._magma_orc8r_nginx_additional_services:
-            if not self._orc8r_nginx_service_created(service.metadata.name):
-                logger.info(f"Creating {service.metadata.name} service")
-                client.create(service)
+            self._client.apply(service, field_manager=self.app.name, force=True)
 
     def _configure_pebble_layer(
         self,
@@ -366,6 +886,9 @@ class MagmaOrc8rNginxCharm(CharmBase):
             CertifierCertificateAvailableEvent,
             ControllerCertificateAvailableEvent,
             ConfigChangedEvent,
+            RelationBrokenEvent,
+            RelationChangedEvent,
+            RelationJoinedEvent,
             RootCACertificateAvailableEvent,
         ],
     ) -> None:
@@ -382,8 +905,13 @@ class MagmaOrc8rNginxCharm(CharmBase):
                     f"Configuring pebble layer for {self._service_name}"
                 )
                 self._container.add_layer(self._container_name, layer, combine=True)
-            self._container.restart(self._service_name)
-            logger.info(f"Restarted service {self._service_name}")
+                self._container.restart(self._service_name)
+                logger.info(f"Restarted service {self._service_name}")
+            elif self._container.get_service(self._service_name).is_running():
+                self._reload_nginx()
+            else:
+                self._container.restart(self._service_name)
+                logger.info(f"Restarted service {self._service_name}")
             self._update_relations()
             self.unit.status = ActiveStatus()
         else:
@@ -391,6 +919,19 @@ class MagmaOrc8rNginxCharm(CharmBase):
             event.defer()
             return
 
+    def _reload_nginx(self) -> None:
+        """Reloads nginx configuration without restarting the workload service.
+
+        Raises:
+            ProcessExecutionError: if the reload command fails
+        """
+        process = self._container.exec(["nginx", "-s", "reload"], timeout=30)
+        try:
+            process.wait_output()
+        except ExecError as e:
+            raise ProcessExecutionError(e)
+        logger.info(f"Reloaded service {self._service_name}")
+
     def _update_relations(self) -> None:
         """Updates the status of the `orc8r-nginx` service.
 
@@ -418,21 +959,10 @@ class MagmaOrc8rNginxCharm(CharmBase):
             }
         )
 
-    def _orc8r_nginx_service_created(self, service_name: str) -> bool:
-        """Checks whether given K8s service exists or not.
-
-        Args:
-            service_name (str): Kubernetes service name
-
-        Returns:
-            bool: True/False
-        """
-        client = Client()
-        try:
-            client.get(Service, name=service_name, namespace=self._namespace)
-            return True
-        except HTTPStatusError:
-            return False
+    @functools.cached_property
+    def _client(self) -> Client:
+        """Returns the Kubernetes client shared by all the API calls of the current hook."""
+        return Client()
 
     @property
     def _magma_orc8r_nginx_additional_services(self) -> List[Service]:
@@ -641,6 +1171,75 @@ class MagmaOrc8rNginxCharm(CharmBase):
             }
         )
 
+    @property
+    def _nginx_exporter_pebble_layer(self) -> Layer:
+        """Returns pebble layer for the nginx-prometheus-exporter service."""
+        return Layer(
+            {
+                "summary": "nginx-prometheus-exporter pebble layer",
+                "services": {
+                    "nginx-prometheus-exporter": {
+                        "override": "replace",
+                        "startup": "enabled",
+                        "command": "/usr/bin/nginx-prometheus-exporter "
+                        f"-nginx.scrape-uri=http://127.0.0.1:{self.STUB_STATUS_PORT}/stub_status "
+                        f"-web.listen-address=:{self.NGINX_EXPORTER_PORT}",
+                    }
+                },
+            }
+        )
+
+    @property
+    def _nginxlog_exporter_pebble_layer(self) -> Layer:
+        """Returns pebble layer for the prometheus-nginxlog-exporter service."""
+        return Layer(
+            {
+                "summary": "prometheus-nginxlog-exporter pebble layer",
+                "services": {
+                    "prometheus-nginxlog-exporter": {
+                        "override": "replace",
+                        "startup": "enabled",
+                        "command": "/prometheus-nginxlog-exporter "
+                        f"-config-file {self.NGINXLOG_EXPORTER_CONFIG_PATH}",
+                    }
+                },
+            }
+        )
+
+    @property
+    def _nginxlog_exporter_config(self) -> dict:
+        """Returns prometheus-nginxlog-exporter config.
+
+        Access log entries are received over syslog from nginx and turned into request counters
+        and latency histograms labelled with the nginx port and the requested orc8r service.
+
+        Returns:
+            dict: prometheus-nginxlog-exporter config
+        """
+        return {
+            "listen": {"port": self.NGINXLOG_EXPORTER_PORT, "address": "0.0.0.0"},
+            "namespaces": [
+                {
+                    "name": "orc8r_nginx",
+                    "format": '$server_port $srv $status "$request" $request_time '
+                    "$upstream_response_time",
+                    "source": {
+                        "syslog": {
+                            "listen_address": "udp://127.0.0.1:"
+                            f"{self.NGINXLOG_EXPORTER_SYSLOG_PORT}",
+                            "format": "rfc3164",
+                            "tags": ["nginx"],
+                        }
+                    },
+                    "relabel_configs": [
+                        {"target_label": "port", "from": "server_port"},
+                        {"target_label": "service", "from": "srv"},
+                    ],
+                    "histogram_buckets": self.UPSTREAM_LATENCY_BUCKETS,
+                }
+            ],
+        }
+
     @property
     def _domain_config(self) -> Optional[str]:
         """Returns domain config.
@@ -1,11 +1,13 @@
 # Copyright 2021 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import hashlib
+import json
 import pathlib
 import unittest
 from unittest.mock import Mock, call, patch
 
-from httpx import HTTPStatusError, Request, Response
+from lightkube import ApiError
 from lightkube.models.core_v1 import ServicePort, ServiceSpec
 from lightkube.models.meta_v1 import ObjectMeta
 from lightkube.resources.core_v1 import Service
@@ -15,12 +17,21 @@ from ops.model import ActiveStatus, BlockedStatus, WaitingStatus
 from charm import MagmaOrc8rNginxCharm
 
 
+def unit_number_as_last_unit(unit) -> int:
+    """Numbers the unit under test after its peers, which the testing harness can't do."""
+    unit_number = int(unit.name.split("/")[1])
+    return 9 if unit_number == 0 else unit_number
+
+
 class TestCharm(unittest.TestCase):
     @patch(
         "charm.KubernetesServicePatch",
         lambda charm, ports, service_type, service_name, additional_labels, additional_selectors: None,  # noqa: E501
     )
     def setUp(self):
+        patch("lightkube.core.client.GenericSyncClient", new=Mock).start()
+        self.patched_apply = patch("lightkube.core.client.Client.apply").start()
+        self.addCleanup(patch.stopall)
         self.namespace = "whatever"
         self.harness = testing.Harness(MagmaOrc8rNginxCharm)
         self.harness.set_model_name(name=self.namespace)
@@ -30,21 +41,15 @@ class TestCharm(unittest.TestCase):
         self._expected_config_file = pathlib.Path(__file__).parent / "nginx.conf"
 
     @patch("lightkube.core.client.GenericSyncClient", new=Mock)
-    @patch("lightkube.core.client.Client.get")
-    @patch("lightkube.core.client.Client.create")
+    @patch("lightkube.core.client.Client.apply")
     @patch("ops.model.Container.exec")
-    def test_given_additional_k8s_services_not_created_when_on_install_then_services_are_created(
-        self, patched_exec, patch_create, patch_get
+    def test_given_unit_is_leader_when_on_install_then_additional_k8s_services_are_applied_with_server_side_apply(  # noqa: E501
+        self, patched_exec, patch_apply
     ):
         patched_exec.return_value = MockExec()
-        patch_get.side_effect = HTTPStatusError(
-            message="whatever",
-            response=Response(status_code=400),
-            request=Request(url="whatever", method="get"),
-        )
-        event = Mock()
+        self.harness.set_leader(True)
 
-        self.harness.charm._on_install(event)
+        self.harness.charm.on.install.emit()
 
         calls = [
             call(
@@ -82,7 +87,9 @@ class TestCharm(unittest.TestCase):
                         ],
                         type="LoadBalancer",
                     ),
-                )
+                ),
+                field_manager="magma-orc8r-nginx",
+                force=True,
             ),
             call(
                 Service(
@@ -117,11 +124,37 @@ class TestCharm(unittest.TestCase):
                         ],
                         type="LoadBalancer",
                     ),
-                )
+                ),
+                field_manager="magma-orc8r-nginx",
+                force=True,
             ),
         ]
 
-        patch_create.assert_has_calls(calls=calls)
+        patch_apply.assert_has_calls(calls=calls)
+
+    def test_given_unit_is_not_leader_when_on_install_then_additional_k8s_services_are_not_applied(  # noqa: E501
+        self,
+    ):
+        self.harness.charm.on.install.emit()
+
+        self.patched_apply.assert_not_called()
+
+    def test_given_unit_is_not_leader_when_unit_is_elected_leader_then_additional_k8s_services_are_applied(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(True)
+
+        self.assertEqual(self.patched_apply.call_count, 2)
+
+    def test_given_unit_is_leader_when_upgrade_charm_then_additional_k8s_services_are_applied(
+        self,
+    ):
+        self.harness.set_leader(True)
+        self.patched_apply.reset_mock()
+
+        self.harness.charm.on.upgrade_charm.emit()
+
+        self.assertEqual(self.patched_apply.call_count, 2)
 
     @patch("ops.model.Container.exec", new=Mock)
     def test_given_no_relations_created_when_pebble_ready_event_emitted_then_status_is_blocked(
@@ -473,6 +506,416 @@ class TestCharm(unittest.TestCase):
         config_content = patched_push.call_args.kwargs["source"]
         assert config_content == self._expected_config_file.read_text().strip()
 
+    @patch("ops.model.Container.push", new=Mock)
+    def test_given_unit_is_leader_and_peer_relation_created_when_config_changed_then_nginx_config_generation_is_published_in_the_peer_relation_data_bag(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(True)
+        self.harness.set_can_connect(container=self._container, val=True)
+        peer_relation_id = self.harness.add_relation("replicas", self.harness.charm.app.name)
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        app_data = self.harness.get_relation_data(peer_relation_id, self.harness.charm.app.name)
+        self.assertEqual(app_data["config_generation"], "1")
+        self.assertEqual(
+            app_data["config_digest"],
+            hashlib.sha256(self._expected_config_file.read_text().strip().encode()).hexdigest(),
+        )
+
+    @patch("ops.model.Container.push", new=Mock)
+    def test_given_peer_relation_created_when_config_changed_then_nginx_config_is_rendered_once(
+        self,
+    ):
+        self.harness.set_leader(True)
+        self.harness.set_can_connect(container=self._container, val=True)
+        self.harness.add_relation("replicas", self.harness.charm.app.name)
+
+        with patch("charm._nginx_config_template") as patched_template:
+            patched_template.return_value.render.return_value = "nginx config"
+            self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        patched_template.return_value.render.assert_called_once()
+
+    @patch("ops.model.Container.push")
+    def test_given_unit_is_not_leader_and_leader_did_not_publish_nginx_config_when_config_changed_then_nginx_config_file_is_not_pushed_and_status_is_waiting(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+        peer_relation_id = self.harness.add_relation("replicas", self.harness.charm.app.name)
+        self.harness.update_relation_data(
+            peer_relation_id,
+            self.harness.charm.app.name,
+            {"config_digest": "old digest", "config_generation": "3"},
+        )
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            WaitingStatus("Waiting for leader to publish nginx config"),
+            self.harness.charm.unit.status,
+        )
+
+    @patch("charm.MagmaOrc8rNginxCharm._unit_number", new=staticmethod(unit_number_as_last_unit))
+    @patch("ops.model.Container.push")
+    def test_given_lower_unit_running_nginx_did_not_apply_config_generation_when_config_changed_then_nginx_config_file_is_not_pushed_and_status_is_waiting_for_lower_unit(  # noqa: E501
+        self, patched_push
+    ):
+        self._create_peer_relation_with_lower_unit({"nginx_running": "True"})
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            WaitingStatus(
+                f"Waiting for {self.harness.charm.app.name}/1 to apply nginx config generation 1"
+            ),
+            self.harness.charm.unit.status,
+        )
+
+    @patch("charm.MagmaOrc8rNginxCharm._unit_number", new=staticmethod(unit_number_as_last_unit))
+    @patch("ops.model.Container.push")
+    def test_given_lower_unit_not_running_nginx_when_config_changed_then_nginx_config_file_is_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        self._create_peer_relation_with_lower_unit({"nginx_running": "False"})
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        patched_push.assert_called_once()
+
+    @patch("charm.MagmaOrc8rNginxCharm._unit_number", new=staticmethod(unit_number_as_last_unit))
+    @patch("ops.model.Container.push")
+    def test_given_lower_unit_left_peer_relation_when_config_changed_then_nginx_config_file_is_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        peer_relation_id = self._create_peer_relation_with_lower_unit({"nginx_running": "True"})
+        self.harness.remove_relation_unit(peer_relation_id, f"{self.harness.charm.app.name}/1")
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        patched_push.assert_called_once()
+
+    @patch("charm.MagmaOrc8rNginxCharm._unit_number", new=staticmethod(unit_number_as_last_unit))
+    @patch("ops.model.Container.push")
+    def test_given_lower_unit_numbered_above_planned_units_did_not_apply_config_generation_when_config_changed_then_status_is_waiting_for_lower_unit(  # noqa: E501
+        self, patched_push
+    ):
+        peer_relation_id = self._create_peer_relation_with_lower_unit(
+            {"nginx_running": "True", "config_generation": "1"}
+        )
+        lower_unit = f"{self.harness.charm.app.name}/5"
+        self.harness.add_relation_unit(peer_relation_id, lower_unit)
+        self.harness.update_relation_data(peer_relation_id, lower_unit, {"nginx_running": "True"})
+        self.harness.set_planned_units(3)
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            WaitingStatus(f"Waiting for {lower_unit} to apply nginx config generation 1"),
+            self.harness.charm.unit.status,
+        )
+
+    @patch("charm.MagmaOrc8rNginxCharm._unit_number", new=staticmethod(unit_number_as_last_unit))
+    @patch("time.time")
+    @patch("ops.model.Container.push")
+    def test_given_lower_unit_did_not_apply_config_generation_within_timeout_when_config_changed_then_nginx_config_file_is_pushed(  # noqa: E501
+        self, patched_push, patched_time
+    ):
+        peer_relation_id = self._create_peer_relation_with_lower_unit({"nginx_running": "True"})
+        patched_time.return_value = 1000.0
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+        patched_push.assert_not_called()
+
+        patched_time.return_value = 1000.0 + MagmaOrc8rNginxCharm.NGINX_CONFIG_ROLLOUT_TIMEOUT + 1
+        self.harness.update_relation_data(
+            peer_relation_id, f"{self.harness.charm.app.name}/1", {"config_generation": "0"}
+        )
+
+        patched_push.assert_called_once()
+
+    @patch("lightkube.core.client.GenericSyncClient", new=Mock)
+    @patch("lightkube.core.client.Client.delete")
+    def test_given_other_units_planned_when_on_remove_then_additional_k8s_services_are_not_deleted(  # noqa: E501
+        self, patched_delete
+    ):
+        self.harness.set_planned_units(2)
+
+        self.harness.charm.on.remove.emit()
+
+        patched_delete.assert_not_called()
+
+    @patch("lightkube.core.client.GenericSyncClient", new=Mock)
+    @patch("lightkube.core.client.Client.delete")
+    def test_given_no_units_planned_when_on_remove_then_additional_k8s_services_are_deleted(
+        self, patched_delete
+    ):
+        self.harness.set_planned_units(0)
+
+        self.harness.charm.on.remove.emit()
+
+        patched_delete.assert_has_calls(
+            [
+                call(Service, name="orc8r-bootstrap-nginx", namespace=self.namespace),
+                call(Service, name="orc8r-clientcert-nginx", namespace=self.namespace),
+            ]
+        )
+
+    @patch("lightkube.core.client.Client.delete")
+    def test_given_additional_k8s_service_already_deleted_when_on_remove_then_other_additional_k8s_services_are_deleted(  # noqa: E501
+        self, patched_delete
+    ):
+        not_found_response = Mock()
+        not_found_response.json.return_value = {"code": 404, "message": "not found"}
+        patched_delete.side_effect = [ApiError(response=not_found_response), None]
+        self.harness.set_planned_units(0)
+
+        self.harness.charm.on.remove.emit()
+
+        self.assertEqual(patched_delete.call_count, 2)
+
+    @patch("lightkube.core.client.Client.delete")
+    def test_given_k8s_api_error_other_than_not_found_when_on_remove_then_error_is_raised(
+        self, patched_delete
+    ):
+        forbidden_response = Mock()
+        forbidden_response.json.return_value = {"code": 403, "message": "forbidden"}
+        patched_delete.side_effect = ApiError(response=forbidden_response)
+        self.harness.set_planned_units(0)
+
+        with self.assertRaises(ApiError):
+            self.harness.charm.on.remove.emit()
+
+    @patch("charm.Client")
+    def test_given_no_units_planned_when_on_remove_then_single_k8s_client_is_used_for_all_services(  # noqa: E501
+        self, patched_client
+    ):
+        self.harness.set_planned_units(0)
+
+        self.harness.charm.on.remove.emit()
+
+        patched_client.assert_called_once_with()
+        self.assertEqual(patched_client.return_value.delete.call_count, 2)
+
+    @patch("ops.model.Container.push")
+    def test_given_gateway_rate_limits_config_set_when_config_changed_then_nginx_config_file_with_limits_is_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+
+        self.harness.update_config(
+            key_values={
+                "domain": "whateverdomain.com",
+                "gateway-request-rate-limit": 10,
+                "gateway-service-request-rate-limits": "state=50",
+                "gateway-request-burst": 5,
+                "gateway-connection-limit": 100,
+                "bootstrap-request-rate-limit": 2,
+            }
+        )
+
+        config_content = patched_push.call_args.kwargs["source"]
+        self.assertIn(
+            "limit_req_zone $gateway_request_key_default "
+            "zone=gateway_requests_default:10m rate=10r/s;",
+            config_content,
+        )
+        self.assertIn(
+            "limit_req_zone $gateway_request_key_state "
+            "zone=gateway_requests_state:10m rate=50r/s;",
+            config_content,
+        )
+        self.assertIn("    state $ssl_client_s_dn_cn;", config_content)
+        self.assertIn("limit_req zone=gateway_requests_state burst=5 nodelay;", config_content)
+        self.assertIn(
+            "limit_conn_zone $ssl_client_s_dn_cn zone=gateway_connections:10m;", config_content
+        )
+        self.assertIn("limit_conn gateway_connections 100;", config_content)
+        self.assertIn(
+            "limit_req_zone $binary_remote_addr zone=bootstrap_requests:10m rate=2r/s;",
+            config_content,
+        )
+        self.assertIn("limit_req zone=bootstrap_requests burst=5 nodelay;", config_content)
+
+    @patch("ops.model.Container.push")
+    def test_given_invalid_gateway_service_request_rate_limits_config_when_config_changed_then_status_is_blocked(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+
+        self.harness.update_config(
+            key_values={
+                "domain": "whateverdomain.com",
+                "gateway-service-request-rate-limits": "state:50",
+            }
+        )
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            BlockedStatus("Rate limit config is not valid"), self.harness.charm.unit.status
+        )
+
+    @patch("ops.model.Container.push")
+    def test_given_buffered_and_sampled_access_log_config_set_when_config_changed_then_nginx_config_file_with_access_log_options_is_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+
+        self.harness.update_config(
+            key_values={
+                "domain": "whateverdomain.com",
+                "access-log-buffer-size": "64k",
+                "access-log-flush-interval": "10s",
+                "access-log-gzip-level": 4,
+                "access-log-success-sample-rate": 10,
+            }
+        )
+
+        config_content = patched_push.call_args.kwargs["source"]
+        self.assertEqual(
+            config_content.count(
+                "access_log /var/log/nginx/access.log json_custom "
+                "buffer=64k gzip=4 flush=10s if=$access_log_enabled;"
+            ),
+            3,
+        )
+        self.assertIn("    10% 1;\n    * 0;", config_content)
+
+    @patch("ops.model.Container.push")
+    def test_given_metrics_endpoint_relation_when_config_changed_then_nginx_config_file_with_syslog_access_log_is_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+        self.harness.add_relation("metrics-endpoint", "prometheus")
+
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+
+        config_content = patched_push.call_args.kwargs["source"]
+        self.assertEqual(
+            config_content.count(
+                "access_log syslog:server=127.0.0.1:5531,tag=nginx,nohostname metrics;"
+            ),
+            3,
+        )
+
+    @patch("ops.model.Container.push")
+    def test_given_invalid_access_log_buffer_size_config_when_config_changed_then_status_is_blocked(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+
+        self.harness.update_config(
+            key_values={"domain": "whateverdomain.com", "access-log-buffer-size": "lots"}
+        )
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            BlockedStatus("Access log config is not valid"), self.harness.charm.unit.status
+        )
+
+    @patch("ops.model.Container.push")
+    def test_given_api_compression_and_cache_config_set_when_config_changed_then_nginx_config_file_with_api_cache_is_pushed(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+
+        self.harness.update_config(
+            key_values={
+                "domain": "whateverdomain.com",
+                "api-gzip-level": 5,
+                "api-cache-ttl": "5s",
+                "api-cache-paths": "^/magma/v1/networks$",
+                "api-cache-max-size": "50m",
+            }
+        )
+
+        config_content = patched_push.call_args.kwargs["source"]
+        self.assertIn("    gzip_comp_level 5;\n", config_content)
+        self.assertIn(
+            "  proxy_cache_path /var/cache/nginx/api levels=1:2 keys_zone=api_cache:10m "
+            "max_size=50m inactive=10m use_temp_path=off;\n",
+            config_content,
+        )
+        self.assertIn('    "~^/magma/v1/networks$" 1;\n', config_content)
+        self.assertIn("      proxy_cache_valid 200 5s;\n", config_content)
+        self.assertIn(
+            '      proxy_cache_key "$ssl_client_s_dn_cn|$request_method|$host$request_uri";\n',
+            config_content,
+        )
+        self.assertTrue(self.harness.charm._container.exists("/var/cache/nginx/api"))
+
+    @patch("ops.model.Container.push")
+    def test_given_invalid_api_cache_paths_config_when_config_changed_then_status_is_blocked(
+        self, patched_push
+    ):
+        self.harness.set_can_connect(container=self._container, val=True)
+
+        self.harness.update_config(
+            key_values={
+                "domain": "whateverdomain.com",
+                "api-cache-ttl": "5s",
+                "api-cache-paths": '^/magma/v1/"networks',
+            }
+        )
+
+        patched_push.assert_not_called()
+        self.assertEqual(
+            BlockedStatus("API compression or cache config is not valid"),
+            self.harness.charm.unit.status,
+        )
+
+    @patch("ops.model.Container.exists")
+    @patch("ops.model.Container.push")
+    def test_given_nginx_config_file_already_pushed_when_config_changed_with_same_domain_then_nginx_config_file_is_not_pushed_again(  # noqa: E501
+        self, patched_push, patched_exists
+    ):
+        patched_exists.return_value = True
+        self.harness.set_can_connect(container=self._container, val=True)
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+        patched_push.reset_mock()
+
+        self.harness.charm.on.config_changed.emit()
+
+        patched_push.assert_not_called()
+
+    @patch("ops.model.Container.exists")
+    @patch("ops.model.Container.push")
+    def test_given_nginx_config_file_already_pushed_when_domain_config_changed_then_new_nginx_config_file_is_pushed(  # noqa: E501
+        self, patched_push, patched_exists
+    ):
+        patched_exists.return_value = True
+        self.harness.set_can_connect(container=self._container, val=True)
+        self.harness.update_config(key_values={"domain": "whateverdomain.com"})
+        patched_push.reset_mock()
+
+        self.harness.update_config(key_values={"domain": "otherdomain.com"})
+
+        config_content = patched_push.call_args.kwargs["source"]
+        self.assertIn("controller.otherdomain.com", config_content)
+
+    @patch("ops.model.Container.restart")
+    @patch("ops.model.Container.exists")
+    @patch("ops.model.Container.exec")
+    @patch("ops.model.Container.push", new=Mock)
+    def test_given_nginx_service_running_when_domain_config_changed_then_nginx_is_reloaded_without_restart(  # noqa: E501
+        self, patched_exec, patched_exists, patched_restart
+    ):
+        patched_exec.return_value = MockExec()
+        patched_exists.return_value = True
+        self.harness.update_config(key_values={"domain": "whatever.com"})
+        self._create_all_relations()
+        self.harness.container_pebble_ready(container_name="magma-orc8r-nginx")
+        self._container.start("magma-orc8r-nginx")
+        patched_restart.reset_mock()
+        patched_exec.reset_mock()
+
+        self.harness.update_config(key_values={"domain": "otherdomain.com"})
+
+        patched_restart.assert_not_called()
+        patched_exec.assert_called_once_with(["nginx", "-s", "reload"], timeout=30)
+
     @patch("ops.model.Container.exists")
     @patch("ops.model.Container.exec")
     @patch("ops.model.Container.push")
@@ -538,6 +981,120 @@ class TestCharm(unittest.TestCase):
 
         patched_restart.assert_called_once()
 
+    def test_given_nginx_prometheus_exporter_container_ready_when_pebble_ready_then_pebble_plan_is_filled_with_exporter_service_content(  # noqa: E501
+        self,
+    ):
+        expected_plan = {
+            "services": {
+                "nginx-prometheus-exporter": {
+                    "override": "replace",
+                    "startup": "enabled",
+                    "command": "/usr/bin/nginx-prometheus-exporter "
+                    "-nginx.scrape-uri=http://127.0.0.1:8080/stub_status "
+                    "-web.listen-address=:9113",
+                }
+            },
+        }
+
+        self.harness.container_pebble_ready(container_name="nginx-prometheus-exporter")
+
+        updated_plan = self.harness.get_container_pebble_plan(
+            "nginx-prometheus-exporter"
+        ).to_dict()
+        self.assertEqual(expected_plan, updated_plan)
+
+    @patch("ops.model.Container.push")
+    def test_given_prometheus_nginxlog_exporter_container_ready_when_pebble_ready_then_exporter_config_is_pushed_and_pebble_plan_is_filled_with_exporter_service_content(  # noqa: E501
+        self, patched_push
+    ):
+        expected_plan = {
+            "services": {
+                "prometheus-nginxlog-exporter": {
+                    "override": "replace",
+                    "startup": "enabled",
+                    "command": "/prometheus-nginxlog-exporter "
+                    "-config-file /etc/prometheus-nginxlog-exporter/config.yml",
+                }
+            },
+        }
+
+        self.harness.container_pebble_ready(container_name="prometheus-nginxlog-exporter")
+
+        updated_plan = self.harness.get_container_pebble_plan(
+            "prometheus-nginxlog-exporter"
+        ).to_dict()
+        self.assertEqual(expected_plan, updated_plan)
+        exporter_config = patched_push.call_args.kwargs["source"]
+        self.assertIn("listen_address: udp://127.0.0.1:5531", exporter_config)
+        self.assertIn("from: srv", exporter_config)
+
+    @patch("socket.getfqdn", new=Mock(return_value="orc8r-nginx-0.whatever"))
+    def test_given_unit_is_leader_when_metrics_endpoint_relation_joined_then_scrape_jobs_are_published_in_the_relation_data_bag(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(True)
+        relation_id = self.harness.add_relation("metrics-endpoint", "prometheus")
+
+        self.harness.add_relation_unit(relation_id, "prometheus/0")
+
+        app_data = self.harness.get_relation_data(relation_id, self.harness.charm.app.name)
+        unit_data = self.harness.get_relation_data(relation_id, self.harness.charm.unit.name)
+        self.assertEqual(
+            json.loads(app_data["scrape_jobs"]),
+            [
+                {
+                    "job_name": "nginx",
+                    "metrics_path": "/metrics",
+                    "static_configs": [{"targets": ["*:9113", "*:4040"]}],
+                }
+            ],
+        )
+        self.assertEqual(json.loads(app_data["scrape_metadata"])["model"], self.namespace)
+        self.assertEqual(
+            unit_data,
+            {
+                "prometheus_scrape_unit_address": "orc8r-nginx-0.whatever",
+                "prometheus_scrape_unit_name": self.harness.charm.unit.name,
+            },
+        )
+
+    @patch("socket.getfqdn", new=Mock(return_value="orc8r-nginx-0.whatever"))
+    def test_given_metrics_endpoint_relation_joined_when_unit_is_elected_leader_then_scrape_jobs_are_published_in_the_relation_data_bag(  # noqa: E501
+        self,
+    ):
+        relation_id = self.harness.add_relation("metrics-endpoint", "prometheus")
+        self.harness.add_relation_unit(relation_id, "prometheus/0")
+        self.assertNotIn(
+            "scrape_jobs",
+            self.harness.get_relation_data(relation_id, self.harness.charm.app.name),
+        )
+
+        self.harness.set_leader(True)
+
+        app_data = self.harness.get_relation_data(relation_id, self.harness.charm.app.name)
+        self.assertEqual(json.loads(app_data["scrape_jobs"])[0]["job_name"], "nginx")
+
+    def _create_peer_relation_with_lower_unit(self, unit_data: dict) -> int:
+        """Runs nginx on the leader and adds a lower-numbered peer unit with the given data.
+
+        Args:
+            unit_data (dict): Peer unit relation data
+
+        Returns:
+            int: Peer relation ID
+        """
+        self.harness.set_leader(True)
+        self.harness.set_can_connect(container=self._container, val=True)
+        self._container.add_layer(
+            "magma-orc8r-nginx",
+            {"services": {"magma-orc8r-nginx": {"override": "replace", "command": "nginx"}}},
+        )
+        peer_relation_id = self.harness.add_relation("replicas", self.harness.charm.app.name)
+        lower_unit = f"{self.harness.charm.app.name}/1"
+        self.harness.add_relation_unit(peer_relation_id, lower_unit)
+        self.harness.update_relation_data(peer_relation_id, lower_unit, unit_data)
+        return peer_relation_id
+
     def _create_active_relation(self, relation_name: str, remote_app: str):
         """Creates a relation between orc8r-nginx and a remote app.
 
@@ -26,6 +26,9 @@ class TestOrchestratorRelation(unittest.TestCase):
         lambda charm, ports, service_type, service_name, additional_labels, additional_selectors: None,  # noqa: E501
     )
     def setUp(self):
+        patch("lightkube.core.client.GenericSyncClient", new=Mock).start()
+        self.patched_apply = patch("lightkube.core.client.Client.apply").start()
+        self.addCleanup(patch.stopall)
         self.model_name = "whatever"
         self.harness = testing.Harness(MagmaOrc8rNginxCharm)
         self.harness.set_model_name(name=self.model_name)
@@ -4,10 +4,13 @@
 
 """Provides data for configuration of core gateway service configuration, metrics and CRUD API."""
 
-
+import functools
 import logging
+import pathlib
 import re
-from typing import Dict, Union
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
 
 from charms.magma_orc8r_certifier.v0.cert_admin_operator import (
     CertAdminOperatorRequires,
@@ -17,7 +20,7 @@ from charms.observability_libs.v1.kubernetes_service_patch import (
     KubernetesServicePatch,
     ServicePort,
 )
-from lightkube import Client
+from lightkube import ApiError, Client, operators
 from lightkube.resources.core_v1 import Service
 from ops.charm import (
     ActionEvent,
@@ -40,6 +43,9 @@ from ops.model import (
 )
 from ops.pebble import APIError, ConnectionError, ExecError, Layer
 
+import pprof
+from workload_config import WorkloadConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,12 +54,18 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
 
     BASE_CONFIG_PATH = "/var/opt/magma/configs/orc8r"
     BASE_CERTS_PATH = "/var/opt/magma/certs"
-
-    # TODO: The various URL's should be provided through relationships
-    PROMETHEUS_URL = "http://orc8r-prometheus:9090"
-    PROMETHEUS_CACHE_GRPC_URL = "orc8r-prometheus-cache:9092"
-    PROMETHEUS_CACHE_METRICS_URL = "http://orc8r-prometheus-cache:9091"
-    ALERTMANAGER_URL = "http://orc8r-alertmanager:9093"
+    ELASTICSEARCH_URL_REGEX = "^[a-zA-Z0-9._-]+:[0-9]+$"
+
+    PROMETHEUS_PORT = 9090
+    # Used when no Prometheus is related yet
+    PROMETHEUS_URL = f"http://orc8r-prometheus:{PROMETHEUS_PORT}"
+    # Used when no prometheus cache is related yet
+    PROMETHEUS_CACHE_SERVICE_NAME = "orc8r-prometheus-cache"
+    PROMETHEUS_CACHE_GRPC_PORT = 9092
+    PROMETHEUS_CACHE_METRICS_PORT = 9091
+    ALERTMANAGER_PORT = 9093
+    # Used when no Alertmanager is related yet
+    ALERTMANAGER_URL = f"http://orc8r-alertmanager:{ALERTMANAGER_PORT}"
 
     REQUIRED_EXTERNAL_RELATIONS = ["metrics-endpoint", "cert-admin-operator"]
     REQUIRED_ORC8R_RELATIONS = [
@@ -61,6 +73,47 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
         "magma-orc8r-service-registry",
         "magma-orc8r-certifier",
     ]
+    # Orc8r services exposing the service303 interface
+    ORC8R_SERVICES = [
+        "accessd",
+        "analytics",
+        "bootstrapper",
+        "certifier",
+        "configurator",
+        "ctraced",
+        "device",
+        "directoryd",
+        "dispatcher",
+        "eventd",
+        "ha",
+        "lte",
+        "metricsd",
+        "obsidian",
+        "orchestrator",
+        "policydb",
+        "service_registry",
+        "smsd",
+        "state",
+        "streamer",
+        "subscriberdb",
+        "subscriberdb_cache",
+        "tenants",
+    ]
+    SERVICE303_CLI_PATH = "/var/opt/magma/bin/service303_cli"
+    LOG_VERBOSITY_MAX_PARALLEL_CALLS = 8
+    LOG_VERBOSITY_REVERT_SERVICE_NAME = "log-verbosity-revert"
+    PROFILES_DIR = "/var/tmp/orc8r-profiles"
+    # Load balancer services exposed by orc8r-nginx and nms-nginx-proxy
+    LOAD_BALANCER_SERVICES = [
+        "orc8r-bootstrap-nginx",
+        "orc8r-clientcert-nginx",
+        "orc8r-nginx-proxy",
+        "nginx-proxy",
+    ]
+    LOAD_BALANCER_SERVICES_LABELS = {
+        "app.kubernetes.io/part-of": operators.in_(["orc8r", "magma"])
+    }
+    LOAD_BALANCER_POLL_INTERVAL = 5
     RELATIONS_TO_HANDLE_WHEN_BROKEN = [
         "magma-orc8r-accessd",
         "metrics-endpoint",
@@ -73,6 +126,7 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
         self._container_name = self._service_name = "magma-orc8r-orchestrator"
         self._container = self.unit.get_container(self._container_name)
         self.cert_admin_operator = CertAdminOperatorRequires(self, "cert-admin-operator")
+        self._workload_config = WorkloadConfig(charm=self, container=self._container)
         self._service_patcher = KubernetesServicePatch(
             charm=self,
             ports=[
@@ -109,11 +163,23 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
             self._on_magma_orc8r_orchestrator_relation_joined,
         )
         self.framework.observe(self.on.set_log_verbosity_action, self._set_log_verbosity_action)
+        self.framework.observe(self.on.collect_profile_action, self._on_collect_profile_action)
+        self.framework.observe(self.on.diff_config_action, self._on_diff_config_action)
         self.framework.observe(
             self.on.get_load_balancer_services_action,
             self._on_get_load_balancer_services_action,
         )
         self.framework.observe(self.on.install, self._on_install)
+        for metrics_event in [
+            self.on.metrics_endpoint_relation_changed,
+            self.on.metrics_endpoint_relation_departed,
+            self.on.prometheus_k8s_relation_joined,
+            self.on.prometheus_k8s_relation_broken,
+            self.on.alertmanager_k8s_relation_joined,
+            self.on.alertmanager_k8s_relation_broken,
+        ]:
+            self.framework.observe(metrics_event, self._on_metrics_config_changed)
+        self.framework.observe(self.on.config_changed, self._on_metrics_config_changed)
         self.framework.observe(self.on.config_changed, self._on_elasticsearch_url_config_changed)
         self.framework.observe(
             self.cert_admin_operator.on.certificate_available, self._on_certificate_available
@@ -161,21 +227,6 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
             }
         )
 
-    @property
-    def _elasticsearch_config_is_valid(self) -> bool:
-        """Returns whether elasticsearch config is valid.
-
-        Returns:
-            bool: True/False
-        """
-        elasticsearch_url = self.model.config.get("elasticsearch-url")
-        if not elasticsearch_url:
-            return False
-        if re.match("^[a-zA-Z0-9._-]+:[0-9]+$", elasticsearch_url):
-            return True
-        else:
-            return False
-
     @property
     def _service_is_running(self) -> bool:
         """Returns whether workload service is running.
@@ -297,21 +348,60 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
         Args:
             event (ActionEvent): Juju event
 
+        When the `wait` parameter is set, the action keeps polling until all the expected load
+        balancer services have an address, or until `timeout` seconds have passed.
+
         Returns:
             None
         """
         load_balancer_services = self._get_load_balancer_services()
+        if event.params.get("wait", False):
+            deadline = time.monotonic() + event.params.get("timeout", 600)
+            while missing := self._missing_load_balancer_services(load_balancer_services):
+                if time.monotonic() >= deadline:
+                    event.set_results(load_balancer_services)  # type: ignore[arg-type]
+                    event.fail(
+                        f"Timed out waiting for load balancer addresses: {', '.join(missing)}"
+                    )
+                    return
+                event.log(f"Waiting for load balancer addresses: {', '.join(missing)}")
+                time.sleep(self.LOAD_BALANCER_POLL_INTERVAL)
+                load_balancer_services = self._get_load_balancer_services()
         event.set_results(load_balancer_services)  # type: ignore[arg-type]
 
+    def _missing_load_balancer_services(self, load_balancer_services: Dict[str, str]) -> List[str]:
+        """Returns the expected load balancer services which don't have an address yet.
+
+        Args:
+            load_balancer_services (dict): Load balancer service addresses
+
+        Returns:
+            list: Names of the services without address
+        """
+        return [
+            service_name
+            for service_name in self.LOAD_BALANCER_SERVICES
+            if service_name not in load_balancer_services
+        ]
+
+    @functools.cached_property
+    def _client(self) -> Client:
+        """Returns the Kubernetes client shared by all the API calls of the current hook."""
+        return Client()
+
     def _get_load_balancer_services(self) -> Dict[str, str]:
         """Returns all Load balancer service addresses.
 
+        Only the services labelled as part of orc8r or magma are listed, so that other services
+        living in the same namespace don't need to be fetched.
+
         Returns:
             dict: All load balancer service addresses.
         """
         service_dict = dict()
-        client = Client()
-        service_list = client.list(res=Service, namespace=self._namespace)
+        service_list = self._client.list(
+            res=Service, namespace=self._namespace, labels=self.LOAD_BALANCER_SERVICES_LABELS
+        )
         for service in service_list:
             service_name = service.metadata.name
             ingresses = service.status.loadBalancer.ingress
@@ -330,77 +420,167 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
             return
         self._write_config_files()
 
-    def _write_config_files(self) -> None:
+    def _write_config_files(self) -> List[str]:
         """Pushes config files for orchestrator, metricsd and analytics to workload.
 
         Returns:
-            None
+            list: Paths of the config files which changed
         """
-        self._write_orchestrator_config()
-        self._write_metricsd_config()
-        self._write_analytics_config()
+        return self._workload_config.push(self._config_files)
 
-    def _write_orchestrator_config(self) -> None:
-        """Pushes orchestrator.yml config file to workload.
+    @property
+    def _config_files(self) -> Dict[str, dict]:
+        """Returns orchestrator, metricsd and analytics config files content.
 
         Returns:
-            None
+            dict: Config files content, keyed by workload path
         """
-        orchestrator_config = (
-            f'"prometheusGRPCPushAddress": "{self.PROMETHEUS_CACHE_GRPC_URL}"\n'
-            '"prometheusPushAddresses":\n'
-            f'- "{self.PROMETHEUS_CACHE_METRICS_URL}/metrics"\n'
-            '"useGRPCExporter": true\n'
-        )
-        self._container.push(f"{self.BASE_CONFIG_PATH}/orchestrator.yml", orchestrator_config)
+        return {
+            f"{self.BASE_CONFIG_PATH}/orchestrator.yml": self._orchestrator_config,
+            f"{self.BASE_CONFIG_PATH}/metricsd.yml": self._metricsd_config,
+            f"{self.BASE_CONFIG_PATH}/analytics.yml": {
+                "appID": "",
+                "appSecret": "",
+                "categoryName": "magma",
+                "exportMetrics": False,
+                "metricExportURL": "",
+                "metricsPrefix": "",
+            },
+        }
 
-    def _write_metricsd_config(self) -> None:
-        """Pushes metricsd.yml to workload.
+    @property
+    def _orchestrator_config(self) -> dict:
+        """Returns orchestrator.yml config file content.
+
+        Metrics are pushed to every prometheus cache unit related through the metrics-endpoint
+        relation, unless the gRPC exporter is enabled by the `use-grpc-exporter` config. The gRPC
+        exporter only supports one push address, so it only pushes to the first unit.
 
         Returns:
-            None
+            dict: orchestrator.yml content
         """
-        metricsd_config = (
-            f'prometheusQueryAddress: "{self.PROMETHEUS_URL}"\n'
-            f'alertmanagerApiURL: "{self.ALERTMANAGER_URL}/api/v2"\n'
-            '"profile": "prometheus"\n'
-        )
-        self._container.push(f"{self.BASE_CONFIG_PATH}/metricsd.yml", metricsd_config)
+        prometheus_cache_hosts = self._prometheus_cache_hosts
+        return {
+            "prometheusGRPCPushAddress": (
+                f"{prometheus_cache_hosts[0]}:{self.PROMETHEUS_CACHE_GRPC_PORT}"
+            ),
+            "prometheusPushAddresses": [
+                f"http://{host}:{self.PROMETHEUS_CACHE_METRICS_PORT}/metrics"
+                for host in prometheus_cache_hosts
+            ],
+            "useGRPCExporter": bool(self.model.config.get("use-grpc-exporter")),
+        }
 
-    def _write_analytics_config(self) -> None:
-        """Pushes analytics.yml to workload.
+    @property
+    def _metricsd_config(self) -> dict:
+        """Returns metricsd.yml config file content.
 
         Returns:
-            None
+            dict: metricsd.yml content
         """
-        analytics_config = (
-            '"appID": ""\n'
-            '"appSecret": ""\n'
-            '"categoryName": "magma"\n'
-            '"exportMetrics": false\n'
-            '"metricExportURL": ""\n'
-            '"metricsPrefix": ""\n'
-        )
-        self._container.push(f"{self.BASE_CONFIG_PATH}/analytics.yml", analytics_config)
+        return {
+            "prometheusQueryAddress": self._prometheus_url,
+            "alertmanagerApiURL": f"{self._alertmanager_url}/api/v2",
+            "profile": "prometheus",
+        }
 
-    def _write_elastic_config(self) -> None:
-        """Pushes elasticsearch config to workload.
+    @property
+    def _prometheus_url(self) -> str:
+        """Returns the URL of the Prometheus server related through prometheus-k8s.
 
         Returns:
-            None
+            str: Prometheus URL, `PROMETHEUS_URL` if no Prometheus is related
         """
-        logging.info("Writing elasticsearch config to elastic.yml")
-        elasticsearch_url, elasticsearch_port = self._get_elasticsearch_config()
-        elastic_config = (
-            f'"elasticHost": "{elasticsearch_url}"\n' f'"elasticPort": {elasticsearch_port}\n'
-        )
-        self._container.push(f"{self.BASE_CONFIG_PATH}/elastic.yml", elastic_config)
+        if not (prometheus_relation := self.model.get_relation("prometheus-k8s")):
+            return self.PROMETHEUS_URL
+        return f"http://{prometheus_relation.app.name}:{self.PROMETHEUS_PORT}"
+
+    @property
+    def _alertmanager_url(self) -> str:
+        """Returns the URL of the Alertmanager related through alertmanager-k8s.
+
+        Returns:
+            str: Alertmanager URL, `ALERTMANAGER_URL` if no Alertmanager is related
+        """
+        if not (alertmanager_relation := self.model.get_relation("alertmanager-k8s")):
+            return self.ALERTMANAGER_URL
+        return f"http://{alertmanager_relation.app.name}:{self.ALERTMANAGER_PORT}"
+
+    @property
+    def _prometheus_cache_hosts(self) -> List[str]:
+        """Returns the hosts of the prometheus cache units related through metrics-endpoint.
+
+        Each prometheus cache unit is a separate push target. Units are addressed using the
+        address they publish in the relation data bag, or their pod DNS name otherwise.
+
+        Returns:
+            list: Prometheus cache hosts
+        """
+        hosts = []
+        for relation in self.model.relations["metrics-endpoint"]:
+            if not relation.units:
+                hosts.append(relation.app.name)  # type: ignore[union-attr]
+            for unit in relation.units:
+                pod_dns_name = (
+                    f"{unit.name.replace('/', '-')}.{unit.app.name}-endpoints."
+                    f"{self._namespace}.svc.cluster.local"
+                )
+                hosts.append(
+                    relation.data[unit].get("prometheus_scrape_unit_address", pod_dns_name)
+                )
+        return sorted(set(hosts)) or [self.PROMETHEUS_CACHE_SERVICE_NAME]
+
+    def _on_metrics_config_changed(self, event: Union[ConfigChangedEvent, RelationEvent]) -> None:
+        """Rewrites the config files and restarts the workload when metrics services change.
+
+        Prometheus caches, Prometheus and Alertmanager are all derived from relations, and the
+        exporter used to push metrics from the `use-grpc-exporter` config.
+
+        Args:
+            event (ConfigChangedEvent, RelationEvent): Juju event
+        """
+        if not self._container.can_connect():
+            event.defer()
+            return
+        if not self._write_config_files():
+            return
+        if self._service_is_running:
+            logger.info("Metrics services changed - Restarting %s", self._service_name)
+            self._container.restart(self._service_name)
+
+    def _elastic_config_file(self, elasticsearch_url: str) -> Dict[str, dict]:
+        """Returns elastic.yml config file content.
+
+        Args:
+            elasticsearch_url (str): Elasticsearch URL (<hostname>:<port>)
+
+        Returns:
+            dict: Config file content, keyed by workload path
+        """
+        elasticsearch_host, elasticsearch_port = elasticsearch_url.split(":")
+        return {
+            f"{self.BASE_CONFIG_PATH}/elastic.yml": {
+                "elasticHost": elasticsearch_host,
+                "elasticPort": int(elasticsearch_port),
+            }
+        }
+
+    def _elasticsearch_url_is_valid(self, elasticsearch_url: str) -> bool:
+        """Returns whether an Elasticsearch URL is valid.
+
+        Args:
+            elasticsearch_url (str): Elasticsearch URL (<hostname>:<port>)
+
+        Returns:
+            bool: True/False
+        """
+        return bool(re.match(self.ELASTICSEARCH_URL_REGEX, elasticsearch_url))
 
     def _on_elasticsearch_url_config_changed(self, event: ConfigChangedEvent) -> None:
         """Triggered when there is a Juju configuration changed.
 
         Will try to push the new elasticsearch config to the workload and restart the workload
-        service.
+        service if the config file changed.
 
         Args:
             event (ConfigChangedEvent): Juju event
@@ -412,18 +592,41 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
         if not self._container.can_connect():
             event.defer()
             return
-        if self._elasticsearch_config_is_valid:
-            self._write_elastic_config()
+        elasticsearch_url = str(self.model.config.get("elasticsearch-url") or "")
+        if not self._elasticsearch_url_is_valid(elasticsearch_url):
+            self.unit.status = BlockedStatus(
+                "Config for elasticsearch is not valid. Format should be <hostname>:<port>"
+            )
+            return
+        if self._workload_config.push(self._elastic_config_file(elasticsearch_url)):
             try:
                 logger.info("Restarting service")
                 self._container.restart(self._service_name)
                 self.unit.status = ActiveStatus()
             except APIError:
                 logger.info("Service is not yet started, doing nothing")
-        else:
-            self.unit.status = BlockedStatus(
-                "Config for elasticsearch is not valid. Format should be <hostname>:<port>"
-            )
+        elif self._service_is_running:
+            self.unit.status = ActiveStatus()
+
+    def _on_diff_config_action(self, event: ActionEvent) -> None:
+        """Triggered when the diff-config action is executed.
+
+        Returns the changes that would be made to the workload config files, without applying
+        them. The `elasticsearch-url` parameter previews a change of the matching config option.
+
+        Args:
+            event (ActionEvent): Juju event
+        """
+        if not self._container.can_connect():
+            event.fail("Container is not ready")
+            return
+        config_files = self._config_files
+        elasticsearch_url = str(
+            event.params.get("elasticsearch-url") or self.model.config.get("elasticsearch-url", "")
+        )
+        if self._elasticsearch_url_is_valid(elasticsearch_url):
+            config_files.update(self._elastic_config_file(elasticsearch_url))
+        event.set_results(self._workload_config.diff_results(config_files))
 
     def _create_orchestrator_admin_user(self):
         process = self._container.exec(
@@ -450,30 +653,250 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
     def _set_log_verbosity_action(self, event: ActionEvent) -> None:
         """Triggered when the set-log-verbosity action is executed.
 
+        Log verbosity is set concurrently for all the requested services. When `revert-after` is
+        set, verbosity is set back to 0 after the given number of minutes.
+
         Args:
             event (ActionEvent): Juju event
 
         Returns:
             None
         """
-        process = self._container.exec(
-            [
-                "/var/opt/magma/bin/service303_cli",
-                "log_verbosity",
-                str(event.params["level"]),
-                event.params["service"],
-            ],
-            timeout=30,
-            environment=self._environment_variables,
-            working_dir="/",
+        services = self._log_verbosity_services(event.params["service"])
+        if not services:
+            event.fail(f"Invalid service(s): {event.params['service']}")
+            return
+        level = event.params["level"]
+        with ThreadPoolExecutor(
+            max_workers=min(self.LOG_VERBOSITY_MAX_PARALLEL_CALLS, len(services))
+        ) as executor:
+            results = dict(
+                zip(
+                    services,
+                    executor.map(
+                        lambda service: self._set_log_verbosity(service, level), services
+                    ),
+                )
+            )
+        event.set_results(
+            {service.replace("_", "-"): result for service, result in results.items()}
         )
+        if revert_after := event.params.get("revert-after", 0):
+            self._schedule_log_verbosity_revert(services, revert_after)
+        if failed_services := [
+            service for service, result in results.items() if result["status"] != "ok"
+        ]:
+            event.fail(f"Failed to set log verbosity for: {', '.join(failed_services)}")
+
+    def _log_verbosity_services(self, service_param: str) -> List[str]:
+        """Returns the services targeted by the set-log-verbosity action.
+
+        Args:
+            service_param (str): Comma-separated service names or `all`
+
+        Returns:
+            list: Service names, empty if any of them is not valid
+        """
+        if service_param.strip() == "all":
+            return list(self.ORC8R_SERVICES)
+        services = list(
+            dict.fromkeys(
+                service.strip() for service in service_param.split(",") if service.strip()
+            )
+        )
+        if not all(re.match("^[a-z0-9_]+$", service) for service in services):
+            return []
+        return services
+
+    def _set_log_verbosity(self, service: str, level: int) -> Dict[str, str]:
+        """Sets log verbosity for a given service using service303_cli.
+
+        Args:
+            service (str): Service name (ex. obsidian)
+            level (int): Verbosity level
+
+        Returns:
+            dict: Status, duration and output of the call
+        """
+        start_time = time.monotonic()
         try:
+            process = self._container.exec(
+                [self.SERVICE303_CLI_PATH, "log_verbosity", str(level), service],
+                timeout=30,
+                environment=self._environment_variables,
+                working_dir="/",
+            )
             stdout, error = process.wait_output()
-            logger.info(f"Return message: {stdout}, {error}")
+            logger.info(f"Return message for {service}: {stdout}, {error}")
+            result = {"status": "ok", "output": stdout.strip()}
         except ExecError as e:
-            logger.error("Exited with code %d. Stderr:", e.exit_code)
+            logger.error("Exited with code %d for %s. Stderr:", e.exit_code, service)
             for line in e.stderr.splitlines():  # type: ignore[union-attr]
                 logger.error("    %s", line)
+            result = {"status": "failed", "output": str(e.stderr).strip()}
+        except APIError as e:
+            logger.error("Failed to set log verbosity for %s: %s", service, e.message)
+            result = {"status": "failed", "output": e.message}
+        result["duration"] = f"{time.monotonic() - start_time:.3f}s"
+        return result
+
+    def _schedule_log_verbosity_revert(self, services: List[str], minutes: int) -> None:
+        """Starts a workload service setting log verbosity back to 0 after a delay.
+
+        A revert scheduled by a previous action is replaced.
+
+        Args:
+            services (list): Service names
+            minutes (int): Delay before reverting, in minutes
+        """
+        revert_commands = "; ".join(
+            f"{self.SERVICE303_CLI_PATH} log_verbosity 0 {service}" for service in services
+        )
+        layer = Layer(
+            {
+                "summary": "Log verbosity revert",
+                "services": {
+                    self.LOG_VERBOSITY_REVERT_SERVICE_NAME: {
+                        "override": "replace",
+                        "startup": "disabled",
+                        "command": f"/bin/sh -c 'sleep {minutes * 60}; {revert_commands}'",
+                        "environment": self._environment_variables,
+                        "on-success": "ignore",
+                        "on-failure": "ignore",
+                    }
+                },
+            }
+        )
+        self._container.add_layer(self.LOG_VERBOSITY_REVERT_SERVICE_NAME, layer, combine=True)
+        self._container.restart(self.LOG_VERBOSITY_REVERT_SERVICE_NAME)
+        logger.info(f"Log verbosity will be reverted in {minutes} minute(s)")
+
+    def _on_collect_profile_action(self, event: ActionEvent) -> None:
+        """Triggered when the collect-profile action is executed.
+
+        Fetches a Go pprof profile from the net/http/pprof handlers of an orc8r service, stores it
+        in the unit and returns the functions with the highest flat value.
+
+        Args:
+            event (ActionEvent): Juju event
+
+        Returns:
+            None
+        """
+        service = event.params.get("service", "orchestrator")
+        profile_type = event.params.get("profile-type", "cpu")
+        if service not in self.ORC8R_SERVICES:
+            event.fail(f"Invalid service: {service}")
+            return
+        if not self._container.can_connect():
+            event.fail("Container is not ready")
+            return
+        try:
+            endpoint = self._profile_endpoint(service, event.params.get("port"))
+        except (ApiError, ValueError) as e:
+            event.fail(f"Failed to resolve {service} pprof endpoint: {e}")
+            return
+        event.log(f"Collecting {profile_type} profile for {service} from {endpoint}")
+        try:
+            profile = self._fetch_profile(
+                endpoint=endpoint,
+                profile_type=profile_type,
+                duration=event.params.get("duration", 30),
+            )
+        except ExecError as e:
+            error = e.stderr.decode() if isinstance(e.stderr, bytes) else str(e.stderr)
+            event.fail(f"Failed to collect {profile_type} profile for {service}: {error.strip()}")
+            return
+        except APIError as e:
+            event.fail(f"Failed to collect {profile_type} profile for {service}: {e.message}")
+            return
+        profile_path = self._store_profile(service, profile_type, profile)
+        try:
+            top_functions = pprof.top_functions(profile)
+        except ValueError as e:
+            logger.warning(f"Could not summarize {profile_path}: {e}")
+            top_functions = []
+        event.set_results(
+            {
+                "path": str(profile_path),
+                "size": len(profile),
+                "top-functions": "\n".join(top_functions),
+            }
+        )
+
+    def _profile_endpoint(self, service: str, port: Optional[int]) -> str:
+        """Returns the host and port serving the net/http/pprof handlers of an orc8r service.
+
+        The host is the Kubernetes Service of the orc8r service. Unless a port is given, the port
+        is the `http` port of that Kubernetes Service.
+
+        Args:
+            service (str): Service name (ex. subscriberdb)
+            port (int): Port of the Kubernetes Service, None to use its `http` port
+
+        Returns:
+            str: Host and port (ex. orc8r-subscriberdb.<namespace>.svc.cluster.local:8080)
+
+        Raises:
+            ValueError: if no port is given and the Kubernetes Service has no `http` port
+        """
+        k8s_service_name = f"orc8r-{service.replace('_', '-')}"
+        if not port:
+            k8s_service = self._client.get(
+                Service, name=k8s_service_name, namespace=self._namespace
+            )
+            ports = {
+                service_port.name: service_port.port
+                for service_port in k8s_service.spec.ports  # type: ignore[union-attr]
+            }
+            if "http" not in ports:
+                raise ValueError(f"{k8s_service_name} has no http port")
+            port = ports["http"]
+        return f"{k8s_service_name}.{self._namespace}.svc.cluster.local:{port}"
+
+    def _fetch_profile(self, endpoint: str, profile_type: str, duration: int) -> bytes:
+        """Fetches a pprof profile with curl from inside the workload container.
+
+        Args:
+            endpoint (str): Host and port serving the net/http/pprof handlers
+            profile_type (str): pprof profile type (ex. cpu, heap)
+            duration (int): CPU profile duration, in seconds
+
+        Returns:
+            bytes: pprof profile
+        """
+        profile_path = f"profile?seconds={duration}" if profile_type == "cpu" else profile_type
+        process = self._container.exec(
+            [
+                "curl",
+                "--fail",
+                "--silent",
+                "--show-error",
+                f"http://{endpoint}/debug/pprof/{profile_path}",
+            ],
+            encoding=None,
+            timeout=duration + 30,
+        )
+        profile, _ = process.wait_output()
+        return profile
+
+    def _store_profile(self, service: str, profile_type: str, profile: bytes) -> pathlib.Path:
+        """Stores a pprof profile in the unit.
+
+        Args:
+            service (str): Service name (ex. subscriberdb)
+            profile_type (str): pprof profile type (ex. cpu, heap)
+            profile (bytes): pprof profile
+
+        Returns:
+            pathlib.Path: Path of the stored profile
+        """
+        profiles_dir = pathlib.Path(self.PROFILES_DIR)
+        profiles_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        profile_path = profiles_dir / f"{service}-{profile_type}-{timestamp}.pb.gz"
+        profile_path.write_bytes(profile)
+        return profile_path
 
     def _configure_magma_orc8r_orchestrator(
         self, event: Union[PebbleReadyEvent, CertificateAvailableEvent, RelationJoinedEvent]
@@ -518,7 +941,8 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
         """
         try:
             plan = self._container.get_plan()
-            if plan.services != self._pebble_layer.services:
+            layer_services = self._pebble_layer.services
+            if plan.services.get(self._service_name) != layer_services[self._service_name]:
                 self.unit.status = MaintenanceStatus(
                     f"Configuring pebble layer for {self._service_name}"
                 )
@@ -532,18 +956,6 @@ class MagmaOrc8rOrchestratorCharm(CharmBase):
                 f"not exist or is not responsive"
             )
 
-    def _get_elasticsearch_config(self) -> tuple:
-        """Returns elasticsearch url and port based on juju config.
-
-        Returns:
-            tuple: Elasticsearch url and port.
-        """
-        if elasticsearch_url := self.model.config.get("elasticsearch-url"):
-            elasticsearch_url_split = elasticsearch_url.split(":")
-            return elasticsearch_url_split[0], elasticsearch_url_split[1]
-        else:
-            raise ValueError("The elasticsearch-url config is empty.")
-
     def _on_magma_orc8r_orchestrator_relation_joined(self, event: RelationEvent) -> None:
         """Triggered when charms join the orc8r-orchestrator relation.
 
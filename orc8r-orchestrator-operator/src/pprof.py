@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Contains methods to summarize Go pprof profiles."""
+
+import gzip
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Tuple
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_FIXED64 = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_FIXED32 = 5
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """Reads a protobuf varint.
+
+    Args:
+        data (bytes): Encoded protobuf message
+        position (int): Position of the varint in the message
+
+    Returns:
+        tuple: Decoded value and position of the next byte
+    """
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("Truncated varint")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def _fields(data: bytes) -> Iterator[Tuple[int, int, Any]]:
+    """Iterates over the fields of a protobuf message.
+
+    Args:
+        data (bytes): Encoded protobuf message
+
+    Yields:
+        tuple: Field number, wire type and value (int or bytes)
+    """
+    position = 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        field_number, wire_type = key >> 3, key & 0x7
+        if wire_type == WIRE_TYPE_VARINT:
+            value, position = _read_varint(data, position)
+            yield field_number, wire_type, value
+        elif wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+            length, position = _read_varint(data, position)
+            if position + length > len(data):
+                raise ValueError("Truncated field")
+            end = position + length
+            yield field_number, wire_type, data[position:end]
+            position = end
+        elif wire_type == WIRE_TYPE_FIXED64:
+            position += 8
+        elif wire_type == WIRE_TYPE_FIXED32:
+            position += 4
+        else:
+            raise ValueError(f"Unsupported wire type: {wire_type}")
+
+
+def _repeated_ints(wire_type: int, value: Any) -> List[int]:
+    """Returns the integers of a repeated int field, packed or not.
+
+    Args:
+        wire_type (int): Protobuf wire type of the field
+        value (int or bytes): Field value
+
+    Returns:
+        list: Integers
+    """
+    if wire_type == WIRE_TYPE_VARINT:
+        return [value]
+    integers = []
+    position = 0
+    while position < len(value):
+        integer, position = _read_varint(value, position)
+        integers.append(integer)
+    return integers
+
+
+class _Profile:
+    """Subset of the pprof Profile message needed to compute flat values per function."""
+
+    def __init__(self, data: bytes):
+        self.sample_types: List[Tuple[int, int]] = []
+        self.samples: List[Tuple[List[int], List[int]]] = []
+        self.location_functions: Dict[int, int] = {}
+        self.function_names: Dict[int, int] = {}
+        self.string_table: List[str] = []
+        for field_number, wire_type, value in _fields(data):
+            if field_number == 1:
+                self.sample_types.append(self._value_type(value))
+            elif field_number == 2:
+                self.samples.append(self._sample(value))
+            elif field_number == 4:
+                self._add_location(value)
+            elif field_number == 5:
+                self._add_function(value)
+            elif field_number == 6:
+                self.string_table.append(value.decode(errors="replace"))
+
+    @staticmethod
+    def _value_type(data: bytes) -> Tuple[int, int]:
+        fields = {field_number: value for field_number, _, value in _fields(data)}
+        return fields.get(1, 0), fields.get(2, 0)
+
+    @staticmethod
+    def _sample(data: bytes) -> Tuple[List[int], List[int]]:
+        location_ids: List[int] = []
+        values: List[int] = []
+        for field_number, wire_type, value in _fields(data):
+            if field_number == 1:
+                location_ids.extend(_repeated_ints(wire_type, value))
+            elif field_number == 2:
+                values.extend(_repeated_ints(wire_type, value))
+        return location_ids, values
+
+    def _add_location(self, data: bytes) -> None:
+        location_id = function_id = 0
+        for field_number, _, value in _fields(data):
+            if field_number == 1:
+                location_id = value
+            elif field_number == 4 and not function_id:
+                # The first line is the innermost function when calls were inlined
+                line = {line_field: line_value for line_field, _, line_value in _fields(value)}
+                function_id = line.get(1, 0)
+        self.location_functions[location_id] = function_id
+
+    def _add_function(self, data: bytes) -> None:
+        fields = {field_number: value for field_number, _, value in _fields(data)}
+        self.function_names[fields.get(1, 0)] = fields.get(2, 0)
+
+    def _string(self, index: int) -> str:
+        return self.string_table[index] if index < len(self.string_table) else ""
+
+    def function_name(self, location_id: int) -> str:
+        function_id = self.location_functions.get(location_id, 0)
+        return self._string(self.function_names.get(function_id, 0)) or "<unknown>"
+
+    @property
+    def unit(self) -> str:
+        return self._string(self.sample_types[-1][1]) if self.sample_types else ""
+
+
+def top_functions(profile: bytes, count: int = 10) -> List[str]:
+    """Returns the functions with the highest flat value in a pprof profile.
+
+    The flat value is the last sample value of the profile (ex. CPU time for CPU profiles and
+    in-use bytes for heap profiles) attributed to the innermost function of each sample.
+
+    Args:
+        profile (bytes): pprof profile, gzip compressed or not
+        count (int): Number of functions to return
+
+    Returns:
+        list: Lines formatted as `<percentage> <flat value> <unit> <function>`
+
+    Raises:
+        ValueError: if the profile can't be decoded
+    """
+    if profile.startswith(GZIP_MAGIC):
+        try:
+            profile = gzip.decompress(profile)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Invalid gzip data: {e}")
+    decoded_profile = _Profile(profile)
+    flat_values: Dict[str, int] = defaultdict(int)
+    for location_ids, values in decoded_profile.samples:
+        if location_ids and values:
+            flat_values[decoded_profile.function_name(location_ids[0])] += values[-1]
+    total = sum(flat_values.values())
+    if not total:
+        return []
+    unit = f" {decoded_profile.unit}" if decoded_profile.unit else ""
+    top = sorted(flat_values.items(), key=lambda item: item[1], reverse=True)[:count]
+    return [f"{100 * value / total:.1f}% {value}{unit} {name}" for name, value in top]
@@ -1,6 +1,8 @@
 # Copyright 2021 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import gzip
+import tempfile
 import unittest
 from unittest.mock import Mock, call, patch
 
@@ -8,11 +10,14 @@ from lightkube.models.core_v1 import (
     LoadBalancerIngress,
     LoadBalancerStatus,
     Service,
+    ServicePort,
+    ServiceSpec,
     ServiceStatus,
 )
 from lightkube.models.meta_v1 import ObjectMeta
 from ops import testing
 from ops.model import ActiveStatus, BlockedStatus, WaitingStatus
+from ops.pebble import ExecError
 
 from charm import MagmaOrc8rOrchestratorCharm
 
@@ -28,6 +33,36 @@ class MockExec:
         return "test stdout", "test err"
 
 
+def encode_varint(value: int) -> bytes:
+    encoded = b""
+    while value > 0x7F:
+        encoded += bytes([(value & 0x7F) | 0x80])
+        value >>= 7
+    return encoded + bytes([value])
+
+
+def encode_field(field_number: int, value) -> bytes:
+    if isinstance(value, int):
+        return encode_varint(field_number << 3) + encode_varint(value)
+    return encode_varint(field_number << 3 | 2) + encode_varint(len(value)) + value
+
+
+def cpu_profile() -> bytes:
+    """Returns a gzipped pprof CPU profile with 3 samples in 2 functions."""
+    strings = ["", "cpu", "nanoseconds", "main.handle", "runtime.mallocgc"]
+    profile = encode_field(1, encode_field(1, 1) + encode_field(2, 2))
+    for location_id, value in [(1, 30), (2, 60), (1, 10)]:
+        profile += encode_field(2, encode_field(1, location_id) + encode_field(2, value))
+    for location_id in [1, 2]:
+        line = encode_field(1, location_id) + encode_field(2, 42)
+        profile += encode_field(4, encode_field(1, location_id) + encode_field(4, line))
+    for function_id in [1, 2]:
+        profile += encode_field(5, encode_field(1, function_id) + encode_field(2, function_id + 2))
+    for string in strings:
+        profile += encode_field(6, string.encode())
+    return gzip.compress(profile)
+
+
 class TestCharm(unittest.TestCase):
     @staticmethod
     def k8s_load_balancer_service(ip: str, name: str) -> Service:
@@ -97,12 +132,77 @@ class TestCharm(unittest.TestCase):
 
         patch_push.assert_any_call(
             "/var/opt/magma/configs/orc8r/orchestrator.yml",
-            '"prometheusGRPCPushAddress": "orc8r-prometheus-cache:9092"\n'
-            '"prometheusPushAddresses":\n'
-            '- "http://orc8r-prometheus-cache:9091/metrics"\n'
-            '"useGRPCExporter": true\n',
+            "prometheusGRPCPushAddress: orc8r-prometheus-cache:9092\n"
+            "prometheusPushAddresses:\n"
+            "- http://orc8r-prometheus-cache:9091/metrics\n"
+            "useGRPCExporter: true\n",
+            make_dirs=True,
+        )
+
+    def test_given_prometheus_cache_units_related_when_metrics_endpoint_relation_changed_then_orchestrator_config_lists_each_unit_as_push_address(  # noqa: E501
+        self,
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        container.make_dir("/var/opt/magma/configs/orc8r", make_parents=True)
+        relation_id = self.harness.add_relation("metrics-endpoint", "orc8r-prometheus-cache")
+        self.harness.add_relation_unit(relation_id, "orc8r-prometheus-cache/0")
+        self.harness.add_relation_unit(relation_id, "orc8r-prometheus-cache/1")
+        self.harness.update_relation_data(
+            relation_id,
+            "orc8r-prometheus-cache/1",
+            {"prometheus_scrape_unit_address": "cache-1.example.com"},
+        )
+
+        self.assertEqual(
+            container.pull("/var/opt/magma/configs/orc8r/orchestrator.yml").read(),
+            "prometheusGRPCPushAddress: cache-1.example.com:9092\n"
+            "prometheusPushAddresses:\n"
+            "- http://cache-1.example.com:9091/metrics\n"
+            "- http://orc8r-prometheus-cache-0.orc8r-prometheus-cache-endpoints."
+            f"{self.namespace}.svc.cluster.local:9091/metrics\n"
+            "useGRPCExporter: true\n",
+        )
+
+    def test_given_prometheus_cache_units_related_when_grpc_exporter_disabled_then_orchestrator_config_uses_http_exporter(  # noqa: E501
+        self,
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        container.make_dir("/var/opt/magma/configs/orc8r", make_parents=True)
+        relation_id = self.harness.add_relation("metrics-endpoint", "orc8r-prometheus-cache")
+        self.harness.add_relation_unit(relation_id, "orc8r-prometheus-cache/0")
+
+        self.harness.update_config(key_values={"use-grpc-exporter": False})
+
+        self.assertEqual(
+            container.pull("/var/opt/magma/configs/orc8r/orchestrator.yml").read(),
+            "prometheusGRPCPushAddress: orc8r-prometheus-cache-0.orc8r-prometheus-cache-endpoints."
+            f"{self.namespace}.svc.cluster.local:9092\n"
+            "prometheusPushAddresses:\n"
+            "- http://orc8r-prometheus-cache-0.orc8r-prometheus-cache-endpoints."
+            f"{self.namespace}.svc.cluster.local:9091/metrics\n"
+            "useGRPCExporter: false\n",
+        )
+
+    @patch("ops.model.Container.restart")
+    def test_given_orchestrator_config_unchanged_when_metrics_endpoint_relation_changed_then_workload_is_not_restarted(  # noqa: E501
+        self, patched_restart
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        container.make_dir("/var/opt/magma/configs/orc8r", make_parents=True)
+        relation_id = self.harness.add_relation("metrics-endpoint", "orc8r-prometheus-cache")
+        self.harness.add_relation_unit(relation_id, "orc8r-prometheus-cache/0")
+        self.harness.container_pebble_ready("magma-orc8r-orchestrator")
+        patched_restart.reset_mock()
+
+        self.harness.update_relation_data(
+            relation_id, "orc8r-prometheus-cache/0", {"whatever": "data"}
         )
 
+        patched_restart.assert_not_called()
+
     @patch("ops.model.Container.push")
     def test_given_new_charm_when_on_install_event_then_metricsd_config_file_is_created(
         self,
@@ -113,9 +213,31 @@ class TestCharm(unittest.TestCase):
 
         patch_push.assert_any_call(
             "/var/opt/magma/configs/orc8r/metricsd.yml",
-            'prometheusQueryAddress: "http://orc8r-prometheus:9090"\n'
-            'alertmanagerApiURL: "http://orc8r-alertmanager:9093/api/v2"\n'
-            '"profile": "prometheus"\n',
+            "prometheusQueryAddress: http://orc8r-prometheus:9090\n"
+            "alertmanagerApiURL: http://orc8r-alertmanager:9093/api/v2\n"
+            "profile: prometheus\n",
+            make_dirs=True,
+        )
+
+    def test_given_prometheus_and_alertmanager_related_when_relations_joined_then_metricsd_config_uses_related_applications(  # noqa: E501
+        self,
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        container.make_dir("/var/opt/magma/configs/orc8r", make_parents=True)
+
+        for relation_name, remote_app in [
+            ("prometheus-k8s", "prometheus"),
+            ("alertmanager-k8s", "alertmanager"),
+        ]:
+            relation_id = self.harness.add_relation(relation_name, remote_app)
+            self.harness.add_relation_unit(relation_id, f"{remote_app}/0")
+
+        self.assertEqual(
+            container.pull("/var/opt/magma/configs/orc8r/metricsd.yml").read(),
+            "prometheusQueryAddress: http://prometheus:9090\n"
+            "alertmanagerApiURL: http://alertmanager:9093/api/v2\n"
+            "profile: prometheus\n",
         )
 
     @patch("ops.model.Container.push")
@@ -127,12 +249,13 @@ class TestCharm(unittest.TestCase):
 
         patch_push.assert_any_call(
             "/var/opt/magma/configs/orc8r/analytics.yml",
-            '"appID": ""\n'
-            '"appSecret": ""\n'
-            '"categoryName": "magma"\n'
-            '"exportMetrics": false\n'
-            '"metricExportURL": ""\n'
-            '"metricsPrefix": ""\n',
+            "appID: ''\n"
+            "appSecret: ''\n"
+            "categoryName: magma\n"
+            "exportMetrics: false\n"
+            "metricExportURL: ''\n"
+            "metricsPrefix: ''\n",
+            make_dirs=True,
         )
 
     @patch("ops.model.Container.exists", new=Mock())
@@ -299,10 +422,50 @@ class TestCharm(unittest.TestCase):
 
         patch_push.assert_any_call(
             "/var/opt/magma/configs/orc8r/elastic.yml",
-            f'"elasticHost": "{hostname}"\n' f'"elasticPort": {port}\n',
+            f"elasticHost: {hostname}\nelasticPort: {port}\n",
+            make_dirs=True,
         )
         assert self.harness.charm.unit.status == ActiveStatus()
 
+    @patch("ops.model.Container.restart")
+    def test_given_elasticsearch_config_file_already_pushed_when_config_changed_with_same_elasticsearch_url_then_workload_is_not_restarted(  # noqa: E501
+        self, patched_restart
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        container.make_dir("/var/opt/magma/configs/orc8r", make_parents=True)
+        self.harness.update_config(key_values={"elasticsearch-url": "elasticsearch:9200"})
+        patched_restart.reset_mock()
+
+        self.harness.update_config(key_values={"elasticsearch-url": "elasticsearch:9200"})
+
+        patched_restart.assert_not_called()
+
+    @patch("ops.model.Container.restart", new=Mock())
+    def test_given_elasticsearch_url_param_when_diff_config_action_then_changes_to_elastic_config_file_are_returned(  # noqa: E501
+        self,
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        container.make_dir("/var/opt/magma/configs/orc8r", make_parents=True)
+        self.harness.update_config(key_values={"elasticsearch-url": "elasticsearch:9200"})
+        self.harness.charm.on.install.emit()
+        event = Mock(params={"elasticsearch-url": "new-elasticsearch:9200"})
+
+        self.harness.charm._on_diff_config_action(event)
+
+        event.set_results.assert_called_once_with(
+            {
+                "changed-files": "/var/opt/magma/configs/orc8r/elastic.yml",
+                "diff": "--- a/var/opt/magma/configs/orc8r/elastic.yml\n"
+                "+++ b/var/opt/magma/configs/orc8r/elastic.yml\n"
+                "@@ -1,2 +1,2 @@\n"
+                "-elasticHost: elasticsearch\n"
+                "+elasticHost: new-elasticsearch\n"
+                " elasticPort: 9200\n",
+            }
+        )
+
     @patch("ops.model.Container.push")
     def test_given_bad_elasticsearch_config_when_on_config_changed_event_then_status_is_blocked(
         self, _
@@ -346,12 +509,193 @@ class TestCharm(unittest.TestCase):
             {"active": "False"},
         )
 
+    @patch("ops.model.Container.exec", new_callable=Mock)
+    def test_given_all_services_when_set_log_verbosity_action_then_log_verbosity_is_set_for_each_orc8r_service(  # noqa: E501
+        self, patch_exec
+    ):
+        patch_exec.return_value = MockExec()
+        event = Mock(params={"level": 10, "service": "all"})
+
+        self.harness.charm._set_log_verbosity_action(event)
+
+        patch_exec.assert_has_calls(
+            [
+                call(
+                    ["/var/opt/magma/bin/service303_cli", "log_verbosity", "10", service],
+                    timeout=30,
+                    environment={
+                        "SERVICE_HOSTNAME": "magma-orc8r-orchestrator",
+                        "SERVICE_REGISTRY_MODE": "k8s",
+                        "SERVICE_REGISTRY_NAMESPACE": self.namespace,
+                    },
+                    working_dir="/",
+                )
+                for service in MagmaOrc8rOrchestratorCharm.ORC8R_SERVICES
+            ],
+            any_order=True,
+        )
+        results = event.set_results.call_args.args[0]
+        self.assertEqual(len(results), len(MagmaOrc8rOrchestratorCharm.ORC8R_SERVICES))
+        self.assertEqual(results["service-registry"]["status"], "ok")
+        self.assertIn("duration", results["obsidian"])
+        event.fail.assert_not_called()
+
+    @patch("ops.model.Container.exec", new_callable=Mock)
+    def test_given_revert_after_param_when_set_log_verbosity_action_then_revert_service_is_started(  # noqa: E501
+        self, patch_exec
+    ):
+        patch_exec.return_value = MockExec()
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        event = Mock(params={"level": 10, "service": "obsidian,state", "revert-after": 15})
+
+        self.harness.charm._set_log_verbosity_action(event)
+
+        container = self.harness.model.unit.get_container("magma-orc8r-orchestrator")
+        revert_service = container.get_plan().services["log-verbosity-revert"]
+        self.assertEqual(
+            revert_service.command,
+            "/bin/sh -c 'sleep 900; "
+            "/var/opt/magma/bin/service303_cli log_verbosity 0 obsidian; "
+            "/var/opt/magma/bin/service303_cli log_verbosity 0 state'",
+        )
+        self.assertTrue(container.get_service("log-verbosity-revert").is_running())
+
+    @patch("ops.model.Container.exec", new_callable=Mock)
+    def test_given_invalid_service_name_when_set_log_verbosity_action_then_action_fails(
+        self, patch_exec
+    ):
+        event = Mock(params={"level": 10, "service": "obsidian; reboot"})
+
+        self.harness.charm._set_log_verbosity_action(event)
+
+        patch_exec.assert_not_called()
+        event.fail.assert_called_once_with("Invalid service(s): obsidian; reboot")
+
+    @patch("lightkube.core.client.GenericSyncClient", new=Mock)
+    @patch("lightkube.Client.get")
+    @patch("ops.model.Container.exec")
+    def test_given_service_serves_pprof_when_collect_profile_action_then_profile_is_fetched_from_service_http_port_and_stored_and_top_functions_are_returned(  # noqa: E501
+        self, patched_exec, patched_get
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        patched_get.return_value = Service(
+            spec=ServiceSpec(
+                ports=[
+                    ServicePort(name="grpc", port=9180),
+                    ServicePort(name="http", port=8080),
+                ]
+            )
+        )
+        profile = cpu_profile()
+        patched_exec.return_value.wait_output.return_value = (profile, b"")
+        event = Mock(params={"service": "subscriberdb", "profile-type": "cpu", "duration": 10})
+        profiles_dir = tempfile.mkdtemp()
+
+        with patch.object(MagmaOrc8rOrchestratorCharm, "PROFILES_DIR", profiles_dir):
+            self.harness.charm._on_collect_profile_action(event)
+
+        self.assertEqual(
+            patched_get.call_args.kwargs,
+            {"name": "orc8r-subscriberdb", "namespace": self.namespace},
+        )
+        patched_exec.assert_called_once_with(
+            [
+                "curl",
+                "--fail",
+                "--silent",
+                "--show-error",
+                f"http://orc8r-subscriberdb.{self.namespace}.svc.cluster.local:8080"
+                "/debug/pprof/profile?seconds=10",
+            ],
+            encoding=None,
+            timeout=40,
+        )
+        results = event.set_results.call_args.args[0]
+        self.assertTrue(results["path"].startswith(f"{profiles_dir}/subscriberdb-cpu-"))
+        self.assertEqual(results["size"], len(profile))
+        with open(results["path"], "rb") as stored_profile:
+            self.assertEqual(stored_profile.read(), profile)
+        self.assertEqual(
+            results["top-functions"],
+            "60.0% 60 nanoseconds runtime.mallocgc\n40.0% 40 nanoseconds main.handle",
+        )
+
+    @patch("ops.model.Container.exec")
+    def test_given_port_param_when_collect_profile_action_then_profile_is_fetched_from_given_port(  # noqa: E501
+        self, patched_exec
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        patched_exec.return_value.wait_output.return_value = (b"profile", b"")
+        event = Mock(params={"service": "service_registry", "profile-type": "heap", "port": 6060})
+        profiles_dir = tempfile.mkdtemp()
+
+        with patch.object(MagmaOrc8rOrchestratorCharm, "PROFILES_DIR", profiles_dir):
+            self.harness.charm._on_collect_profile_action(event)
+
+        self.assertEqual(
+            patched_exec.call_args.args[0][-1],
+            f"http://orc8r-service-registry.{self.namespace}.svc.cluster.local:6060"
+            "/debug/pprof/heap",
+        )
+        results = event.set_results.call_args.args[0]
+        self.assertEqual(results["top-functions"], "")
+
+    @patch("lightkube.core.client.GenericSyncClient", new=Mock)
+    @patch("lightkube.Client.get")
+    @patch("ops.model.Container.exec")
+    def test_given_service_has_no_http_port_when_collect_profile_action_then_action_fails(
+        self, patched_exec, patched_get
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        patched_get.return_value = Service(
+            spec=ServiceSpec(ports=[ServicePort(name="grpc", port=9180)])
+        )
+        event = Mock(params={"service": "state", "profile-type": "heap"})
+
+        self.harness.charm._on_collect_profile_action(event)
+
+        patched_exec.assert_not_called()
+        event.fail.assert_called_once_with(
+            "Failed to resolve state pprof endpoint: orc8r-state has no http port"
+        )
+
+    @patch("ops.model.Container.exec")
+    def test_given_invalid_service_when_collect_profile_action_then_action_fails(
+        self, patched_exec
+    ):
+        event = Mock(params={"service": "state; reboot", "profile-type": "heap"})
+
+        self.harness.charm._on_collect_profile_action(event)
+
+        patched_exec.assert_not_called()
+        event.fail.assert_called_once_with("Invalid service: state; reboot")
+
+    @patch("ops.model.Container.exec")
+    def test_given_pprof_endpoint_unreachable_when_collect_profile_action_then_action_fails(
+        self, patched_exec
+    ):
+        self.harness.set_can_connect(container="magma-orc8r-orchestrator", val=True)
+        patched_exec.return_value.wait_output.side_effect = ExecError(
+            command=["curl"],
+            exit_code=7,
+            stdout=b"",
+            stderr=b"curl: (7) Failed to connect to orc8r-state port 6060\n",
+        )
+        event = Mock(params={"service": "state", "profile-type": "heap", "port": 6060})
+
+        self.harness.charm._on_collect_profile_action(event)
+
+        event.fail.assert_called_once_with(
+            "Failed to collect heap profile for state: "
+            "curl: (7) Failed to connect to orc8r-state port 6060"
+        )
+
     @patch("lightkube.Client.list")
     @patch("lightkube.core.client.GenericSyncClient")
     def test_given_k8s_services_exist_when_get_load_balancer_services_action_then_services_are_returned(  # noqa: E501
         self, _, patch_k8s_list
     ):
-        event = Mock()
+        event = Mock(params={})
         ip_1 = "whatever ip 1"
         ip_2 = "whatever ip 2"
         ip_3 = "whatever ip 3"
@@ -377,6 +721,68 @@ class TestCharm(unittest.TestCase):
             }
         )
 
+    @patch("lightkube.Client.list")
+    @patch("lightkube.core.client.GenericSyncClient")
+    def test_given_k8s_services_exist_when_get_load_balancer_services_action_then_services_are_listed_with_orc8r_label_selector(  # noqa: E501
+        self, _, patch_k8s_list
+    ):
+        patch_k8s_list.return_value = []
+
+        self.harness.charm._on_get_load_balancer_services_action(Mock(params={}))
+
+        labels = patch_k8s_list.call_args.kwargs["labels"]
+        self.assertEqual(
+            labels["app.kubernetes.io/part-of"].encode("app.kubernetes.io/part-of"),
+            "app.kubernetes.io/part-of in (magma,orc8r)",
+        )
+
+    @patch("charm.time.sleep")
+    @patch("lightkube.Client.list")
+    @patch("lightkube.core.client.GenericSyncClient")
+    def test_given_load_balancer_addresses_not_yet_assigned_when_get_load_balancer_services_action_with_wait_then_action_waits_for_all_addresses(  # noqa: E501
+        self, _, patch_k8s_list, patched_sleep
+    ):
+        event = Mock(params={"wait": True, "timeout": 60})
+        services = [
+            self.k8s_load_balancer_service(ip=f"1.2.3.{index}", name=name)
+            for index, name in enumerate(MagmaOrc8rOrchestratorCharm.LOAD_BALANCER_SERVICES)
+        ]
+        patch_k8s_list.side_effect = [services[:2], services]
+
+        self.harness.charm._on_get_load_balancer_services_action(event)
+
+        event.log.assert_called_once_with(
+            "Waiting for load balancer addresses: orc8r-nginx-proxy, nginx-proxy"
+        )
+        patched_sleep.assert_called_once()
+        event.fail.assert_not_called()
+        event.set_results.assert_called_once_with(
+            {
+                "orc8r-bootstrap-nginx": "1.2.3.0",
+                "orc8r-clientcert-nginx": "1.2.3.1",
+                "orc8r-nginx-proxy": "1.2.3.2",
+                "nginx-proxy": "1.2.3.3",
+            }
+        )
+
+    @patch("lightkube.Client.list")
+    @patch("lightkube.core.client.GenericSyncClient")
+    def test_given_load_balancer_addresses_not_assigned_when_get_load_balancer_services_action_with_wait_times_out_then_action_fails(  # noqa: E501
+        self, _, patch_k8s_list
+    ):
+        event = Mock(params={"wait": True, "timeout": 0})
+        patch_k8s_list.return_value = [
+            self.k8s_load_balancer_service(ip="1.2.3.4", name="orc8r-nginx-proxy")
+        ]
+
+        self.harness.charm._on_get_load_balancer_services_action(event)
+
+        event.set_results.assert_called_once_with({"orc8r-nginx-proxy": "1.2.3.4"})
+        event.fail.assert_called_once_with(
+            "Timed out waiting for load balancer addresses: "
+            "orc8r-bootstrap-nginx, orc8r-clientcert-nginx, nginx-proxy"
+        )
+
     def test_given_metrics_endpoint_relation_is_not_created_when_pebble_ready_then_status_is_blocked(  # noqa: E501
         self,
     ):
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Benchmarks the hook handlers of a charm using the ops testing Harness.
+
+The charm is driven through a scripted lifecycle (install, leader-elected, config-changed, start,
+pebble-ready, relation joins, config-changed and update-status). Deferred events are re-emitted
+before each step, as Juju would do when dispatching the next hook. For each handler, the wall
+time, the number of Pebble API calls, relation data reads (`relation-get`) and writes
+(`relation-set`) and the number of deferred events are recorded.
+
+Charms are benchmarked in their own process, as every charm has its own `charm` module and copy
+of the charm libraries:
+
+```bash
+PYTHONPATH=<charm>/lib:<charm>/src python3 benchmark.py <charm>
+```
+"""
+
+import argparse
+import importlib.util
+import inspect
+import json
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest.mock import MagicMock, patch
+
+from ops.charm import CharmBase
+from ops.pebble import APIError
+from ops.testing import Harness, _TestingModelBackend, _TestingPebbleClient
+
+# Config options set as in the bundle, for charms which block without them
+BENCHMARK_CONFIG = {"domain": "example.com", "elasticsearch-url": "orc8r-elasticsearch:1234"}
+
+# Calls to services which aren't available when benchmarking, and their replacements
+OFFLINE_PATCHES = {
+    "lightkube.core.client.GenericSyncClient": MagicMock(),
+    "psycopg2.connect": MagicMock(),
+    "charms.observability_libs.v1.kubernetes_service_patch.KubernetesServicePatch._namespace": (
+        property(lambda _: "orc8r")
+    ),
+}
+
+COUNTERS = ("pebble_calls", "relation_reads", "relation_writes", "deferred")
+
+PEBBLE_CLIENT_METHODS = [
+    name
+    for name, _ in inspect.getmembers(_TestingPebbleClient, inspect.isfunction)
+    if not name.startswith("_")
+]
+
+
+class Recorder:
+    """Records the metrics of the hook handlers of a charm."""
+
+    def __init__(self):
+        self.handlers: Dict[str, dict] = {}
+        self.step: Optional[dict] = None
+        self.in_counted_call = False
+        self._running_handlers: List[dict] = []
+        self._deferred_events: set = set()
+
+    def count(self, counter: str) -> None:
+        """Increments a counter of the running handler and of the current step.
+
+        Calls made outside of handlers (ex. by the Harness itself) aren't counted.
+
+        Args:
+            counter (str): Counter name
+        """
+        if not self._running_handlers:
+            return
+        self._running_handlers[-1][counter] += 1
+        if self.step is not None:
+            self.step[counter] += 1
+
+    def wrap_handler(self, name: str, handler: Callable) -> Callable:
+        """Returns a handler recording the metrics of the given one.
+
+        Args:
+            name (str): Handler name
+            handler (Callable): Observer method
+
+        Returns:
+            Callable: Instrumented handler
+        """
+
+        def instrumented_handler(event, *args, **kwargs):
+            metrics = self.handlers.setdefault(name, _handler_metrics())
+            metrics["calls"] += 1
+            metrics["events"].add(event.handle.kind)
+            if event.handle.path in self._deferred_events:
+                metrics["reemitted"] += 1
+            if self.step is not None:
+                self.step["handler_calls"] += 1
+            self._running_handlers.append(metrics)
+            start = time.perf_counter()
+            try:
+                handler(event, *args, **kwargs)
+            finally:
+                metrics["wall_time"] += time.perf_counter() - start
+                self._running_handlers.pop()
+            if event.deferred:
+                self._deferred_events.add(event.handle.path)
+                metrics["deferred"] += 1
+                if self.step is not None:
+                    self.step["deferred"] += 1
+
+        return instrumented_handler
+
+
+def _handler_metrics() -> dict:
+    return {
+        "events": set(),
+        "calls": 0,
+        "reemitted": 0,
+        "wall_time": 0.0,
+        **dict.fromkeys(COUNTERS, 0),
+    }
+
+
+def _counting(recorder: Recorder, counter: str, method: Callable) -> Callable:
+    def counting_method(*args, **kwargs):
+        # Calls made by the testing clients themselves (ex. `push` creating directories) aren't
+        # API calls of the charm
+        if recorder.in_counted_call:
+            return method(*args, **kwargs)
+        recorder.count(counter)
+        recorder.in_counted_call = True
+        try:
+            return method(*args, **kwargs)
+        finally:
+            recorder.in_counted_call = False
+
+    return counting_method
+
+
+def _raising_api_errors(method: Callable) -> Callable:
+    def pebble_method(*args, **kwargs):
+        # The testing client raises RuntimeError where Pebble answers with an error, which
+        # charms handle as APIError
+        try:
+            return method(*args, **kwargs)
+        except RuntimeError as e:
+            code, _, message = str(e).partition(" ")
+            if not code.isdigit():
+                raise
+            raise APIError({}, int(code), message, message) from e
+
+    return pebble_method
+
+
+def instrument(recorder: Recorder, stack: ExitStack) -> None:
+    """Counts Pebble API calls and relation data reads and writes, and patches external calls.
+
+    Args:
+        recorder (Recorder): Recorder of the counters
+        stack (ExitStack): Stack the patches are entered in
+    """
+    for method_name in PEBBLE_CLIENT_METHODS:
+        method = getattr(_TestingPebbleClient, method_name)
+        stack.enter_context(
+            patch.object(
+                _TestingPebbleClient,
+                method_name,
+                _counting(recorder, "pebble_calls", _raising_api_errors(method)),
+            )
+        )
+    for method_name, counter in (
+        ("relation_get", "relation_reads"),
+        ("update_relation_data", "relation_writes"),
+    ):
+        method = getattr(_TestingModelBackend, method_name)
+        stack.enter_context(
+            patch.object(_TestingModelBackend, method_name, _counting(recorder, counter, method))
+        )
+    for target, replacement in OFFLINE_PATCHES.items():
+        try:
+            stack.enter_context(patch(target, replacement))
+        except (AttributeError, ModuleNotFoundError):
+            pass  # The charm doesn't use this library
+
+
+def wrap_handlers(harness: Harness, recorder: Recorder, prefix: str = "") -> None:
+    """Instruments the handlers observing the events of a charm.
+
+    Args:
+        harness (Harness): Harness of the charm, after `begin`
+        recorder (Recorder): Recorder of the handler metrics
+        prefix (str): Prefix of the handler names
+    """
+    framework = harness.framework
+    for observer_path, method_name, _, _ in framework._observers:
+        observer = framework._observer.get(observer_path)
+        if observer is None or method_name in vars(observer):
+            continue
+        name = f"{prefix}{type(observer).__name__}.{method_name}"
+        setattr(observer, method_name, recorder.wrap_handler(name, getattr(observer, method_name)))
+
+
+def load_charm_class(charm_dir: Path, module_name: str = "charm") -> type:
+    """Loads the charm class from the `src/charm.py` module of a charm.
+
+    Args:
+        charm_dir (Path): Charm directory
+        module_name (str): Name the module is loaded as, unique when loading several charms
+
+    Returns:
+        type: Charm class
+    """
+    for path in (charm_dir / "lib", charm_dir / "src"):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    spec = importlib.util.spec_from_file_location(module_name, charm_dir / "src" / "charm.py")
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    module_classes = [
+        value
+        for value in vars(module).values()
+        if inspect.isclass(value) and value.__module__ == module_name
+    ]
+    charm_classes = [value for value in module_classes if issubclass(value, CharmBase)]
+    if not charm_classes:
+        raise ValueError(f"No charm class found in {charm_dir}")
+    return charm_classes[-1]
+
+
+def prepare_harness(harness: Harness, config: dict) -> None:
+    """Configures the charm, attaches its storages and begins the Harness.
+
+    Commands executed in the workload containers succeed without output.
+
+    Args:
+        harness (Harness): Harness of the charm
+        config (dict): Config options, the ones the charm doesn't have are ignored
+    """
+    # Options without a default value aren't in the model config until they are set
+    options = harness._backend._config._spec.get("options", {})
+    harness.update_config({key: value for key, value in config.items() if key in options})
+    for storage in harness.model.storages.keys():
+        harness.add_storage(storage, attach=True)
+    harness.begin()
+    for container in harness.charm.meta.containers:
+        harness.handle_exec(container, [], result=0)
+
+
+def _join_relation(harness: Harness, endpoint: str) -> None:
+    remote_app = f"remote-{endpoint}"
+    relation_id = harness.add_relation(endpoint, remote_app)
+    harness.add_relation_unit(relation_id, f"{remote_app}/0")
+
+
+def _lifecycle(harness: Harness) -> List[Tuple[str, Callable]]:
+    """Returns the steps of the scripted lifecycle of a charm, in the order Juju runs them."""
+    charm = harness.charm
+    meta = charm.meta
+    steps: List[Tuple[str, Callable]] = [("install", charm.on.install.emit)]
+    steps += [
+        (f"relation-created:{endpoint}", partial(harness.add_relation, endpoint, meta.name))
+        for endpoint in meta.peers
+    ]
+    steps += [
+        ("leader-elected", partial(harness.set_leader, True)),
+        ("config-changed", charm.on.config_changed.emit),
+        ("start", charm.on.start.emit),
+    ]
+    steps += [
+        (f"pebble-ready:{container}", partial(harness.container_pebble_ready, container))
+        for container in meta.containers
+    ]
+    steps += [
+        (f"relation-joined:{endpoint}", partial(_join_relation, harness, endpoint))
+        for endpoint in sorted({**meta.requires, **meta.provides})
+    ]
+    steps += [
+        ("config-changed:after-relations", charm.on.config_changed.emit),
+        ("update-status", charm.on.update_status.emit),
+    ]
+    return steps
+
+
+def _run_step(harness: Harness, recorder: Recorder, name: str, action: Callable) -> dict:
+    step = {"step": name, "wall_time": 0.0, "handler_calls": 0, **dict.fromkeys(COUNTERS, 0)}
+    recorder.step = step
+    start = time.perf_counter()
+    try:
+        harness.framework.reemit()
+        action()
+    except Exception as e:  # The lifecycle goes on, as Juju would retry the failed hook
+        step["error"] = f"{type(e).__name__}: {e}"
+    step["wall_time"] = time.perf_counter() - start
+    recorder.step = None
+    return step
+
+
+def run_lifecycle(charm_class: type) -> Tuple[List[dict], Dict[str, dict]]:
+    """Drives a charm through the scripted lifecycle.
+
+    Args:
+        charm_class (type): Charm class
+
+    Returns:
+        tuple: Step metrics and handler metrics keyed by handler name
+    """
+    recorder = Recorder()
+    with ExitStack() as stack:
+        instrument(recorder, stack)
+        harness = Harness(charm_class)
+        stack.callback(harness.cleanup)
+        prepare_harness(harness, BENCHMARK_CONFIG)
+        wrap_handlers(harness, recorder)
+        steps = [
+            _run_step(harness, recorder, name, action) for name, action in _lifecycle(harness)
+        ]
+    return steps, recorder.handlers
+
+
+def _median_wall_times(runs: List[List[dict]], key: str) -> Dict[str, float]:
+    wall_times: Dict[str, List[float]] = {}
+    for run in runs:
+        for metrics in run:
+            wall_times.setdefault(metrics[key], []).append(metrics["wall_time"])
+    return {name: statistics.median(times) for name, times in wall_times.items()}
+
+
+def benchmark_charm(charm_dir: Path, iterations: int = 5) -> dict:
+    """Benchmarks the hook handlers of a charm.
+
+    Counters are taken from the last run, as they don't change between runs. Wall times are the
+    median of all runs, in seconds.
+
+    Args:
+        charm_dir (Path): Charm directory
+        iterations (int): Number of runs of the lifecycle
+
+    Returns:
+        dict: Step, handler and total metrics of the charm
+    """
+    charm_class = load_charm_class(charm_dir)
+    step_runs = []
+    handler_runs = []
+    for _ in range(iterations):
+        steps, handlers = run_lifecycle(charm_class)
+        step_runs.append(steps)
+        handler_runs.append([{"handler": name, **metrics} for name, metrics in handlers.items()])
+    step_wall_times = _median_wall_times(step_runs, "step")
+    handler_wall_times = _median_wall_times(handler_runs, "handler")
+    steps = [{**step, "wall_time": step_wall_times[step["step"]]} for step in step_runs[-1]]
+    handlers = {
+        name: {
+            **metrics,
+            "events": sorted(metrics["events"]),
+            "wall_time": handler_wall_times[name],
+        }
+        for name, metrics in handlers.items()
+    }
+    totals = {
+        counter: sum(step[counter] for step in steps)
+        for counter in ("wall_time", "handler_calls", *COUNTERS)
+    }
+    return {
+        "charm_class": charm_class.__name__,
+        "iterations": iterations,
+        "totals": totals,
+        "steps": steps,
+        "handlers": handlers,
+    }
+
+
+def parse_arguments(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the hook handlers of a charm.")
+    parser.add_argument("charm_dir", type=Path, help="charm directory")
+    parser.add_argument("--iterations", type=int, default=5, help="number of lifecycle runs")
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    json.dump(benchmark_charm(arguments.charm_dir.resolve(), arguments.iterations), sys.stdout)
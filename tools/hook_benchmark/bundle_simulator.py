@@ -0,0 +1,782 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Simulates the bring-up of the Orchestrator bundle using the ops testing Harness.
+
+Every charm of the bundle which is built from this repository is instantiated with a Harness, and
+the relations of the bundle are wired between them. Charms which aren't part of the repository
+(PostgreSQL, the TLS certificates operator and the observability charms) are replaced by
+stand-ins: the PostgreSQL and TLS certificates stand-ins answer database and certificate
+requests, the configurers and Grafana publish their addresses, and the others only take part in
+the relations. Workloads are considered ready as soon as their services run.
+
+Hooks are queued per application and dispatched in simulated time, each dispatch taking
+`--hook-overhead` seconds. Relation data written by a hook is propagated to the remote
+application, which gets a `relation-changed` hook, and deferred events are re-emitted before
+each hook of their application, as Juju does. `update-status` runs every
+`--update-status-interval` seconds while events are deferred or applications aren't active. The
+simulation ends when no hook is left to dispatch.
+
+The report gives the number of dispatches, deferred events and re-emissions, and the critical
+path to all-active: the chain of hooks, each waiting for the previous one, which ends with the
+last application becoming active.
+
+```bash
+python3 bundle_simulator.py --output bundle-simulation.json
+```
+"""
+
+import argparse
+import json
+import re
+from collections import deque
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+import jinja2
+import yaml
+from benchmark import (
+    BENCHMARK_CONFIG,
+    COUNTERS,
+    Recorder,
+    instrument,
+    load_charm_class,
+    prepare_harness,
+    wrap_handlers,
+)
+from ops.model import ActiveStatus
+from ops.pebble import CheckInfo, CheckStatus
+from ops.testing import Harness
+
+REPOSITORY_ROOT = Path(__file__).resolve().parents[2]
+BUNDLE_TEMPLATE = REPOSITORY_ROOT / "orc8r-bundle" / "bundle.yaml.j2"
+LOCAL_CHARM_PATTERN = re.compile(r"^\./magma-(?P<name>.+)_ubuntu-.+\.charm$")
+
+# Endpoints of the stand-ins and their role and interface, used when the bundle doesn't name them
+STAND_IN_ENDPOINTS = {
+    "postgresql-k8s": {"database": ("provides", "postgresql_client")},
+    "tls-certificates-operator": {"certificates": ("provides", "tls-certificates")},
+}
+
+# Application data the stand-ins publish when they join a relation, keyed by application and
+# endpoint
+STAND_IN_APPLICATION_DATA = {
+    "orc8r-alertmanager-configurer": {
+        "alertmanager-configurer": {
+            "service_name": "orc8r-alertmanager-configurer",
+            "port": "9101",
+        }
+    },
+    "orc8r-prometheus-configurer": {
+        "prometheus-configurer": {"service_name": "orc8r-prometheus-configurer", "port": "9100"}
+    },
+    "orc8r-user-grafana": {
+        "grafana-auth": {"urls": json.dumps(["http://orc8r-user-grafana:3000/grafana"])}
+    },
+}
+
+
+class RelationEnd:
+    """End of a relation, on the side of one application."""
+
+    def __init__(self, application: "Application", endpoint: str):
+        self.application = application
+        self.endpoint = endpoint
+        self.remote: Optional[RelationEnd] = None
+        self.relation_id: Optional[int] = None
+        self.propagated_data: Tuple[dict, dict] = ({}, {})
+
+    def __str__(self) -> str:
+        return f"{self.application.name}:{self.endpoint}"
+
+
+class Dispatch:
+    """Hook dispatched to an application."""
+
+    def __init__(
+        self,
+        kind: str,
+        target: str = "",
+        relation_end: Optional[RelationEnd] = None,
+        ready: float = 0.0,
+        cause: Optional["Dispatch"] = None,
+    ):
+        self.application = ""
+        self.kind = kind
+        self.target = target
+        self.relation_end = relation_end
+        self.ready = ready
+        self.cause = cause
+        self.app_data: Dict[str, str] = {}
+        self.unit_data: Dict[str, str] = {}
+        self.start = 0.0
+        self.end = 0.0
+        self.predecessor: Optional[Dispatch] = None
+
+    def __str__(self) -> str:
+        hook = f"{self.kind}:{self.target}" if self.target else self.kind
+        return f"{self.application} {hook}"
+
+
+class Application:
+    """Application of the bundle, which runs one hook at a time."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.app_name = name
+        self.queue: Deque[Dispatch] = deque()
+        self.clock = 0.0
+        self.last_dispatch: Optional[Dispatch] = None
+        self.relation_ends: List[RelationEnd] = []
+        self.dispatches = 0
+
+    @property
+    def unit_name(self) -> str:
+        return f"{self.app_name}/0"
+
+    def endpoints(self) -> Dict[str, Tuple[str, str]]:
+        """Returns the role and interface of the endpoints of the application, keyed by name."""
+        return {}
+
+    def initial_dispatches(self) -> List[Dispatch]:
+        """Returns the hooks Juju dispatches when the application is deployed and related."""
+        dispatches = []
+        for relation_end in self.relation_ends:
+            dispatches += [
+                Dispatch(kind, relation_end.endpoint, relation_end)
+                for kind in ("relation-created", "relation-joined", "relation-changed")
+            ]
+        return dispatches
+
+    def run(self, dispatch: Dispatch) -> None:
+        """Runs a hook."""
+        raise NotImplementedError
+
+    def local_data(self, relation_end: RelationEnd) -> Tuple[dict, dict]:
+        """Returns the application and unit data the application wrote in a relation."""
+        raise NotImplementedError
+
+    @property
+    def is_active(self) -> bool:
+        return True
+
+    @property
+    def status(self) -> str:
+        return "active"
+
+
+class CharmApplication(Application):
+    """Application running a charm of the repository in a Harness."""
+
+    def __init__(self, name: str, charm_dir: Path, config: dict, recorder: Recorder):
+        super().__init__(name)
+        self.recorder = recorder
+        charm_class = load_charm_class(charm_dir, f"charm_{name.replace('-', '_')}")
+        self.harness = Harness(charm_class)
+        self.harness.set_leader(True)
+        # The Harness names the application after the charm, as charms use their charm name
+        # for their containers and services
+        self.app_name = self.harness.model.app.name
+        self.config = {**BENCHMARK_CONFIG, **config}
+        self.metrics = {"handler_calls": 0, **dict.fromkeys(COUNTERS, 0)}
+        self.errors: List[str] = []
+        self.peer_relation_ids: Dict[str, int] = {}
+        self.check_containers: Dict[str, str] = {}
+        self.became_active: Optional[float] = None
+
+    def begin(self) -> None:
+        """Begins the Harness and instruments the handlers of the charm."""
+        prepare_harness(self.harness, self.config)
+        wrap_handlers(self.harness, self.recorder, prefix=f"{self.name}:")
+
+    def endpoints(self) -> Dict[str, Tuple[str, str]]:
+        meta = self.harness.charm.meta
+        return {
+            name: (endpoint.role.name, endpoint.interface_name)
+            for name, endpoint in {**meta.requires, **meta.provides}.items()
+        }
+
+    def initial_dispatches(self) -> List[Dispatch]:
+        meta = self.harness.charm.meta
+        dispatches = [Dispatch("install")]
+        dispatches += [Dispatch("relation-created", peer) for peer in meta.peers]
+        dispatches += [Dispatch(kind) for kind in ("leader-elected", "config-changed", "start")]
+        dispatches += [Dispatch("pebble-ready", container) for container in meta.containers]
+        return dispatches + super().initial_dispatches()
+
+    def run(self, dispatch: Dispatch) -> None:
+        # The model changes even when the hook fails, as Juju would retry the failed hook
+        with self.harness.hooks_disabled():
+            self._update_model(dispatch)
+        step = {"handler_calls": 0, **dict.fromkeys(COUNTERS, 0)}
+        self.recorder.step = step
+        try:
+            self.harness.framework.reemit()
+            self._emit(dispatch)
+        except Exception as e:
+            self.errors.append(f"{dispatch}: {type(e).__name__}: {e}")
+        finally:
+            self.recorder.step = None
+        for counter, value in step.items():
+            self.metrics[counter] += value
+        self.queue.extend(
+            Dispatch("pebble-check-recovered", check, ready=dispatch.end, cause=dispatch)
+            for check in self._pass_health_checks()
+        )
+
+    def _pass_health_checks(self) -> List[str]:
+        """Makes the health checks of the containers with running services pass.
+
+        Workloads are considered ready as soon as they run, and Pebble reports their checks as
+        recovered.
+
+        Returns:
+            list: Names of the checks which started passing
+        """
+        passing_checks = []
+        for container_name in self.harness.charm.meta.containers:
+            container = self.harness.model.unit.get_container(container_name)
+            if not container.can_connect():
+                continue
+            plan = container.get_plan()
+            if not any(service.is_running() for service in container.get_services().values()):
+                continue
+            pebble_client = self.harness._backend._pebble_clients[container_name]
+            for name, check in plan.checks.items():
+                if name in pebble_client._check_infos:
+                    continue
+                pebble_client._check_infos[name] = CheckInfo(name, check.level, CheckStatus.UP)
+                self.check_containers[name] = container_name
+                passing_checks.append(name)
+        return passing_checks
+
+    def _update_model(self, dispatch: Dispatch) -> None:
+        """Applies the changes the hook notifies the charm of to the Harness."""
+        harness = self.harness
+        relation_end = dispatch.relation_end
+        if dispatch.kind == "pebble-ready":
+            harness.set_can_connect(dispatch.target, True)
+        if relation_end is None:
+            if dispatch.kind == "relation-created":
+                self.peer_relation_ids[dispatch.target] = harness.add_relation(
+                    dispatch.target, self.app_name
+                )
+            return
+        remote_application = relation_end.remote.application  # type: ignore[union-attr]
+        if dispatch.kind == "relation-created":
+            relation_end.relation_id = harness.add_relation(
+                relation_end.endpoint, remote_application.app_name
+            )
+        elif dispatch.kind == "relation-joined":
+            harness.add_relation_unit(relation_end.relation_id, remote_application.unit_name)
+        for name, data in (
+            (remote_application.app_name, dispatch.app_data),
+            (remote_application.unit_name, dispatch.unit_data),
+        ):
+            if data:
+                harness.update_relation_data(relation_end.relation_id, name, data)
+
+    def _emit(self, dispatch: Dispatch) -> None:
+        model = self.harness.model
+        charm_events = self.harness.charm.on
+        relation_end = dispatch.relation_end
+        if dispatch.kind == "pebble-ready":
+            container = model.unit.get_container(dispatch.target)
+            charm_events[dispatch.target].pebble_ready.emit(container)
+        elif dispatch.kind == "pebble-check-recovered":
+            container_name = self.check_containers[dispatch.target]
+            container = model.unit.get_container(container_name)
+            charm_events[container_name].pebble_check_recovered.emit(container, dispatch.target)
+        elif relation_end is not None:
+            remote_application = relation_end.remote.application  # type: ignore[union-attr]
+            relation = model.get_relation(relation_end.endpoint, relation_end.relation_id)
+            event = getattr(charm_events[relation_end.endpoint], dispatch.kind.replace("-", "_"))
+            remote_unit = model.get_unit(remote_application.unit_name)
+            if dispatch.kind == "relation-created":
+                event.emit(relation, model.get_app(remote_application.app_name))
+            else:
+                event.emit(relation, model.get_app(remote_application.app_name), remote_unit)
+        elif dispatch.kind == "relation-created":
+            relation = model.get_relation(dispatch.target, self.peer_relation_ids[dispatch.target])
+            charm_events[dispatch.target].relation_created.emit(relation, model.app)
+        else:
+            getattr(charm_events, dispatch.kind.replace("-", "_")).emit()
+
+    def local_data(self, relation_end: RelationEnd) -> Tuple[dict, dict]:
+        if relation_end.relation_id is None:
+            return {}, {}
+        return (
+            dict(self.harness.get_relation_data(relation_end.relation_id, self.app_name)),
+            dict(self.harness.get_relation_data(relation_end.relation_id, self.unit_name)),
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return isinstance(self.harness.model.unit.status, ActiveStatus)
+
+    @property
+    def status(self) -> str:
+        status = self.harness.model.unit.status
+        return f"{status.name}: {status.message}" if status.message else status.name
+
+    @property
+    def deferred_events(self) -> int:
+        return len(list(self.harness.framework._storage.notices()))
+
+
+class StandIn(Application):
+    """Application which isn't part of the repository, and only takes part in relations."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.relation_data: Dict[RelationEnd, Tuple[dict, dict]] = {}
+        self.remote_data: Dict[RelationEnd, Tuple[dict, dict]] = {}
+
+    def endpoints(self) -> Dict[str, Tuple[str, str]]:
+        return STAND_IN_ENDPOINTS.get(self.name, {})
+
+    def run(self, dispatch: Dispatch) -> None:
+        if dispatch.kind == "relation-joined" and dispatch.relation_end is not None:
+            app_data, _ = self.relation_data.setdefault(dispatch.relation_end, ({}, {}))
+            endpoint_data = STAND_IN_APPLICATION_DATA.get(self.name, {})
+            app_data.update(endpoint_data.get(dispatch.relation_end.endpoint, {}))
+        if dispatch.kind != "relation-changed" or dispatch.relation_end is None:
+            return
+        remote_app_data, remote_unit_data = self.remote_data.setdefault(
+            dispatch.relation_end, ({}, {})
+        )
+        for remote_data, delta in (
+            (remote_app_data, dispatch.app_data),
+            (remote_unit_data, dispatch.unit_data),
+        ):
+            remote_data.update(delta)
+            for name in [name for name, value in delta.items() if value == ""]:
+                del remote_data[name]
+        self.respond(dispatch.relation_end, remote_app_data, remote_unit_data)
+
+    def respond(
+        self, relation_end: RelationEnd, remote_app_data: dict, remote_unit_data: dict
+    ) -> None:
+        """Updates the data of a relation after the remote application changed it.
+
+        Args:
+            relation_end (RelationEnd): Relation end of the stand-in
+            remote_app_data (dict): Application data of the remote application
+            remote_unit_data (dict): Unit data of the remote unit
+        """
+
+    def local_data(self, relation_end: RelationEnd) -> Tuple[dict, dict]:
+        app_data, unit_data = self.relation_data.get(relation_end, ({}, {}))
+        return dict(app_data), dict(unit_data)
+
+
+class PostgreSQLStandIn(StandIn):
+    """Stand-in of postgresql-k8s, which creates the databases its requirers ask for."""
+
+    def respond(
+        self, relation_end: RelationEnd, remote_app_data: dict, remote_unit_data: dict
+    ) -> None:
+        database = remote_app_data.get("database")
+        if not database:
+            return
+        requirer = relation_end.remote.application.name  # type: ignore[union-attr]
+        app_data, _ = self.relation_data.setdefault(relation_end, ({}, {}))
+        app_data.update(
+            {
+                "database": database,
+                "endpoints": f"{self.name}-primary:5432",
+                "username": f"{requirer}-user",
+                "password": "password",
+            }
+        )
+
+
+class TLSCertificatesStandIn(StandIn):
+    """Stand-in of tls-certificates-operator, which signs the certificate signing requests."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._ca_key: Optional[bytes] = None
+        self._ca: Optional[bytes] = None
+
+    def respond(
+        self, relation_end: RelationEnd, remote_app_data: dict, remote_unit_data: dict
+    ) -> None:
+        # The TLS certificates library is importable once the charms are loaded
+        from charms.tls_certificates_interface.v1.tls_certificates import (
+            generate_ca,
+            generate_certificate,
+            generate_private_key,
+        )
+
+        if self._ca is None:
+            self._ca_key = generate_private_key()
+            self._ca = generate_ca(private_key=self._ca_key, subject="rootca.example.com")
+        app_data, _ = self.relation_data.setdefault(relation_end, ({}, {}))
+        issued = {
+            certificate["certificate_signing_request"]: certificate
+            for certificate in json.loads(app_data.get("certificates", "[]"))
+        }
+        for request in json.loads(remote_unit_data.get("certificate_signing_requests", "[]")):
+            csr = request["certificate_signing_request"]
+            if csr not in issued:
+                certificate = generate_certificate(
+                    csr=csr.encode(), ca=self._ca, ca_key=self._ca_key  # type: ignore[arg-type]
+                ).decode()
+                issued[csr] = {
+                    "certificate": certificate,
+                    "certificate_signing_request": csr,
+                    "ca": self._ca.decode(),
+                    "chain": [self._ca.decode(), certificate],
+                }
+        if issued:
+            app_data["certificates"] = json.dumps(list(issued.values()))
+
+
+STAND_INS = {
+    "postgresql-k8s": PostgreSQLStandIn,
+    "tls-certificates-operator": TLSCertificatesStandIn,
+}
+
+
+def load_bundle(template: Path) -> dict:
+    """Renders the bundle template with local charms.
+
+    Args:
+        template (Path): Bundle template
+
+    Returns:
+        dict: Bundle
+    """
+    jinja_template = jinja2.Template(template.read_text(), autoescape=True)
+    return yaml.safe_load(jinja_template.render(channel="", local=True, profile={}))
+
+
+def _split_endpoint(application_endpoint: str) -> Tuple[str, str]:
+    application, _, endpoint = application_endpoint.partition(":")
+    return application, endpoint
+
+
+def _resolve_endpoints(
+    applications: Dict[str, Application], relation: List[str]
+) -> Tuple[RelationEnd, RelationEnd]:
+    """Returns the relation ends of a relation of the bundle.
+
+    Endpoints which aren't named are found by matching the interfaces of the endpoints required
+    by one application with the ones provided by the other.
+    Stand-ins without known endpoints use the endpoint name of the other application.
+
+    Args:
+        applications (dict): Applications of the bundle, keyed by name
+        relation (list): Application endpoints of the relation (`<application>[:<endpoint>]`)
+
+    Returns:
+        tuple: Relation ends
+    """
+    (app_1, endpoint_1), (app_2, endpoint_2) = (_split_endpoint(end) for end in relation)
+    endpoints_1 = applications[app_1].endpoints()
+    endpoints_2 = applications[app_2].endpoints()
+    if not endpoint_1 or not endpoint_2:
+        candidates_1 = [
+            (name, endpoints_1[name]) for name in endpoints_1 if endpoint_1 in ("", name)
+        ]
+        candidates_2 = [
+            (name, endpoints_2[name]) for name in endpoints_2 if endpoint_2 in ("", name)
+        ]
+        matches = [
+            (name_1, name_2)
+            for name_1, (role_1, interface_1) in candidates_1
+            for name_2, (role_2, interface_2) in candidates_2
+            if (role_1, interface_1) != (role_2, interface_2) and interface_1 == interface_2
+        ]
+        if len(matches) == 1:
+            endpoint_1, endpoint_2 = matches[0]
+        elif not matches and not endpoints_1 and endpoint_2:
+            endpoint_1 = endpoint_2
+        elif not matches and not endpoints_2 and endpoint_1:
+            endpoint_2 = endpoint_1
+        else:
+            raise ValueError(f"Can't resolve the endpoints of relation {' - '.join(relation)}")
+    ends = (
+        RelationEnd(applications[app_1], endpoint_1),
+        RelationEnd(applications[app_2], endpoint_2),
+    )
+    ends[0].remote, ends[1].remote = ends[1], ends[0]
+    return ends
+
+
+class BundleSimulation:
+    """Bring-up of a bundle, with the applications running their hooks in simulated time."""
+
+    def __init__(
+        self,
+        bundle: dict,
+        repository: Path,
+        hook_overhead: float = 1.0,
+        update_status_interval: float = 300.0,
+        max_update_status_runs: int = 12,
+    ):
+        self.hook_overhead = hook_overhead
+        self.update_status_interval = update_status_interval
+        self.max_update_status_runs = max_update_status_runs
+        self.recorder = Recorder()
+        self.applications: Dict[str, Application] = {}
+        for name, application in bundle["applications"].items():
+            match = LOCAL_CHARM_PATTERN.match(application["charm"])
+            if match:
+                self.applications[name] = CharmApplication(
+                    name,
+                    repository / f"{match.group('name')}-operator",
+                    application.get("options") or {},
+                    self.recorder,
+                )
+            else:
+                self.applications[name] = STAND_INS.get(name, StandIn)(name)
+        self.relations = bundle.get("relations", [])
+        self.dispatched: List[Dispatch] = []
+        self.update_status_runs = 0
+        self.all_active: Optional[Dispatch] = None
+
+    @property
+    def charms(self) -> List[CharmApplication]:
+        return [app for app in self.applications.values() if isinstance(app, CharmApplication)]
+
+    def run(self) -> dict:
+        """Runs the bring-up until no hook is left to dispatch.
+
+        Returns:
+            dict: Report
+        """
+        with ExitStack() as stack:
+            instrument(self.recorder, stack)
+            for charm in self.charms:
+                stack.callback(charm.harness.cleanup)
+                charm.begin()
+            for relation in self.relations:
+                for relation_end in _resolve_endpoints(self.applications, relation):
+                    relation_end.application.relation_ends.append(relation_end)
+            for application in self.applications.values():
+                application.queue.extend(application.initial_dispatches())
+            next_update_status = self.update_status_interval
+            while True:
+                application = self._next_application()
+                if application and self._start(application) < next_update_status:
+                    self._dispatch(application)
+                elif application is None and self._settled:
+                    break
+                elif self.update_status_runs == self.max_update_status_runs:
+                    break
+                else:
+                    self._queue_update_status(next_update_status)
+                    next_update_status += self.update_status_interval
+            return self.report()
+
+    def _next_application(self) -> Optional[Application]:
+        waiting = [application for application in self.applications.values() if application.queue]
+        if not waiting:
+            return None
+        return min(waiting, key=self._start)
+
+    @staticmethod
+    def _start(application: Application) -> float:
+        return max(application.clock, application.queue[0].ready)
+
+    @property
+    def _settled(self) -> bool:
+        return all(charm.is_active and not charm.deferred_events for charm in self.charms)
+
+    def _queue_update_status(self, time: float) -> None:
+        self.update_status_runs += 1
+        for charm in self.charms:
+            charm.queue.append(Dispatch("update-status", ready=time))
+
+    def _dispatch(self, application: Application) -> None:
+        dispatch = application.queue.popleft()
+        dispatch.application = application.name
+        # The hook waited either for the hook which caused it or for the previous hook of the
+        # application
+        if dispatch.cause is not None and dispatch.ready >= application.clock:
+            dispatch.predecessor = dispatch.cause
+        else:
+            dispatch.predecessor = application.last_dispatch
+        dispatch.start = max(application.clock, dispatch.ready)
+        dispatch.end = dispatch.start + self.hook_overhead
+        application.run(dispatch)
+        application.clock = dispatch.end
+        application.last_dispatch = dispatch
+        application.dispatches += 1
+        self.dispatched.append(dispatch)
+        for relation_end in application.relation_ends:
+            self._propagate(relation_end, dispatch)
+        self._record_status(application, dispatch)
+
+    def _propagate(self, relation_end: RelationEnd, dispatch: Dispatch) -> None:
+        """Queues a relation-changed hook on the remote application if the data changed."""
+        current_data = relation_end.application.local_data(relation_end)
+        deltas = [
+            {
+                **{key: value for key, value in current.items() if propagated.get(key) != value},
+                **{key: "" for key in propagated if key not in current},
+            }
+            for current, propagated in zip(current_data, relation_end.propagated_data)
+        ]
+        if not any(deltas):
+            return
+        relation_end.propagated_data = current_data
+        remote = relation_end.remote
+        remote_application = remote.application  # type: ignore[union-attr]
+        pending = self._pending_relation_changed(remote, dispatch.end)  # type: ignore[arg-type]
+        if pending is None:
+            pending = Dispatch("relation-changed", remote.endpoint, remote)  # type: ignore[union-attr]  # noqa: E501
+            remote_application.queue.append(pending)
+        pending.ready = max(pending.ready, dispatch.end)
+        pending.cause = dispatch
+        pending.app_data.update(deltas[0])
+        pending.unit_data.update(deltas[1])
+
+    def _pending_relation_changed(
+        self, relation_end: RelationEnd, time: float
+    ) -> Optional[Dispatch]:
+        """Returns the relation-changed hook queued for a relation end which starts after a time.
+
+        Juju merges the changes of the relation data into such a hook.
+        """
+        start = relation_end.application.clock
+        for queued in relation_end.application.queue:
+            start = max(start, queued.ready)
+            if queued.kind == "relation-changed" and queued.relation_end is relation_end:
+                if start >= time:
+                    return queued
+            start += self.hook_overhead
+        return None
+
+    def _record_status(self, application: Application, dispatch: Dispatch) -> None:
+        if isinstance(application, CharmApplication):
+            if application.became_active is None and application.is_active:
+                application.became_active = dispatch.end
+        if self.all_active is None and all(charm.is_active for charm in self.charms):
+            self.all_active = dispatch
+
+    def critical_path(self) -> List[Dispatch]:
+        """Returns the chain of hooks which ends with all applications becoming active."""
+        path = []
+        dispatch = self.all_active
+        while dispatch is not None:
+            path.append(dispatch)
+            dispatch = dispatch.predecessor
+        return path[::-1]
+
+    def _application_report(self, charm: CharmApplication) -> dict:
+        handlers = [
+            metrics
+            for name, metrics in self.recorder.handlers.items()
+            if name.startswith(f"{charm.name}:")
+        ]
+        return {
+            "dispatches": charm.dispatches,
+            **charm.metrics,
+            "reemitted": sum(metrics["reemitted"] for metrics in handlers),
+            "wall_time": sum(metrics["wall_time"] for metrics in handlers),
+            "time_to_active": charm.became_active,
+            "status": charm.status,
+            "errors": charm.errors,
+        }
+
+    def report(self) -> dict:
+        """Returns the report of the bring-up.
+
+        Dispatches, deferred events and re-emissions are counted for the charms of the
+        repository only. Times are in simulated seconds, except wall times which are the time
+        spent in the handlers.
+
+        Returns:
+            dict: Report
+        """
+        applications = {charm.name: self._application_report(charm) for charm in self.charms}
+        critical_path = self.critical_path()
+        return {
+            "hook_overhead": self.hook_overhead,
+            "update_status_interval": self.update_status_interval,
+            "dispatches": sum(app["dispatches"] for app in applications.values()),
+            "deferred": sum(app["deferred"] for app in applications.values()),
+            "reemitted": sum(app["reemitted"] for app in applications.values()),
+            "update_status_runs": self.update_status_runs,
+            "all_active": self.all_active is not None,
+            "time_to_active": self.all_active.end if self.all_active else None,
+            "critical_path": [str(dispatch) for dispatch in critical_path],
+            "applications": applications,
+            "stand_ins": {
+                app.name: {"dispatches": app.dispatches}
+                for app in self.applications.values()
+                if not isinstance(app, CharmApplication)
+            },
+        }
+
+
+def parse_arguments(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate the bring-up of the bundle.")
+    parser.add_argument(
+        "--template", type=Path, default=BUNDLE_TEMPLATE, help="path to the bundle template"
+    )
+    parser.add_argument(
+        "--hook-overhead",
+        type=float,
+        default=1.0,
+        help="simulated duration of a hook dispatch, in seconds",
+    )
+    parser.add_argument(
+        "--update-status-interval",
+        type=float,
+        default=300.0,
+        help="simulated interval between update-status hooks, in seconds",
+    )
+    parser.add_argument(
+        "--max-update-status-runs",
+        type=int,
+        default=12,
+        help="number of update-status runs after which the simulation ends",
+    )
+    parser.add_argument("--output", type=Path, help="path to the JSON report")
+    parser.add_argument("--repository", type=Path, default=REPOSITORY_ROOT, help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+
+def print_summary(report: dict) -> None:
+    """Prints the totals, the critical path and the applications which aren't active."""
+    print(
+        f"dispatches={report['dispatches']} deferred={report['deferred']} "
+        f"reemitted={report['reemitted']} update_status_runs={report['update_status_runs']}"
+    )
+    if report["all_active"]:
+        print(
+            f"All applications active after {report['time_to_active']:.0f}s, critical path "
+            f"({len(report['critical_path'])} hooks):"
+        )
+        print("\n".join(f"  {hook}" for hook in report["critical_path"]))
+    for name, application in report["applications"].items():
+        if not application["status"].startswith("active"):
+            print(f"{name} is not active ({application['status']})")
+        for error in application["errors"]:
+            print(f"{name} error: {error}")
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    arguments = parse_arguments(args)
+    simulation = BundleSimulation(
+        load_bundle(arguments.template),
+        arguments.repository,
+        hook_overhead=arguments.hook_overhead,
+        update_status_interval=arguments.update_status_interval,
+        max_update_status_runs=arguments.max_update_status_runs,
+    )
+    report = simulation.run()
+    if arguments.output:
+        with open(arguments.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    print_summary(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Measures the cold-start import time of the charms of the repository.
+
+Every hook runs in a new Python process which imports the charm module, so whatever the charm and
+its libraries import at module level is paid by every hook, including the ones which don't need
+it (ex. `update-status`). Each charm is imported in a fresh interpreter run with
+`python -X importtime`, and the report gives:
+
+| Metric            | Description                                                             |
+|:------------------|:------------------------------------------------------------------------|
+| `import_time`     | Time to import the `charm` module, in seconds (minimum of all runs)     |
+| `ops_import_time` | Time to import `ops` alone in a fresh interpreter (minimum of all runs) |
+| `own_import_time` | Time spent in the modules of `own_modules` (minimum of all runs)        |
+| `own_modules`     | Number of modules imported by the charm on top of the baseline          |
+| `heavy_modules`   | Heavy dependencies imported at module level (see `HEAVY_MODULES`)       |
+| `libraries`       | Upstream charm libraries imported by the charm                          |
+
+The baseline is `ops` and the upstream charm libraries the charm imports (ex.
+`kubernetes_service_patch`, which imports `lightkube` at module level, or `orc8r_base_db`, which
+imports `psycopg2`). They are vendored unmodified, so their imports are out of the charm's control
+and are left out of the check. A charm fails the check when its own code or the libraries published
+from this repository (see `OWN_LIBRARIES`) import one of the heavy dependencies at module level,
+when they import more than `OWN_MODULES_BUDGET` modules on top of the baseline, or when their
+import time exceeds `OWN_IMPORT_TIME_BUDGET` times the import time of `ops`. Module counts don't
+depend on the machine, and measuring time relative to `ops`, which every charm imports, keeps the
+time budget independent of the machine's speed.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from main import REPOSITORY_ROOT, find_charms
+
+# Dependencies which must only be imported by the code paths using them
+HEAVY_MODULES = ("cryptography", "httpx", "jinja2", "jsonschema", "lightkube", "psycopg2")
+BASELINE_MODULE = "ops"
+# Charm libraries published from this repository, the others are vendored from Charmhub
+OWN_LIBRARIES = ("magma_orc8r_certifier",)
+OWN_MODULES_BUDGET = 40
+# Generous, as import times vary a lot from one run to another on loaded machines
+OWN_IMPORT_TIME_BUDGET = 0.5
+IMPORT_TIMEOUT = 60
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+CHARM_LIBRARY = re.compile(r"^charms\.(\w+)\.v\d+\.\w+$")
+
+
+def parse_import_times(output: str, self_time: bool = False) -> Dict[str, int]:
+    """Parses the output of `python -X importtime`.
+
+    Args:
+        output (str): Standard error of the interpreter
+        self_time (bool): Whether to return the time spent in each module itself, excluding the
+            modules it imports
+
+    Returns:
+        dict: Cumulative (or self) import times in microseconds, keyed by module name
+    """
+    import_times = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            import_times[match.group(4)] = int(match.group(1 if self_time else 2))
+    return import_times
+
+
+def upstream_libraries(modules: Iterable[str]) -> List[str]:
+    """Returns the upstream charm libraries among imported modules.
+
+    Args:
+        modules (iterable): Names of the imported modules
+
+    Returns:
+        list: Module names of the charm libraries which aren't part of `OWN_LIBRARIES`
+    """
+    return sorted(
+        module
+        for module in modules
+        if (match := CHARM_LIBRARY.match(module)) and match.group(1) not in OWN_LIBRARIES
+    )
+
+
+def _import(modules: List[str], charm_dir: Path) -> str:
+    python_path = [str(charm_dir / "lib"), str(charm_dir / "src")]
+    if os.environ.get("PYTHONPATH"):
+        python_path.append(os.environ["PYTHONPATH"])
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True,
+        check=True,
+        cwd=charm_dir,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(python_path)},
+        text=True,
+        timeout=IMPORT_TIMEOUT,
+    )
+    return process.stderr
+
+
+def measure_import_time(charm_dir: Path, runs: int = 3) -> dict:
+    """Imports a charm in fresh interpreters and returns its import time.
+
+    Args:
+        charm_dir (Path): Charm directory
+        runs (int): Number of imports, times are the minimum of all runs
+
+    Returns:
+        dict: Import times in seconds, modules imported on top of the baseline, heavy modules
+            imported at module level and upstream libraries imported
+    """
+    charm_runs = [_import(["charm"], charm_dir) for _ in range(runs)]
+    charm_import_times = parse_import_times(charm_runs[0])
+    libraries = upstream_libraries(charm_import_times)
+    baseline_runs = [_import([BASELINE_MODULE, *libraries], charm_dir) for _ in range(runs)]
+    own_modules = set(charm_import_times) - set(parse_import_times(baseline_runs[0]))
+    import_time = min(parse_import_times(output)["charm"] for output in charm_runs)
+    ops_import_time = min(parse_import_times(output)[BASELINE_MODULE] for output in baseline_runs)
+    # Summing self times within each run keeps the baseline out without subtracting timings of
+    # different interpreters
+    own_import_time = min(
+        sum(self_times.get(module, 0) for module in own_modules)
+        for self_times in (parse_import_times(output, self_time=True) for output in charm_runs)
+    )
+    return {
+        "import_time": import_time / 1e6,
+        "ops_import_time": ops_import_time / 1e6,
+        "own_import_time": own_import_time / 1e6,
+        "own_modules": len(own_modules),
+        "heavy_modules": sorted(
+            {module.split(".")[0] for module in own_modules} & set(HEAVY_MODULES)
+        ),
+        "libraries": libraries,
+    }
+
+
+def check_import_time(results: dict) -> List[str]:
+    """Returns the reasons why the import of a charm is too slow.
+
+    Args:
+        results (dict): Results of `measure_import_time`
+
+    Returns:
+        list: Problems found, empty if the import is within budget
+    """
+    problems = [f"imports {module} at module level" for module in results["heavy_modules"]]
+    if results["own_modules"] > OWN_MODULES_BUDGET:
+        problems.append(
+            f"imports {results['own_modules']} modules on top of the baseline, "
+            f"more than {OWN_MODULES_BUDGET}"
+        )
+    budget = OWN_IMPORT_TIME_BUDGET * results["ops_import_time"]
+    if results["own_import_time"] > budget:
+        problems.append(
+            f"own import time {results['own_import_time'] * 1000:.1f}ms exceeds "
+            f"{budget * 1000:.1f}ms ({OWN_IMPORT_TIME_BUDGET:.0%} of ops import time)"
+        )
+    return problems
+
+
+def parse_arguments(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0], formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--charms",
+        nargs="*",
+        help="charm names (ex. orc8r-accessd), all the charms of the repository by default",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3, help="number of imports of each charm, minimum is kept"
+    )
+    parser.add_argument("--output", type=Path, help="path to a JSON report")
+    parser.add_argument("--repository", type=Path, default=REPOSITORY_ROOT, help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    arguments = parse_arguments(args)
+    charms = find_charms(arguments.repository, arguments.charms)
+    report = {}
+    failed = False
+    for name, charm_dir in charms.items():
+        report[name] = measure_import_time(charm_dir, arguments.runs)
+        problems = check_import_time(report[name])
+        failed = failed or bool(problems)
+        print(
+            f"{name} import_time={report[name]['import_time'] * 1000:.1f}ms "
+            f"own_import_time={report[name]['own_import_time'] * 1000:.1f}ms "
+            f"own_modules={report[name]['own_modules']}"
+        )
+        for problem in problems:
+            print(f"  {problem}")
+    if arguments.output:
+        with open(arguments.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Benchmarks the hook handlers of all the charms of the repository.
+
+Every charm (`src/charm.py` of each `*-operator` directory) is benchmarked in its own process by
+`benchmark.py`, and the results are written to a JSON report. Reports of two commits can be
+compared using `--compare`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+REPOSITORY_ROOT = Path(__file__).resolve().parents[2]
+BENCHMARK_SCRIPT = Path(__file__).resolve().parent / "benchmark.py"
+BENCHMARK_TIMEOUT = 600
+REPORT_TOTALS = (
+    "wall_time",
+    "handler_calls",
+    "pebble_calls",
+    "relation_reads",
+    "relation_writes",
+    "deferred",
+)
+
+
+def parse_arguments(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--charms",
+        nargs="*",
+        help="charm names (ex. orc8r-accessd), all the charms of the repository by default",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=5,
+        help="number of lifecycle runs of each charm, wall times are the median of all runs",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("hook-benchmark.json"), help="path to the report"
+    )
+    parser.add_argument("--compare", type=Path, help="path to a report to compare results with")
+    parser.add_argument("--repository", type=Path, default=REPOSITORY_ROOT, help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+
+def find_charms(repository: Path, names: Optional[List[str]] = None) -> Dict[str, Path]:
+    """Returns the charm directories of the repository.
+
+    Args:
+        repository (Path): Repository root
+        names (list): Names of the charms to return, all of them if not set
+
+    Returns:
+        dict: Charm directories, keyed by charm name
+    """
+    charms = {
+        charm_module.parents[1].name[: -len("-operator")]: charm_module.parents[1]
+        for charm_module in sorted(repository.glob("*-operator/src/charm.py"))
+    }
+    if names:
+        unknown_charms = set(names) - set(charms)
+        if unknown_charms:
+            raise ValueError(f"Unknown charms: {', '.join(sorted(unknown_charms))}")
+        charms = {name: charms[name] for name in names}
+    return charms
+
+
+def benchmark_charm(charm_dir: Path, iterations: int) -> dict:
+    """Benchmarks a charm in its own process.
+
+    Args:
+        charm_dir (Path): Charm directory
+        iterations (int): Number of lifecycle runs
+
+    Returns:
+        dict: Charm results, or the error if the benchmark failed
+    """
+    python_path = [str(charm_dir / "lib"), str(charm_dir / "src")]
+    if os.environ.get("PYTHONPATH"):
+        python_path.append(os.environ["PYTHONPATH"])
+    process = subprocess.run(
+        [sys.executable, str(BENCHMARK_SCRIPT), str(charm_dir), "--iterations", str(iterations)],
+        capture_output=True,
+        cwd=charm_dir,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(python_path)},
+        text=True,
+        timeout=BENCHMARK_TIMEOUT,
+    )
+    if process.returncode:
+        error = process.stderr.strip().splitlines()[-1:] or [f"exit code {process.returncode}"]
+        return {"error": error[0]}
+    return json.loads(process.stdout)
+
+
+def _commit(repository: Path) -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=repository,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(charms: Dict[str, Path], iterations: int, repository: Path) -> dict:
+    """Benchmarks charms and returns the report.
+
+    Args:
+        charms (dict): Charm directories, keyed by charm name
+        iterations (int): Number of lifecycle runs of each charm
+        repository (Path): Repository root
+
+    Returns:
+        dict: Report
+    """
+    results = {}
+    for name, charm_dir in charms.items():
+        logger.info("Benchmarking %s", name)
+        results[name] = benchmark_charm(charm_dir, iterations)
+        if "error" in results[name]:
+            logger.error("Failed to benchmark %s: %s", name, results[name]["error"])
+    return {
+        "commit": _commit(repository),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "iterations": iterations,
+        "charms": results,
+    }
+
+
+def _format_total(name: str, value: float) -> str:
+    return f"{value * 1000:.2f}ms" if name == "wall_time" else str(value)
+
+
+def compare_reports(baseline: dict, report: dict) -> List[str]:
+    """Returns the changes of the charm totals between two reports.
+
+    Args:
+        baseline (dict): Report to compare with
+        report (dict): New report
+
+    Returns:
+        list: Lines formatted as `<charm> <total>: <baseline value> -> <value> (<change>)`
+    """
+    changes = []
+    for name, results in report["charms"].items():
+        baseline_totals = baseline["charms"].get(name, {}).get("totals")
+        if "totals" not in results or not baseline_totals:
+            continue
+        for total in REPORT_TOTALS:
+            old_value, new_value = baseline_totals[total], results["totals"][total]
+            if old_value == new_value:
+                continue
+            change = f"{100 * (new_value - old_value) / old_value:+.1f}%" if old_value else "new"
+            changes.append(
+                f"{name} {total}: {_format_total(total, old_value)} -> "
+                f"{_format_total(total, new_value)} ({change})"
+            )
+    return changes
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    arguments = parse_arguments(args)
+    baseline = None
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    charms = find_charms(arguments.repository, arguments.charms)
+    report = run_benchmarks(charms, arguments.iterations, arguments.repository)
+    with open(arguments.output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    logger.info("Report written to %s", arguments.output)
+    for name, results in report["charms"].items():
+        if "totals" in results:
+            print(
+                name,
+                " ".join(
+                    f"{total}={_format_total(total, results['totals'][total])}"
+                    for total in REPORT_TOTALS
+                ),
+            )
+    if baseline:
+        print(f"\nChanges since {baseline.get('commit') or arguments.compare}:")
+        print("\n".join(compare_reports(baseline, report)) or "No changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Creates a minimal charm directory to benchmark."""
+
+from pathlib import Path
+
+METADATA = """
+name: fake
+containers:
+  workload:
+    resource: workload-image
+resources:
+  workload-image:
+    type: oci-image
+requires:
+  database:
+    interface: postgresql_client
+"""
+
+CHARM = """
+from ops.charm import CharmBase
+from ops.main import main
+from ops.model import ActiveStatus
+
+
+class FakeCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.framework.observe(self.on.install, self._on_install)
+        self.framework.observe(
+            self.on.database_relation_created, self._on_database_relation_created
+        )
+        self.framework.observe(self.on.database_relation_joined, self._on_database_relation_joined)
+        self.framework.observe(
+            self.on.database_relation_changed, self._on_database_relation_changed
+        )
+
+    def _on_install(self, event):
+        container = self.unit.get_container("workload")
+        if not container.can_connect():
+            event.defer()
+            return
+        container.push("/etc/fake/fake.conf", "fake", make_dirs=True)
+
+    def _on_database_relation_created(self, event):
+        event.relation.data[self.app]["database"] = "fake"
+
+    def _on_database_relation_joined(self, event):
+        remote_data = event.relation.data[event.app]
+        event.relation.data[self.unit]["active"] = remote_data.get("ready", "False")
+
+    def _on_database_relation_changed(self, event):
+        if event.relation.data[event.app].get("username"):
+            self.unit.status = ActiveStatus()
+
+
+if __name__ == "__main__":
+    main(FakeCharm)
+"""
+
+
+def create_fake_charm(directory: Path) -> Path:
+    """Creates a charm which defers its install event until its workload container is ready.
+
+    The charm requests a database, and becomes active once it gets database credentials.
+
+    Args:
+        directory (Path): Parent directory of the charm
+
+    Returns:
+        Path: Charm directory
+    """
+    charm_dir = directory / "fake-operator"
+    (charm_dir / "src").mkdir(parents=True)
+    (charm_dir / "lib").mkdir()
+    (charm_dir / "metadata.yaml").write_text(METADATA)
+    (charm_dir / "src" / "charm.py").write_text(CHARM)
+    return charm_dir
@@ -0,0 +1,66 @@
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmark import benchmark_charm  # noqa: E402
+from tests.fake_charm import create_fake_charm  # noqa: E402
+
+
+class TestBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = TemporaryDirectory()
+        cls.results = benchmark_charm(create_fake_charm(Path(cls.directory.name)), iterations=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_given_charm_when_benchmark_charm_then_lifecycle_steps_are_run_in_order(self):
+        self.assertEqual(
+            [
+                "install",
+                "leader-elected",
+                "config-changed",
+                "start",
+                "pebble-ready:workload",
+                "relation-joined:database",
+                "config-changed:after-relations",
+                "update-status",
+            ],
+            [step["step"] for step in self.results["steps"]],
+        )
+        self.assertFalse([step for step in self.results["steps"] if "error" in step])
+
+    def test_given_handler_deferring_event_when_benchmark_charm_then_deferrals_are_recorded(self):
+        install = self.results["handlers"]["FakeCharm._on_install"]
+
+        self.assertEqual(["install"], install["events"])
+        self.assertEqual(6, install["calls"])
+        self.assertEqual(5, install["reemitted"])
+        self.assertEqual(5, install["deferred"])
+        self.assertEqual(5, self.results["totals"]["deferred"])
+
+    def test_given_handler_using_pebble_when_benchmark_charm_then_pebble_calls_are_counted(self):
+        install = self.results["handlers"]["FakeCharm._on_install"]
+        relation_joined_step = self.results["steps"][5]
+
+        # One connectivity check per call, and the push once the container is ready
+        self.assertEqual(7, install["pebble_calls"])
+        self.assertEqual(2, relation_joined_step["pebble_calls"])
+
+    def test_given_handler_using_relation_data_when_benchmark_charm_then_reads_and_writes_are_counted(  # noqa: E501
+        self,
+    ):
+        relation_joined = self.results["handlers"]["FakeCharm._on_database_relation_joined"]
+
+        self.assertEqual(1, relation_joined["calls"])
+        self.assertEqual(1, relation_joined["relation_reads"])
+        self.assertEqual(1, relation_joined["relation_writes"])
+        self.assertGreater(relation_joined["wall_time"], 0)
@@ -0,0 +1,114 @@
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bundle_simulator import BundleSimulation, load_bundle  # noqa: E402
+from tests.fake_charm import create_fake_charm  # noqa: E402
+
+BUNDLE_TEMPLATE = """
+bundle: kubernetes
+applications:
+  fake:
+    {%- if local == true %}
+    charm: ./magma-fake_ubuntu-22.04-amd64.charm
+    {%- else %}
+    charm: magma-fake
+    {%- endif %}
+    scale: 1
+  postgresql-k8s:
+    charm: postgresql-k8s
+    scale: 1
+  unrelated:
+    charm: unrelated
+    scale: 1
+relations:
+  - [fake, postgresql-k8s]
+"""
+
+
+def create_bundle_template(directory: Path, extra_relations: str = "") -> Path:
+    template = directory / "bundle.yaml.j2"
+    template.write_text(BUNDLE_TEMPLATE + extra_relations)
+    return template
+
+
+class TestBundleSimulator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = TemporaryDirectory()
+        cls.repository = Path(cls.directory.name)
+        create_fake_charm(cls.repository)
+        cls.bundle = load_bundle(create_bundle_template(cls.repository))
+        cls.simulation = BundleSimulation(cls.bundle, cls.repository)
+        cls.report = cls.simulation.run()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_given_bundle_when_run_then_charms_of_repository_are_run_and_others_stood_in(self):
+        self.assertEqual(["fake"], list(self.report["applications"]))
+        self.assertEqual(["postgresql-k8s", "unrelated"], list(self.report["stand_ins"]))
+        self.assertEqual([], self.report["applications"]["fake"]["errors"])
+
+    def test_given_charm_requesting_database_when_run_then_credentials_are_propagated(self):
+        fake = self.simulation.applications["fake"]
+        relation_id = fake.harness.model.get_relation("database").id
+
+        self.assertEqual(
+            {
+                "database": "fake",
+                "endpoints": "postgresql-k8s-primary:5432",
+                "username": "fake-user",
+                "password": "password",
+            },
+            fake.harness.get_relation_data(relation_id, "postgresql-k8s"),
+        )
+        self.assertEqual(
+            {"active": "False"}, fake.harness.get_relation_data(relation_id, "fake/0")
+        )
+
+    def test_given_charm_deferring_install_when_run_then_dispatches_and_deferrals_are_counted(
+        self,
+    ):
+        self.assertEqual(8, self.report["dispatches"])
+        self.assertEqual(4, self.report["deferred"])
+        self.assertEqual(4, self.report["reemitted"])
+        self.assertEqual(0, self.report["update_status_runs"])
+        self.assertEqual(5, self.report["stand_ins"]["postgresql-k8s"]["dispatches"])
+
+    def test_given_charm_waiting_for_database_when_run_then_critical_path_goes_through_database(
+        self,
+    ):
+        self.assertTrue(self.report["all_active"])
+        self.assertEqual(8.0, self.report["time_to_active"])
+        self.assertEqual(8.0, self.report["applications"]["fake"]["time_to_active"])
+        self.assertEqual(
+            [
+                "fake install",
+                "fake leader-elected",
+                "fake config-changed",
+                "fake start",
+                "fake pebble-ready:workload",
+                "fake relation-created:database",
+                "postgresql-k8s relation-changed:database",
+                "fake relation-changed:database",
+            ],
+            self.report["critical_path"],
+        )
+
+    def test_given_relation_without_matching_endpoints_when_simulation_run_then_value_error_is_raised(  # noqa: E501
+        self,
+    ):
+        bundle = load_bundle(
+            create_bundle_template(self.repository, extra_relations="  - [fake, unrelated]\n")
+        )
+
+        with self.assertRaises(ValueError):
+            BundleSimulation(bundle, self.repository).run()
@@ -0,0 +1,126 @@
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from import_time import (  # noqa: E402
+    check_import_time,
+    measure_import_time,
+    parse_import_times,
+    upstream_libraries,
+)
+from main import REPOSITORY_ROOT, find_charms  # noqa: E402
+from tests.fake_charm import create_fake_charm  # noqa: E402
+
+IMPORT_TIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       512 |        512 |   _io
+import time:      6567 |      56062 |     ops.pebble
+import time:       347 |      79341 |   ops
+import time:      9654 |     125509 | charm
+"""
+
+
+def results(**overrides) -> dict:
+    return {
+        "import_time": 0.1,
+        "ops_import_time": 0.08,
+        "own_import_time": 0.02,
+        "own_modules": 10,
+        "heavy_modules": [],
+        "libraries": [],
+        **overrides,
+    }
+
+
+class TestImportTime(unittest.TestCase):
+    def test_given_importtime_output_when_parse_import_times_then_cumulative_times_are_returned(
+        self,
+    ):
+        self.assertEqual(
+            {"_io": 512, "ops.pebble": 56062, "ops": 79341, "charm": 125509},
+            parse_import_times(IMPORT_TIME_OUTPUT),
+        )
+
+    def test_given_importtime_output_when_parse_self_import_times_then_self_times_are_returned(
+        self,
+    ):
+        self.assertEqual(
+            {"_io": 512, "ops.pebble": 6567, "ops": 347, "charm": 9654},
+            parse_import_times(IMPORT_TIME_OUTPUT, self_time=True),
+        )
+
+    def test_given_imported_modules_when_upstream_libraries_then_own_libraries_are_excluded(self):
+        self.assertEqual(
+            [
+                "charms.magma_orc8r_libs.v1.orc8r_base_db",
+                "charms.observability_libs.v1.kubernetes_service_patch",
+            ],
+            upstream_libraries(
+                [
+                    "charms",
+                    "charms.magma_orc8r_certifier.v0.cert_admin_operator",
+                    "charms.magma_orc8r_libs.v1.orc8r_base_db",
+                    "charms.observability_libs.v1.kubernetes_service_patch",
+                    "lightkube",
+                ]
+            ),
+        )
+
+    def test_given_import_within_budget_when_check_import_time_then_no_problem_is_returned(self):
+        self.assertEqual([], check_import_time(results()))
+
+    def test_given_slow_import_when_check_import_time_then_problems_are_returned(self):
+        problems = check_import_time(
+            results(own_import_time=0.3, own_modules=350, heavy_modules=["lightkube"])
+        )
+
+        self.assertEqual(
+            [
+                "imports lightkube at module level",
+                "imports 350 modules on top of the baseline, more than 40",
+                "own import time 300.0ms exceeds 40.0ms (50% of ops import time)",
+            ],
+            problems,
+        )
+
+    def test_given_charm_importing_heavy_module_when_measure_import_time_then_it_is_reported(
+        self,
+    ):
+        with TemporaryDirectory() as directory:
+            charm_dir = create_fake_charm(Path(directory))
+            charm_module = charm_dir / "src" / "charm.py"
+            charm_module.write_text("import jinja2\n" + charm_module.read_text())
+
+            measured = measure_import_time(charm_dir, runs=1)
+
+        self.assertEqual(["jinja2"], measured["heavy_modules"])
+        self.assertGreater(measured["own_modules"], 0)
+        self.assertGreater(measured["import_time"], measured["ops_import_time"])
+
+    def test_given_upstream_library_importing_heavy_module_when_measure_import_time_then_it_is_not_reported(  # noqa: E501
+        self,
+    ):
+        with TemporaryDirectory() as directory:
+            charm_dir = create_fake_charm(Path(directory))
+            library_dir = charm_dir / "lib" / "charms" / "upstream_libs" / "v0"
+            library_dir.mkdir(parents=True)
+            (library_dir / "upstream.py").write_text("import jinja2\n")
+            charm_module = charm_dir / "src" / "charm.py"
+            charm_module.write_text(
+                "import charms.upstream_libs.v0.upstream\n" + charm_module.read_text()
+            )
+
+            measured = measure_import_time(charm_dir, runs=1)
+
+        self.assertEqual([], measured["heavy_modules"])
+        self.assertEqual(["charms.upstream_libs.v0.upstream"], measured["libraries"])
+
+    def test_given_charms_of_repository_when_imported_then_imports_are_within_budget(self):
+        for name, charm_dir in find_charms(REPOSITORY_ROOT).items():
+            with self.subTest(charm=name):
+                self.assertEqual([], check_import_time(measure_import_time(charm_dir)))
@@ -0,0 +1,78 @@
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from main import compare_reports, find_charms, main  # noqa: E402
+from tests.fake_charm import create_fake_charm  # noqa: E402
+
+
+def report_with_totals(**totals) -> dict:
+    return {
+        "charms": {
+            "fake": {
+                "totals": {
+                    "wall_time": 0.01,
+                    "handler_calls": 8,
+                    "pebble_calls": 7,
+                    "relation_reads": 1,
+                    "relation_writes": 1,
+                    "deferred": 5,
+                    **totals,
+                }
+            }
+        }
+    }
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.repository = Path(self.directory.name)
+        create_fake_charm(self.repository)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_given_charm_names_when_find_charms_then_unknown_charms_are_rejected(self):
+        self.assertEqual({"fake": self.repository / "fake-operator"}, find_charms(self.repository))
+        with self.assertRaises(ValueError):
+            find_charms(self.repository, ["orc8r-unknown"])
+
+    def test_given_reports_when_compare_reports_then_changed_totals_are_returned(self):
+        baseline = report_with_totals()
+        report = report_with_totals(wall_time=0.015, deferred=0)
+
+        self.assertEqual(
+            [
+                "fake wall_time: 10.00ms -> 15.00ms (+50.0%)",
+                "fake deferred: 5 -> 0 (-100.0%)",
+            ],
+            compare_reports(baseline, report),
+        )
+
+    def test_given_repository_when_main_then_report_is_written(self):
+        output = self.repository / "report.json"
+
+        main(
+            [
+                "--repository",
+                str(self.repository),
+                "--iterations",
+                "1",
+                "--output",
+                str(output),
+            ]
+        )
+
+        with open(output) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(1, report["iterations"])
+        self.assertEqual("FakeCharm", report["charms"]["fake"]["charm_class"])
+        self.assertEqual(5, report["charms"]["fake"]["totals"]["deferred"])
@@ -3,6 +3,7 @@
 # See LICENSE file for licensing details.
 
 import logging
+import threading
 
 import boto3
 
@@ -11,6 +12,7 @@ class ELB:
     def __init__(self):
         self.client = boto3.client("elb")
         self.load_balancers = None
+        self._load_balancers_lock = threading.Lock()
 
     def _get_load_balancers(self):
         """
@@ -25,8 +27,9 @@ class ELB:
         :param elb: ELB address (ex. 123-789.us-east-1.elb.amazonaws.com)
         :return: Hosted Zone ID
         """
-        if not self.load_balancers:
-            self._get_load_balancers()
+        with self._load_balancers_lock:
+            if not self.load_balancers:
+                self._get_load_balancers()
         logging.info(f"Retrieving ELB hosted zone id for {elb}")
         for load_balancer in self.load_balancers["LoadBalancerDescriptions"]:
             if load_balancer["DNSName"] == elb:
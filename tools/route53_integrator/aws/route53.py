@@ -28,8 +28,8 @@ class Route53:
         Gets all hosted zones
         :return: Dict of all hosted zones
         """
-        hosted_zones = self.client.list_hosted_zones()
-        return hosted_zones["HostedZones"]
+        paginator = self.client.get_paginator("list_hosted_zones")
+        return [zone for page in paginator.paginate() for zone in page["HostedZones"]]
 
     def create_hosted_zone(self, name: str) -> dict:
         """
@@ -57,17 +57,28 @@ class Route53:
 
     def get_zone_by_name(self, name: str) -> dict:
         """
-        Retrieves zone based on name
+        Retrieves public zone based on name.
+
+        Zones are listed by name starting from the given name, so only zones with that exact name
+        are read, paging through them until a public one is found.
 
         :param name: Zone name
         :return: Zone (or empty dict)
         """
-        hosted_zones = self.list_hosted_zones()
-        for zone in hosted_zones:
-            zone_name = zone["Name"][:-1]
-            if zone_name == name:
-                return zone
-        return {}
+        dns_name = f"{name.rstrip('.').lower()}."
+        params = {"DNSName": dns_name, "MaxItems": "10"}
+        while True:
+            response = self.client.list_hosted_zones_by_name(**params)
+            for zone in response["HostedZones"]:
+                if zone["Name"].lower() != dns_name:
+                    return {}
+                if not zone.get("Config", {}).get("PrivateZone"):
+                    return zone
+            if not response.get("IsTruncated") or response["NextDNSName"].lower() != dns_name:
+                return {}
+            params.update(
+                DNSName=response["NextDNSName"], HostedZoneId=response["NextHostedZoneId"]
+            )
 
     def create_hosted_zone_if_doesnt_exist(self, name: str) -> dict:
         """
@@ -82,45 +93,55 @@ class Route53:
         else:
             return self.create_hosted_zone(name)
 
-    def create_alias_resource_a_record(
-            self,
-            name: str,
-            alias_target_hosted_zone_id: str,
-            alias_target_dns_name: str,
-            hosted_zone_id: str,
-    ):
+    def upsert_alias_resource_a_records(self, a_records: list, hosted_zone_id: str) -> str:
         """
-        Creates an A record associated with an Alias.
+        Creates or updates A records associated with Aliases, using a single change batch.
 
-        :param name: A record name
-        :param alias_target_hosted_zone_id: Alias target hosted zone id
-        :param alias_target_dns_name: Alias target DNS name
+        :param a_records: A records, as dicts with the `name`, `alias_target_hosted_zone_id` and
+            `alias_target_dns_name` keys
         :param hosted_zone_id: Route53 Hosted Zone ID
+        :return: Change ID
         """
-        logging.info(f"Creating alias resource A record for {name}")
+        logging.info(f"Upserting {len(a_records)} alias resource A records")
         change_batch = {
-            "Comment": "Creating Alias resource record sets in Route 53",
-            "Changes": [{
-                "Action": "CREATE",
-                "ResourceRecordSet": {
-                    "Name": name,
-                    "Type": "A",
-                    "AliasTarget": {
-                        "HostedZoneId": alias_target_hosted_zone_id,
-                        "DNSName": alias_target_dns_name,
-                        "EvaluateTargetHealth": True
-                    }}
-            },
+            "Comment": "Upserting Alias resource record sets in Route 53",
+            "Changes": [
+                {
+                    "Action": "UPSERT",
+                    "ResourceRecordSet": {
+                        "Name": a_record["name"],
+                        "Type": "A",
+                        "AliasTarget": {
+                            "HostedZoneId": a_record["alias_target_hosted_zone_id"],
+                            "DNSName": a_record["alias_target_dns_name"],
+                            "EvaluateTargetHealth": True
+                        }
+                    }
+                }
+                for a_record in a_records
             ]
         }
-        try:
-            self.client.change_resource_record_sets(
-                HostedZoneId=hosted_zone_id,
-                ChangeBatch=change_batch
-            )
-            logging.info(f"Alias resource created for {name}")
-        except self.client.exceptions.InvalidChangeBatch as e:
-            if "already exists" in str(e):
-                logging.info(f"A Record {name} already exists in hosted zone, not doing anything")
-            else:
-                raise e
+        response = self.client.change_resource_record_sets(
+            HostedZoneId=hosted_zone_id,
+            ChangeBatch=change_batch
+        )
+        change_id = response["ChangeInfo"]["Id"].split("/")[-1]
+        logging.info(f"Alias resources submitted in change {change_id}")
+        return change_id
+
+    def wait_for_change_insync(self, change_id: str, timeout: int = 300, delay: int = 5):
+        """
+        Waits for a change to be propagated to all Route53 DNS servers (INSYNC status).
+
+        :param change_id: Change ID
+        :param timeout: Maximum time to wait, in seconds
+        :param delay: Time between two status checks, in seconds
+        :raises botocore.exceptions.WaiterError: if the change isn't INSYNC before the timeout
+        """
+        logging.info(f"Waiting for change {change_id} to be INSYNC")
+        waiter = self.client.get_waiter("resource_record_sets_changed")
+        waiter.wait(
+            Id=change_id,
+            WaiterConfig={"Delay": delay, "MaxAttempts": max(1, timeout // delay)}
+        )
+        logging.info(f"Change {change_id} is INSYNC")
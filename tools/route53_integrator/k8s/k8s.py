@@ -3,11 +3,12 @@
 # See LICENSE file for licensing details.
 
 import logging
+import threading
 
 import httpx
 from lightkube import Client
-from lightkube.core.exceptions import ConfigError
-from lightkube.resources.core_v1 import Service, Node
+from lightkube.core.exceptions import ApiError, ConfigError
+from lightkube.resources.core_v1 import Service
 
 
 class K8sError(Exception):
@@ -29,13 +30,19 @@ class K8s:
 
     def _validate_credentials(self):
         """
-        Tries credentials against an API call to kubernetes and raises if it fails
+        Tries credentials against an API call to kubernetes and raises if it fails.
+
+        Lists at most one service of the namespace, which is cheap whatever the cluster size and
+        checks the access the script needs.
         """
         try:
-            for _ in self.client.list(Node):
-                pass
+            next(iter(self.client.list(Service, namespace=self.namespace, chunk_size=1)), None)
         except (ConfigError, httpx.ConnectTimeout):
             raise CredentialsError()
+        except ApiError as e:
+            if e.status.code in (401, 403):
+                raise CredentialsError()
+            raise e
 
     def get_service(self, name: str) -> Service:
         """
@@ -47,15 +54,69 @@ class K8s:
         logging.info(f"Getting service {name} from kubernetes")
         return self.client.get(Service, name, namespace=self.namespace)
 
-    def get_service_load_balancer_address(self, name: str) -> str:
+    def get_service_load_balancer_address(self, name: str, timeout: float = 600) -> str:
         """
-        Retrieves LoadBalancer address based on service name
+        Retrieves LoadBalancer address based on service name, waiting for it to be assigned
         :param name: Service name
+        :param timeout: Maximum time to wait for the address, in seconds
         :return: LoadBalancer address
         """
-        logging.info(f"Getting LoadBalancer address for service {name}")
-        service = self.get_service(name)
-        ingresses = service.status.loadBalancer.ingress
-        load_balancer_hostname = ingresses[0].hostname
-        logging.info(f"LoadBalancer address: {load_balancer_hostname}")
-        return load_balancer_hostname
+        return self.wait_for_load_balancer_addresses([name], timeout)[name]
+
+    def wait_for_load_balancer_addresses(self, names: [str], timeout: float = 600) -> dict:
+        """
+        Waits for LoadBalancer services to be assigned an address, using a single watch on the
+        namespace services. Services which already have an address are returned right away, as
+        the watch starts with an event for every existing service.
+
+        :param names: Service names
+        :param timeout: Maximum time to wait for all addresses, in seconds
+        :return: LoadBalancer address (hostname or IP) of each service, keyed by service name
+        :raises TimeoutError: if some services weren't assigned an address before the timeout
+        """
+        logging.info(f"Waiting for LoadBalancer addresses of services {', '.join(names)}")
+        addresses = {}
+        errors = []
+        watch_done = threading.Event()
+
+        def watch_services():
+            try:
+                for _, service in self.client.watch(Service, namespace=self.namespace):
+                    name = service.metadata.name
+                    address = self._load_balancer_address(service)
+                    if name in names and address and name not in addresses:
+                        logging.info(f"LoadBalancer address of service {name}: {address}")
+                        addresses[name] = address
+                    if len(addresses) == len(names):
+                        return
+            except Exception as e:
+                errors.append(e)
+            finally:
+                watch_done.set()
+
+        # The watch only yields on service events, so it runs in a daemon thread for the timeout
+        # to apply even when services don't change.
+        threading.Thread(target=watch_services, daemon=True).start()
+        if not watch_done.wait(timeout):
+            missing_services = [name for name in names if name not in addresses]
+            raise TimeoutError(
+                f"Timed out after {timeout}s waiting for LoadBalancer addresses of services "
+                f"{', '.join(missing_services)}"
+            )
+        if errors:
+            raise errors[0]
+        return {name: addresses[name] for name in names}
+
+    @staticmethod
+    def _load_balancer_address(service: Service) -> str:
+        """
+        Returns the first LoadBalancer ingress address of a service
+        :param service: Service object
+        :return: LoadBalancer hostname or IP (empty if not assigned yet)
+        """
+        if not service.status or not service.status.loadBalancer:
+            return ""
+        for ingress in service.status.loadBalancer.ingress or []:
+            if ingress.hostname or ingress.ip:
+                return ingress.hostname or ingress.ip
+        return ""
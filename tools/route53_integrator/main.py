@@ -24,7 +24,10 @@ already be configured.
 """
 
 
-def parse_arguments() -> (str, str):
+CHANGE_INSYNC_TIMEOUT = 300
+
+
+def parse_arguments(args: [str] = None) -> (str, str, bool, int):
     parser = argparse.ArgumentParser(description=DESCRIPTION)
     parser.add_argument(
         '--hosted_zone',
@@ -38,8 +41,19 @@ def parse_arguments() -> (str, str):
         help='Kubernetes namespace',
         required=True
     )
-    args = parser.parse_args()
-    return args.hosted_zone, args.namespace
+    parser.add_argument(
+        '--yes',
+        action='store_true',
+        help='Create the records without asking for confirmation'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=int,
+        default=600,
+        help='Maximum time to wait for the LoadBalancer addresses to be assigned, in seconds'
+    )
+    arguments = parser.parse_args(args)
+    return arguments.hosted_zone, arguments.namespace, arguments.yes, arguments.timeout
 
 
 @dataclass
@@ -50,7 +64,7 @@ class ARecord:
     elb_hosted_zone: str = ""
 
 
-def print_disclaimer(hosted_zone: str, a_records: [ARecord]):
+def print_disclaimer(hosted_zone: str, a_records: [ARecord], yes: bool = False):
     headers = ["A Record Name", "LoadBalancer Address", "Kubernetes Service"]
     data_list = [
         [
@@ -63,7 +77,8 @@ def print_disclaimer(hosted_zone: str, a_records: [ARecord]):
     print(f"\nThe hosted zone {hosted_zone} will be created with the following A records:")
     print("\n")
     print(tabulate(data_list, headers=headers))
-    input("\nPress Enter to continue...")
+    if not yes:
+        input("\nPress Enter to continue...")
 
 
 def print_nameservers(nameservers: [str]):
@@ -72,11 +87,8 @@ def print_nameservers(nameservers: [str]):
     print(tabulate(nameserver_list))
 
 
-def main():
-    hosted_zone, namespace = parse_arguments()
-    aws = AWS()
-    k8s = K8s(namespace)
-    a_records = [
+def build_a_records(hosted_zone: str) -> [ARecord]:
+    return [
         ARecord(
             kubernetes_service="nginx-proxy",
             a_record_name=f"*.nms.{hosted_zone}",
@@ -95,25 +107,59 @@ def main():
         ),
     ]
 
+
+def resolve_load_balancers(aws: AWS, k8s: K8s, a_records: [ARecord], timeout: int = 600):
+    """
+    Waits for the LoadBalancer address of all A records and retrieves their ELB hosted zone
+
+    :param aws: AWS client
+    :param k8s: Kubernetes client
+    :param a_records: A records, updated in place
+    :param timeout: Maximum time to wait for the LoadBalancer addresses, in seconds
+    """
+    load_balancer_addresses = k8s.wait_for_load_balancer_addresses(
+        [a_record.kubernetes_service for a_record in a_records], timeout=timeout
+    )
     for a_record in a_records:
-        load_balancer_address = k8s.get_service_load_balancer_address(a_record.kubernetes_service)
-        elb_hosted_zone = aws.elb.get_hosted_zone_id(load_balancer_address)
-        a_record.load_balancer_address = load_balancer_address
-        a_record.elb_hosted_zone = elb_hosted_zone
+        a_record.load_balancer_address = load_balancer_addresses[a_record.kubernetes_service]
+        # Load balancers are described once and cached, so this doesn't call AWS for every record
+        a_record.elb_hosted_zone = aws.elb.get_hosted_zone_id(a_record.load_balancer_address)
 
-    print_disclaimer(hosted_zone, a_records)
 
+def create_records(aws: AWS, hosted_zone: str, a_records: [ARecord]) -> [str]:
+    """
+    Creates the hosted zone if needed and upserts all A records in a single change batch
+
+    :param aws: AWS client
+    :param hosted_zone: Hosted zone name
+    :param a_records: A records
+    :return: Nameservers of the hosted zone
+    """
     route53_zone = aws.route53.create_hosted_zone_if_doesnt_exist(hosted_zone)
     route53_zone_id = route53_zone["HostedZone"]["Id"].split("/")[-1]
+    change_id = aws.route53.upsert_alias_resource_a_records(
+        a_records=[
+            {
+                "name": a_record.a_record_name,
+                "alias_target_dns_name": a_record.load_balancer_address,
+                "alias_target_hosted_zone_id": a_record.elb_hosted_zone,
+            }
+            for a_record in a_records
+        ],
+        hosted_zone_id=route53_zone_id
+    )
+    aws.route53.wait_for_change_insync(change_id, timeout=CHANGE_INSYNC_TIMEOUT)
+    return route53_zone["DelegationSet"]["NameServers"]
 
-    for a_record in a_records:
-        aws.route53.create_alias_resource_a_record(
-            name=a_record.a_record_name,
-            alias_target_dns_name=a_record.load_balancer_address,
-            alias_target_hosted_zone_id=a_record.elb_hosted_zone,
-            hosted_zone_id=route53_zone_id
-        )
-    nameservers = route53_zone["DelegationSet"]["NameServers"]
+
+def main(args: [str] = None):
+    hosted_zone, namespace, yes, timeout = parse_arguments(args)
+    aws = AWS()
+    k8s = K8s(namespace)
+    a_records = build_a_records(hosted_zone)
+    resolve_load_balancers(aws, k8s, a_records, timeout)
+    print_disclaimer(hosted_zone, a_records, yes)
+    nameservers = create_records(aws, hosted_zone, a_records)
     print_nameservers(nameservers)
 
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import threading
+import unittest
+from unittest.mock import patch
+
+import httpx
+from lightkube.models.core_v1 import (
+    LoadBalancerIngress,
+    LoadBalancerStatus,
+    ServiceStatus,
+)
+from lightkube.models.meta_v1 import ObjectMeta
+from lightkube.resources.core_v1 import Service
+
+from k8s.k8s import CredentialsError, K8s
+
+NAMESPACE = "orc8r"
+
+
+def service(name: str, hostname: str = None, ip: str = None) -> Service:
+    ingress = [LoadBalancerIngress(hostname=hostname, ip=ip)] if hostname or ip else None
+    return Service(
+        metadata=ObjectMeta(name=name, namespace=NAMESPACE),
+        status=ServiceStatus(loadBalancer=LoadBalancerStatus(ingress=ingress)),
+    )
+
+
+class FakeClient:
+    """Local stand-in for the lightkube client, replaying service watch events."""
+
+    def __init__(self, *args, **kwargs):
+        self.events = []
+        self.watches = []
+        self.lists = []
+        self.stop = threading.Event()
+
+    def list(self, resource, namespace=None, chunk_size=None):
+        self.lists.append((resource, namespace, chunk_size))
+        yield service("nginx-proxy")
+        raise AssertionError("More than one service was read")
+
+    def watch(self, resource, namespace=None, **kwargs):
+        self.watches.append((resource, namespace))
+        yield from self.events
+        # Like a real watch, wait for the next event, which never comes
+        self.stop.wait()
+
+
+class TestK8s(unittest.TestCase):
+    def setUp(self):
+        with patch("k8s.k8s.Client", FakeClient):
+            self.k8s = K8s(NAMESPACE)
+        self.addCleanup(self.k8s.client.stop.set)
+
+    def test_given_valid_credentials_when_k8s_then_credentials_are_probed_by_listing_a_single_service(  # noqa: E501
+        self,
+    ):
+        self.assertEqual(self.k8s.client.lists, [(Service, NAMESPACE, 1)])
+
+    def test_given_api_server_unreachable_when_k8s_then_credentials_error_is_raised(self):
+        class UnreachableClient(FakeClient):
+            def list(self, *args, **kwargs):
+                raise httpx.ConnectTimeout("Timed out")
+
+        with patch("k8s.k8s.Client", UnreachableClient):
+            with self.assertRaises(CredentialsError):
+                K8s(NAMESPACE)
+
+    def test_given_services_get_addresses_when_wait_for_load_balancer_addresses_then_addresses_are_returned(  # noqa: E501
+        self,
+    ):
+        self.k8s.client.events = [
+            ("ADDED", service("nginx-proxy")),
+            ("ADDED", service("orc8r-nginx-proxy", ip="10.0.0.1")),
+            ("ADDED", service("unrelated", hostname="unrelated.elb.amazonaws.com")),
+            ("MODIFIED", service("nginx-proxy", hostname="nginx-proxy.elb.amazonaws.com")),
+        ]
+
+        addresses = self.k8s.wait_for_load_balancer_addresses(
+            ["nginx-proxy", "orc8r-nginx-proxy"], timeout=5
+        )
+
+        self.assertEqual(
+            addresses,
+            {"nginx-proxy": "nginx-proxy.elb.amazonaws.com", "orc8r-nginx-proxy": "10.0.0.1"},
+        )
+        self.assertEqual(self.k8s.client.watches, [(Service, NAMESPACE)])
+
+    def test_given_service_never_gets_an_address_when_wait_for_load_balancer_addresses_then_timeout_error_is_raised(  # noqa: E501
+        self,
+    ):
+        self.k8s.client.events = [
+            ("ADDED", service("nginx-proxy", hostname="nginx-proxy.elb.amazonaws.com")),
+            ("ADDED", service("orc8r-nginx-proxy")),
+        ]
+
+        with self.assertRaises(TimeoutError) as context:
+            self.k8s.wait_for_load_balancer_addresses(
+                ["nginx-proxy", "orc8r-nginx-proxy"], timeout=0.1
+            )
+
+        self.assertTrue(str(context.exception).endswith("of services orc8r-nginx-proxy"))
+
+    def test_given_service_has_an_address_when_get_service_load_balancer_address_then_address_is_returned(  # noqa: E501
+        self,
+    ):
+        self.k8s.client.events = [
+            ("ADDED", service("nginx-proxy", hostname="nginx-proxy.elb.amazonaws.com")),
+        ]
+
+        address = self.k8s.get_service_load_balancer_address("nginx-proxy", timeout=5)
+
+        self.assertEqual(address, "nginx-proxy.elb.amazonaws.com")
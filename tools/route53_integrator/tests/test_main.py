@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+import main
+from aws.aws import AWS
+
+HOSTED_ZONE = "example.com"
+ELB_HOSTED_ZONE_ID = "Z35SXDOTRQ7X7K"
+KUBERNETES_SERVICES = [
+    "nginx-proxy",
+    "orc8r-bootstrap-nginx",
+    "orc8r-clientcert-nginx",
+    "orc8r-nginx-proxy",
+]
+
+
+def add_canonical_hosted_zone_name_ids(parsed: dict, **kwargs):
+    """Adds the ELB hosted zone IDs, which moto leaves out of load balancer descriptions."""
+    for load_balancer in parsed.get("LoadBalancerDescriptions", []):
+        load_balancer.setdefault("CanonicalHostedZoneNameID", ELB_HOSTED_ZONE_ID)
+
+
+class FakeK8s:
+    """Local stand-in for the Kubernetes helper, returning known LoadBalancer addresses."""
+
+    def __init__(self, load_balancer_addresses: dict):
+        self.load_balancer_addresses = load_balancer_addresses
+        self.waits = []
+
+    def wait_for_load_balancer_addresses(self, names: [str], timeout: float = 600) -> dict:
+        self.waits.append((names, timeout))
+        return {name: self.load_balancer_addresses[name] for name in names}
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        environment = patch.dict(
+            os.environ,
+            {
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_DEFAULT_REGION": "us-east-1",
+            },
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+        aws_mock = mock_aws()
+        aws_mock.start()
+        self.addCleanup(aws_mock.stop)
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register(
+            "after-call.elastic-load-balancing.DescribeLoadBalancers",
+            add_canonical_hosted_zone_name_ids,
+        )
+        elb = boto3.client("elb")
+        self.load_balancer_addresses = {}
+        for service in KUBERNETES_SERVICES:
+            load_balancer = elb.create_load_balancer(
+                LoadBalancerName=service,
+                Listeners=[{"Protocol": "tcp", "LoadBalancerPort": 443, "InstancePort": 443}],
+                AvailabilityZones=["us-east-1a"],
+            )
+            self.load_balancer_addresses[service] = load_balancer["DNSName"]
+
+    def _alias_a_records(self) -> dict:
+        route53 = boto3.client("route53")
+        zone = route53.list_hosted_zones_by_name(DNSName=HOSTED_ZONE)["HostedZones"][0]
+        record_sets = route53.list_resource_record_sets(HostedZoneId=zone["Id"])
+        return {
+            record_set["Name"]: record_set["AliasTarget"]["DNSName"]
+            for record_set in record_sets["ResourceRecordSets"]
+            if record_set["Type"] == "A"
+        }
+
+    def test_given_yes_when_main_then_alias_a_records_are_created_without_confirmation(self):
+        fake_k8s = FakeK8s(self.load_balancer_addresses)
+
+        with patch("main.K8s", return_value=fake_k8s), patch("builtins.input") as patch_input:
+            main.main(["--hosted_zone", HOSTED_ZONE, "--namespace", "orc8r", "--yes"])
+
+        patch_input.assert_not_called()
+        a_records = self._alias_a_records()
+        self.assertEqual(len(a_records), 4)
+        self.assertTrue(
+            a_records[f"api.{HOSTED_ZONE}."].startswith(
+                self.load_balancer_addresses["orc8r-nginx-proxy"]
+            )
+        )
+
+    def test_given_no_yes_when_main_then_confirmation_is_asked(self):
+        fake_k8s = FakeK8s(self.load_balancer_addresses)
+
+        with patch("main.K8s", return_value=fake_k8s), patch("builtins.input") as patch_input:
+            main.main(["--hosted_zone", HOSTED_ZONE, "--namespace", "orc8r"])
+
+        patch_input.assert_called_once()
+
+    def test_given_a_records_when_create_records_then_records_are_upserted_in_a_single_change_batch(  # noqa: E501
+        self,
+    ):
+        aws = AWS()
+        a_records = main.build_a_records(HOSTED_ZONE)
+        main.resolve_load_balancers(aws, FakeK8s(self.load_balancer_addresses), a_records)
+        change_batches = []
+        aws.route53.client.meta.events.register(
+            "before-parameter-build.route53.ChangeResourceRecordSets",
+            lambda params, **kwargs: change_batches.append(params),
+        )
+
+        main.create_records(aws, HOSTED_ZONE, a_records)
+        main.create_records(aws, HOSTED_ZONE, a_records)
+
+        self.assertEqual(len(change_batches), 2)
+        self.assertEqual(
+            [change["Action"] for change in change_batches[0]["ChangeBatch"]["Changes"]],
+            ["UPSERT"] * 4,
+        )
+        self.assertEqual(len(self._alias_a_records()), 4)
+
+    def test_given_a_records_when_resolve_load_balancers_then_addresses_of_all_services_are_awaited_at_once(  # noqa: E501
+        self,
+    ):
+        aws = AWS()
+        a_records = main.build_a_records(HOSTED_ZONE)
+        fake_k8s = FakeK8s(self.load_balancer_addresses)
+
+        main.resolve_load_balancers(aws, fake_k8s, a_records, timeout=30)
+
+        self.assertEqual(fake_k8s.waits, [(KUBERNETES_SERVICES, 30)])
+        for a_record in a_records:
+            self.assertEqual(
+                a_record.load_balancer_address,
+                self.load_balancer_addresses[a_record.kubernetes_service],
+            )
+            self.assertEqual(a_record.elb_hosted_zone, ELB_HOSTED_ZONE_ID)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+from botocore.stub import Stubber
+from moto import mock_aws
+
+from aws.route53 import Route53
+
+
+class TestRoute53(unittest.TestCase):
+    def setUp(self):
+        environment = patch.dict(
+            os.environ,
+            {
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_DEFAULT_REGION": "us-east-1",
+            },
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+        aws_mock = mock_aws()
+        aws_mock.start()
+        self.addCleanup(aws_mock.stop)
+        self.route53 = Route53()
+        self.route53_calls = []
+        self.route53.client.meta.events.register(
+            "before-parameter-build.route53",
+            lambda params, event_name, **kwargs: self.route53_calls.append(
+                event_name.split(".")[-1]
+            ),
+        )
+
+    def _create_zone(self, name: str, private: bool = False) -> dict:
+        params = {"Name": name, "CallerReference": f"{name}-{private}"}
+        if private:
+            params["HostedZoneConfig"] = {"PrivateZone": True}
+            params["VPC"] = {"VPCRegion": "us-east-1", "VPCId": "vpc-12345678"}
+        return boto3.client("route53").create_hosted_zone(**params)["HostedZone"]
+
+    def test_given_many_zones_when_get_zone_by_name_then_zone_is_found_without_listing_all_zones(  # noqa: E501
+        self,
+    ):
+        for index in range(150):
+            self._create_zone(f"zone-{index:03}.com")
+        zone = self._create_zone("example.com")
+
+        found_zone = self.route53.get_zone_by_name("example.com")
+
+        self.assertEqual(found_zone["Id"], zone["Id"])
+        self.assertEqual(self.route53_calls, ["ListHostedZonesByName"])
+
+    def test_given_private_and_public_zones_with_same_name_when_get_zone_by_name_then_public_zone_is_returned(  # noqa: E501
+        self,
+    ):
+        self._create_zone("example.com", private=True)
+        zone = self._create_zone("example.com")
+
+        found_zone = self.route53.get_zone_by_name("example.com")
+
+        self.assertEqual(found_zone["Id"], zone["Id"])
+
+    def test_given_public_zone_on_next_page_when_get_zone_by_name_then_pages_of_zones_with_same_name_are_read(  # noqa: E501
+        self,
+    ):
+        private_zone = {
+            "Id": "/hostedzone/Z1",
+            "Name": "example.com.",
+            "CallerReference": "private",
+            "Config": {"PrivateZone": True},
+        }
+        public_zone = {
+            "Id": "/hostedzone/Z2",
+            "Name": "example.com.",
+            "CallerReference": "public",
+            "Config": {"PrivateZone": False},
+        }
+        with Stubber(self.route53.client) as stubber:
+            stubber.add_response(
+                "list_hosted_zones_by_name",
+                {
+                    "HostedZones": [private_zone],
+                    "DNSName": "example.com.",
+                    "IsTruncated": True,
+                    "NextDNSName": "example.com.",
+                    "NextHostedZoneId": "Z2",
+                    "MaxItems": "1",
+                },
+                {"DNSName": "example.com.", "MaxItems": "10"},
+            )
+            stubber.add_response(
+                "list_hosted_zones_by_name",
+                {"HostedZones": [public_zone], "IsTruncated": False, "MaxItems": "1"},
+                {"DNSName": "example.com.", "HostedZoneId": "Z2", "MaxItems": "10"},
+            )
+
+            found_zone = self.route53.get_zone_by_name("example.com")
+
+        self.assertEqual(found_zone, public_zone)
+
+    def test_given_no_zone_with_name_when_get_zone_by_name_then_empty_dict_is_returned(self):
+        self._create_zone("example.org")
+        self._create_zone("sub.example.com")
+
+        self.assertEqual(self.route53.get_zone_by_name("example.com"), {})
+
+    def test_given_more_zones_than_a_page_when_list_hosted_zones_then_all_zones_are_returned(self):
+        for index in range(150):
+            self._create_zone(f"zone-{index:03}.com")
+
+        self.assertEqual(len(self.route53.list_hosted_zones()), 150)